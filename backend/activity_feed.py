@@ -0,0 +1,108 @@
+# activity_feed.py
+"""
+Friends' activity feed (GET /api/feed).
+
+Routes call record(actor, verb, ...) after a rating, a new favourite or a
+group action. record_activity (database.sql) writes one compact event row and
+copies its id into the timelines of the actor's friends: the members of the
+actor's own friend lists, the same people privacy_policy.py treats as friends.
+Friends either side has blocked are skipped, and nothing is recorded when the
+actor's settings do not share it with friends (show_activity off, a private
+profile, or favourites shown only to themselves). Reading a feed is then one
+keyset page of the reader's own timeline, with no joins over friends at read
+time; each row is re-checked against the actor's current settings, lists and
+blocks, so later privacy changes apply at once.
+
+Fan-out costs one row per friend, so an actor with more than
+ACTIVITY_FANOUT_LIMIT friends is switched to pull mode instead: their events
+are not copied, and activity_feed_page merges them into their friends' pages
+at read time. The switch is permanent, so a feed never has a gap where an
+actor moved between modes.
+
+Timelines are written when the event happens: a user added to someone's
+friend list sees their events from then on, not their history. Turning
+show_activity off (hide_actor) or blocking (forget_pair) also deletes entries
+that were already fanned out.
+"""
+import os
+import traceback
+from typing import Any, Dict, List, Optional
+
+from config import supabase_admin
+
+ENABLED = (os.getenv("ACTIVITY_FEED") or "1").lower() in ("1", "true", "yes")
+FANOUT_LIMIT = int(os.getenv("ACTIVITY_FANOUT_LIMIT") or 1000)
+# A bulk change (a favourites import) records at most this many events
+MAX_EVENTS_PER_CHANGE = 10
+
+RATED = "rated"
+FAVOURITED = "favourited"
+CREATED_GROUP = "created_group"
+JOINED_GROUP = "joined_group"
+REQUESTED_MOVIE = "requested_movie"
+
+
+def record(
+    actor_user_id: str,
+    verb: str,
+    tmdb_id: Optional[int] = None,
+    group_id: Optional[str] = None,
+    value: Optional[int] = None,
+) -> Optional[int]:
+    """
+    Record an action and fan it out; returns the event id (None when nothing
+    was recorded). Best-effort: a failure is logged, never raised, so it
+    cannot fail the change that caused it.
+    """
+    if not ENABLED:
+        return None
+    try:
+        result = supabase_admin.rpc("record_activity", {
+            "p_actor": actor_user_id,
+            "p_verb": verb,
+            "p_tmdb_id": tmdb_id,
+            "p_group_id": group_id,
+            "p_value": value,
+            "p_fanout_limit": FANOUT_LIMIT,
+        }).execute()
+        return result.data
+    except Exception as e:
+        print(f"[activity_feed] Failed to record {verb} by {actor_user_id}: {e}")
+        print(traceback.format_exc())
+        return None
+
+
+def read_page(user_id: str, before: Optional[int], limit: int) -> List[Dict[str, Any]]:
+    """Up to limit events of user_id's feed, newest first, older than event id before."""
+    result = (
+        supabase_admin
+        .rpc("activity_feed_page", {"p_user_id": user_id, "p_before": before, "p_limit": limit})
+        .select("*, actor:profiles(user_id, handle)")
+        .execute()
+    )
+    return result.data or []
+
+
+def hide_actor(user_id: str) -> None:
+    """Remove a user's events from every timeline (show_activity was turned off). Best-effort."""
+    try:
+        supabase_admin.table("activity_timelines").delete().eq("actor_user_id", user_id).execute()
+    except Exception as e:
+        print(f"[activity_feed] Failed to hide activity of {user_id}: {e}")
+        print(traceback.format_exc())
+
+
+def forget_pair(user_id: str, other_user_id: str) -> None:
+    """Remove each user's events from the other's timeline (one blocked the other). Best-effort."""
+    try:
+        for reader, actor in ((user_id, other_user_id), (other_user_id, user_id)):
+            (
+                supabase_admin.table("activity_timelines")
+                .delete()
+                .eq("user_id", reader)
+                .eq("actor_user_id", actor)
+                .execute()
+            )
+    except Exception as e:
+        print(f"[activity_feed] Failed to clear timelines of {user_id} and {other_user_id}: {e}")
+        print(traceback.format_exc())
@@ -1,14 +1,25 @@
 # auth.py
-from fastapi import Depends, HTTPException
+from typing import Optional
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from config import supabase, supabase_admin  # client já inicializado/validado
 
 security = HTTPBearer()  # retorna 403 se não houver Authorization
+optional_security = HTTPBearer(auto_error=False)  # None se não houver Authorization
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+# Request state key under which POST /api/batch hands its sub-requests the user it already authenticated
+BATCH_USER_STATE = "batch_user"
+
+async def get_current_user(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
     """
     Valida o JWT (Authorization: Bearer <token>) no Supabase e retorna o usuário.
     """
+    # Sub-requests of a batch were authenticated once, by the batch itself.
+    # Only the server sets request state, so a client cannot forge this.
+    batch_user = getattr(request.state, BATCH_USER_STATE, None)
+    if batch_user is not None:
+        return batch_user
+
     try:
         token = credentials.credentials
         print(f"Validating token: {token[:20]}...")
@@ -53,3 +64,14 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except Exception as e:
         print("Auth error:", repr(e))
         raise HTTPException(status_code=401, detail="Invalid token")
+
+
+async def get_optional_user(request: Request, credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)):
+    """
+    For routes that anonymous visitors may call too: the user when a token
+    is sent (validated like get_current_user, so a bad token is still a 401),
+    otherwise None.
+    """
+    if credentials is None and getattr(request.state, BATCH_USER_STATE, None) is None:
+        return None
+    return await get_current_user(request, credentials)
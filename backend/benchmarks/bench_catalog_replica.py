@@ -0,0 +1,100 @@
+# benchmarks/bench_catalog_replica.py
+"""
+Benchmark for catalog_replica.py on a synthetic catalog (no database needed).
+
+Titles are three words from a Zipf-distributed vocabulary plus the movie id,
+so common words match tens of thousands of titles and rare ones a handful.
+We report:
+  - time to load the whole catalog, and to re-apply an unchanged batch
+  - size of the replica on disk
+  - latency of /search/movies-style queries: popular pages (both sorts),
+    title searches with common and rare words, and lookups by id
+
+Usage (from backend/):
+    python benchmarks/bench_catalog_replica.py --movies 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import catalog_replica  # noqa: E402
+
+
+def synthetic_catalog(n_movies: int, vocab: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    p = 1.0 / np.arange(1, vocab + 1)
+    p /= p.sum()
+    title_words = rng.choice(vocab, size=(n_movies, 3), p=p)
+    ratings = rng.uniform(1, 10, size=n_movies)
+    scores = rng.uniform(1, 5, size=n_movies)
+    return [
+        {
+            "tmdb_id": i + 1,
+            "title": " ".join(f"word{w}" for w in title_words[i]) + f" {i + 1}",
+            "release_year": 1950 + i % 75,
+            "genre": "Drama",
+            "poster": None,
+            "rating": float(ratings[i]),
+            "description": "",
+            "user_rating_count": 0,
+            "user_rating_sum": 0,
+            "user_rating_hist": None,
+            # Most of the catalog has no community ratings yet
+            "user_rating_score": float(scores[i]) if i % 4 == 0 else None,
+        }
+        for i in range(n_movies)
+    ]
+
+
+def timed(label: str, fn, repeat: int):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<34}{elapsed * 1000:8.3f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--movies", type=int, default=100000)
+    parser.add_argument("--vocab", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    movies = synthetic_catalog(args.movies, args.vocab)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "replica.sqlite3")
+        replica = catalog_replica.Replica(path)
+
+        start = time.perf_counter()
+        replica.apply(movies, "2025-01-01T00:00:00+00:00")
+        print(f"initial load:                     {time.perf_counter() - start:.2f}s for {args.movies} movies")
+
+        start = time.perf_counter()
+        written = replica.apply(movies[:1000], "2025-01-01T00:00:00+00:00")
+        print(f"unchanged re-sync of 1000 rows:   {(time.perf_counter() - start) * 1000:.1f} ms ({written} rewritten)")
+        print(f"replica on disk:                  {os.path.getsize(path) / 1e6:.1f} MB")
+
+        timed("popular page 1 (rating)", lambda: replica.search("", 0, 24), args.repeat)
+        timed("popular page 1 (community)", lambda: replica.search("", 0, 24, "community"), args.repeat)
+        timed("popular page 100 (rating)", lambda: replica.search("", 99 * 24, 24), args.repeat)
+        _, total = timed("search common word", lambda: replica.search("word1 ", 0, 24), args.repeat)
+        print(f"{'':<34}({total} matches)")
+        _, total = timed("search rare word", lambda: replica.search(f"word{args.vocab - 1} ", 0, 24), args.repeat)
+        print(f"{'':<34}({total} matches)")
+        timed("search by id suffix", lambda: replica.search(f" {args.movies // 2}", 0, 24), args.repeat)
+        ids = np.random.default_rng(2).integers(1, args.movies + 1, size=24).tolist()
+        timed("get one movie", lambda: replica.get(ids[0]), args.repeat)
+        timed("get 24 movies", lambda: replica.get_many(ids), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# benchmarks/bench_catalog_snapshot.py
+"""
+Benchmark for catalog_snapshot.py on a synthetic catalog (no database needed).
+
+Compares holding the catalog as a memory-mapped snapshot against the two
+ways a worker would otherwise keep it in memory: the row dicts PostgREST
+returns, and MovieOut objects. We report:
+  - snapshot write time and file size
+  - time to open the snapshot in a fresh worker
+  - Python heap used by each representation (tracemalloc)
+  - lookup latency by tmdb_id
+
+Usage (from backend/):
+    python benchmarks/bench_catalog_snapshot.py --movies 100000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("SUPABASE_URL", "https://example.supabase.co")
+os.environ.setdefault("SUPABASE_ANON_KEY", "bench")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "bench")
+import catalog_snapshot  # noqa: E402
+from routes.tmdb_routes import transform_db_movie  # noqa: E402
+
+GENRES = ["Action", "Adventure", "Animation", "Comedy", "Crime", "Documentary", "Drama", "Family", "Fantasy",
+          "History", "Horror", "Music", "Mystery", "Romance", "Science Fiction", "TV Movie", "Thriller", "War", "Western"]
+WORDS = "the a night day city love war return last first king house dark star man woman world story life time".split()
+
+
+def synthetic_catalog(n_movies: int, seed: int = 1):
+    rng = random.Random(seed)
+    return [
+        {
+            "tmdb_id": i * 7 + 1,
+            "title": " ".join(rng.choice(WORDS) for _ in range(3)).title(),
+            "release_year": rng.randint(1930, 2025),
+            "genre": rng.choice(GENRES),
+            "poster": f"https://image.tmdb.org/t/p/w500/{rng.getrandbits(64):016x}.jpg",
+            "rating": round(rng.uniform(1, 10), 3),
+            "description": " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 60))),
+        }
+        for i in range(n_movies)
+    ]
+
+
+def heap_mb(build):
+    tracemalloc.start()
+    obj = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--movies", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=10000)
+    args = parser.parse_args()
+
+    movies = synthetic_catalog(args.movies)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog_snapshot.bin")
+        start = time.perf_counter()
+        catalog_snapshot.write(movies, path)
+        print(f"write:              {time.perf_counter() - start:.2f}s for {args.movies} movies")
+        print(f"file size:          {os.path.getsize(path) / 1e6:.1f} MB")
+
+        start = time.perf_counter()
+        snapshot, snapshot_mb = heap_mb(lambda: catalog_snapshot.CatalogSnapshot(path))
+        print(f"open:               {(time.perf_counter() - start) * 1000:.2f} ms")
+
+        # Decoded from JSON, as PostgREST rows would be, so no strings are shared with `movies`
+        payload = json.dumps(movies)
+        _, dicts_mb = heap_mb(lambda: {m["tmdb_id"]: m for m in json.loads(payload)})
+        _, models_mb = heap_mb(lambda: {m["tmdb_id"]: transform_db_movie(m) for m in json.loads(payload)})
+        print(f"heap, snapshot:     {snapshot_mb:.2f} MB (pages are shared and paged in on demand)")
+        print(f"heap, row dicts:    {dicts_mb:.1f} MB")
+        print(f"heap, MovieOut:     {models_mb:.1f} MB")
+
+        ids = [random.choice(movies)["tmdb_id"] for _ in range(args.lookups)]
+        start = time.perf_counter()
+        for tmdb_id in ids:
+            snapshot.get(tmdb_id)
+        print(f"get:                {(time.perf_counter() - start) / len(ids) * 1e6:.1f} µs per movie")
+        start = time.perf_counter()
+        for tmdb_id in ids:
+            snapshot.genres_of(tmdb_id)
+        print(f"genres_of:          {(time.perf_counter() - start) / len(ids) * 1e6:.1f} µs per movie")
+
+
+if __name__ == "__main__":
+    main()
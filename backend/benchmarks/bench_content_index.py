@@ -0,0 +1,90 @@
+# benchmarks/bench_content_index.py
+"""
+Benchmark for content_index.py on a synthetic catalog (no database needed).
+
+Titles and descriptions are drawn from a Zipf-distributed vocabulary, which
+is roughly how word frequencies in real plot summaries behave. We report:
+  - index build time for the whole catalog, and for an incremental update
+  - size of the index on disk
+  - query latency for one movie, and per movie in a batch
+
+Usage (from backend/):
+    python benchmarks/bench_content_index.py --movies 100000 --vocab 50000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import content_index  # noqa: E402
+
+
+def synthetic_catalog(n_movies: int, vocab: int, words: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    names = [f"w{i}" for i in range(vocab)]
+    p = 1.0 / np.arange(1, vocab + 1)
+    p /= p.sum()
+    title_words = rng.choice(vocab, size=(n_movies, 3), p=p)
+    lengths = rng.integers(words // 2, words * 2, size=n_movies)
+    desc_words = rng.choice(vocab, size=int(lengths.sum()), p=p)
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    return [
+        {
+            "tmdb_id": i + 1,
+            "title": " ".join(names[w] for w in title_words[i]),
+            "description": " ".join(names[w] for w in desc_words[offsets[i]:offsets[i + 1]]),
+        }
+        for i in range(n_movies)
+    ]
+
+
+def dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--movies", type=int, default=100000)
+    parser.add_argument("--vocab", type=int, default=50000)
+    parser.add_argument("--words", type=int, default=40, help="average description length")
+    parser.add_argument("--update", type=int, default=1000, help="movies in the incremental update")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=50)
+    args = parser.parse_args()
+
+    movies = synthetic_catalog(args.movies, args.vocab, args.words)
+    with tempfile.TemporaryDirectory() as index_dir:
+        start = time.perf_counter()
+        content_index.update(movies, index_dir)
+        print(f"full build:         {time.perf_counter() - start:.2f}s for {args.movies} movies")
+
+        start = time.perf_counter()
+        content_index.update(movies[: args.update], index_dir)
+        print(f"incremental update: {time.perf_counter() - start:.2f}s for {args.update} movies")
+
+        index = content_index.ContentIndex.open(index_dir)
+        print(f"index on disk:      {dir_size(index.path) / 1e6:.1f} MB")
+
+        rng = np.random.default_rng(2)
+        ids = rng.integers(1, args.movies + 1, size=args.queries).tolist()
+        index.similar(ids[0])  # warm up the page cache
+        start = time.perf_counter()
+        for tmdb_id in ids:
+            index.similar(tmdb_id)
+        single = (time.perf_counter() - start) / len(ids)
+        print(f"single query:       {single * 1000:.2f} ms")
+
+        start = time.perf_counter()
+        for i in range(0, len(ids), args.batch):
+            index.similar_many(ids[i:i + args.batch])
+        batched = (time.perf_counter() - start) / len(ids)
+        print(f"batched query:      {batched * 1000:.2f} ms per movie (batch of {args.batch})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/bench_movie_json.py
+"""
+Requests/sec of /search/movies with and without the fast JSON path
+(movie_json.py), in-process (no database or network needed).
+
+The database client is replaced by a stub that returns the same synthetic
+page of movie rows every time, so what is measured is the app's own work
+per request: routing, building the response and encoding it. Modes:
+  - model:       PaginatedMoviesResponse validation + FastAPI's encoder
+  - fast:        direct encoding, fragment cache disabled
+  - fast+cache:  direct encoding, cached per-movie fragments
+
+Usage (from backend/):
+    python benchmarks/bench_movie_json.py --requests 3000 --page-size 24
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("SUPABASE_URL", "https://example.supabase.co")
+os.environ.setdefault("SUPABASE_ANON_KEY", "bench")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "bench")
+import httpx  # noqa: E402
+import movie_json  # noqa: E402
+from main import app  # noqa: E402
+
+WORDS = "the a night day city love war return last first king house dark star man woman world story life time".split()
+
+
+def synthetic_rows(n: int, seed: int = 1):
+    rng = random.Random(seed)
+    return [
+        {
+            "tmdb_id": i + 1,
+            "title": " ".join(rng.choice(WORDS) for _ in range(3)).title(),
+            "release_year": rng.randint(1930, 2025),
+            "genre": "Drama, Thriller",
+            "poster": f"https://image.tmdb.org/t/p/w500/{rng.getrandbits(64):016x}.jpg",
+            "rating": round(rng.uniform(1, 10), 3),
+            "description": " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 60))),
+            "user_rating_count": 5,
+            "user_rating_sum": 19,
+            "user_rating_hist": [0, 1, 0, 2, 2],
+        }
+        for i in range(n)
+    ]
+
+
+class StubQuery:
+    """Just enough of the PostgREST query builder for search_movies."""
+
+    def __init__(self, rows):
+        self.result = type("Result", (), {"data": rows, "count": 10000})()
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        return self.result
+
+
+class StubClient:
+    def __init__(self, rows):
+        self.query = StubQuery(rows)
+
+    def table(self, name):
+        return self.query
+
+
+async def requests_per_second(n: int, page_size: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        url = f"/search/movies?page_size={page_size}"
+        for _ in range(50):  # warm up
+            (await client.get(url)).raise_for_status()
+        start = time.perf_counter()
+        for _ in range(n):
+            await client.get(url)
+        return n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--page-size", type=int, default=24)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.page_size)
+    modes = [
+        ("model", {"ENABLED": False}),
+        ("fast", {"ENABLED": True, "CACHE_SIZE": 0}),
+        ("fast+cache", {"ENABLED": True, "CACHE_SIZE": 20000}),
+    ]
+    print(f"encoder: {'orjson' if movie_json.orjson else 'json'}, page size {args.page_size}")
+    baseline = None
+    with patch("routes.tmdb_routes.supabase_admin", StubClient(rows)), patch("catalog_replica.get_replica", return_value=None):
+        for name, settings in modes:
+            movie_json.clear_cache()
+            with patch.multiple(movie_json, **settings):
+                rps = asyncio.run(requests_per_second(args.requests, args.page_size))
+            baseline = baseline or rps
+            print(f"{name:<12}{rps:8.0f} req/s  ({rps / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/bench_recommender.py
+"""
+Benchmark for recommender.py on synthetic data (no database needed).
+
+Users and movies get hidden "taste" vectors; each user rates movies drawn
+towards their taste and a popularity skew. One interaction per user is held
+out, the model is trained on the rest, and we report:
+  - training time
+  - model memory (float32 factors + seen mask) and peak Python allocations
+  - serving latency (one user, and a batch of users)
+  - recall@K of the held-out movie, next to a most-popular baseline
+
+Usage (from backend/):
+    python benchmarks/bench_recommender.py --users 20000 --movies 5000 --per-user 30
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from recommender import build_interactions, train  # noqa: E402
+
+
+def synthetic_interactions(n_users: int, n_movies: int, per_user: int, taste_dims: int = 8, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    user_taste = rng.normal(size=(n_users, taste_dims))
+    movie_taste = rng.normal(size=(n_movies, taste_dims))
+    popularity = np.log(1.0 / np.arange(1, n_movies + 1))  # Zipf-like
+
+    ratings, held_out = [], {}
+    for u in range(n_users):
+        logits = movie_taste @ user_taste[u] + popularity
+        p = np.exp(logits - logits.max())
+        p /= p.sum()
+        movies = rng.choice(n_movies, size=per_user, replace=False, p=p)
+        stars = np.clip(np.round(3 + (movie_taste[movies] @ user_taste[u]) / 2), 1, 5)
+        user_id = f"user-{u}"
+        held_out[user_id] = int(movies[0])
+        for m, s in zip(movies[1:], stars[1:]):
+            ratings.append({"user_id": user_id, "tmdb_id": int(m), "rating": int(s)})
+    return ratings, held_out
+
+
+def recall_at_k(recommendations, held_out, k):
+    hits = sum(1 for uid, recs in recommendations.items() if held_out[uid] in [m for m, _ in recs[:k]])
+    return hits / max(len(recommendations), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--movies", type=int, default=2000)
+    parser.add_argument("--per-user", type=int, default=30)
+    parser.add_argument("--factors", type=int, default=32)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--eval-users", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"Generating {args.users} users x {args.movies} movies, {args.per_user} ratings each...")
+    ratings, held_out = synthetic_interactions(args.users, args.movies, args.per_user)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    matrix = build_interactions(ratings, [])
+    built = time.perf_counter()
+    model = train(*matrix, factors=args.factors, iterations=args.iterations)
+    trained = time.perf_counter()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    eval_users = list(held_out)[:args.eval_users]
+    started_serve = time.perf_counter()
+    for uid in eval_users[:200]:
+        model.recommend(uid, args.k)
+    single_ms = (time.perf_counter() - started_serve) / min(200, len(eval_users)) * 1000
+
+    started_batch = time.perf_counter()
+    recs = model.recommend_many(eval_users, args.k)
+    batch_ms = (time.perf_counter() - started_batch) * 1000
+
+    # Most-popular baseline: the most interacted-with movies the user has not seen
+    counts = np.bincount(matrix[3], minlength=len(model.movie_ids))
+    popular = np.argsort(-counts)
+    baseline = {}
+    for uid in eval_users:
+        u = model.user_index[uid]
+        seen = set(model.seen_indices[model.seen_indptr[u]:model.seen_indptr[u + 1]].tolist())
+        top = [int(model.movie_ids[i]) for i in popular[:args.k + len(seen)] if i not in seen][:args.k]
+        baseline[uid] = [(m, 0.0) for m in top]
+
+    print(f"Interactions:        {len(ratings)}")
+    print(f"Matrix build:        {(built - started):.2f}s")
+    print(f"Training:            {(trained - built):.2f}s ({args.iterations} iterations, {args.factors} factors)")
+    print(f"Model memory:        {model.nbytes / 1e6:.2f} MB (float32 factors + seen mask)")
+    print(f"Peak allocations:    {peak / 1e6:.2f} MB while building + training")
+    print(f"Serve one user:      {single_ms:.3f} ms")
+    print(f"Serve {len(eval_users)} users:    {batch_ms:.1f} ms batched")
+    print(f"Recall@{args.k}:           {recall_at_k(recs, held_out, args.k):.3f}")
+    print(f"Recall@{args.k} popular:   {recall_at_k(baseline, held_out, args.k):.3f}")
+
+
+if __name__ == "__main__":
+    main()
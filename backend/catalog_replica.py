@@ -0,0 +1,388 @@
+# catalog_replica.py
+"""
+Optional local read replica of the movie catalog (CATALOG_REPLICA=1).
+
+The catalog only changes when the batch uploader runs (and as rating
+aggregates move), yet /search/movies, /trending and /movies/{id} each cost a
+PostgREST round-trip. The replica keeps a copy of `movies` in a SQLite file:
+
+  - movies: keyed by tmdb_id, indexed for the rating and community sorts
+  - movies_fts: an FTS5 trigram index over titles, which also serves the
+    existing case-insensitive substring search from the index
+
+Sync is incremental: rows with updated_at past the stored high-water mark
+(less COMMIT_LAG_SECONDS, since updated_at is stamped before a transaction
+commits and a long one can land behind rows already synced) are pulled in
+pages and only rows whose content hash changed are rewritten. Every
+FULL_SYNC_SECONDS a full pass also drops movies deleted upstream.
+
+All workers share the one file, so only the worker holding REPLICA_PATH.lock
+syncs; the others just read. The lock is released when that process exits,
+and the next worker to try takes over.
+
+Readers use one connection per thread (WAL mode, so reads never wait on
+sync). get_replica() returns None when disabled, not yet synced, or lagging
+more than MAX_LAG_SECONDS, and the routes then fall back to PostgREST.
+
+    python catalog_replica.py sync [--full]
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import file_lock
+from config import supabase_admin
+
+ENABLED = (os.getenv("CATALOG_REPLICA") or "").lower() in ("1", "true", "yes")
+REPLICA_PATH = os.getenv("CATALOG_REPLICA_PATH") or os.path.join(os.path.dirname(__file__), "catalog_replica.sqlite3")
+SYNC_SECONDS = int(os.getenv("CATALOG_SYNC_SECONDS") or 60)
+FULL_SYNC_SECONDS = int(os.getenv("CATALOG_FULL_SYNC_SECONDS") or 6 * 60 * 60)
+# Serve from PostgREST instead once the last successful sync is older than this
+MAX_LAG_SECONDS = int(os.getenv("CATALOG_MAX_LAG_SECONDS") or 15 * 60)
+# How far behind the high-water mark an incremental sync starts reading
+COMMIT_LAG_SECONDS = int(os.getenv("CATALOG_COMMIT_LAG_SECONDS") or 5 * 60)
+PAGE_SIZE = 1000
+
+COLUMNS = [
+    "tmdb_id", "title", "release_year", "genre", "poster", "rating", "description",
+    "user_rating_count", "user_rating_sum", "user_rating_hist", "user_rating_score", "genre_mask",
+]
+# Bump when SCHEMA changes; an older replica file is dropped and re-synced
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS movies (
+    tmdb_id INTEGER PRIMARY KEY,
+    title TEXT,
+    release_year INTEGER,
+    genre TEXT,
+    poster TEXT,
+    rating REAL,
+    description TEXT,
+    user_rating_count INTEGER NOT NULL DEFAULT 0,
+    user_rating_sum INTEGER NOT NULL DEFAULT 0,
+    user_rating_hist TEXT,
+    user_rating_score REAL,
+    genre_mask INTEGER NOT NULL DEFAULT 0,
+    content_hash TEXT NOT NULL
+);
+-- Same terms as ORDER_BY so a page is read straight off the index
+CREATE INDEX IF NOT EXISTS movies_rating_idx ON movies (rating DESC, tmdb_id);
+CREATE INDEX IF NOT EXISTS movies_score_idx ON movies (user_rating_score IS NULL, user_rating_score DESC, rating DESC, tmdb_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts USING fts5(
+    title, content='movies', content_rowid='tmdb_id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS movies_ai AFTER INSERT ON movies BEGIN
+    INSERT INTO movies_fts(rowid, title) VALUES (new.tmdb_id, new.title);
+END;
+CREATE TRIGGER IF NOT EXISTS movies_ad AFTER DELETE ON movies BEGIN
+    INSERT INTO movies_fts(movies_fts, rowid, title) VALUES ('delete', old.tmdb_id, old.title);
+END;
+CREATE TRIGGER IF NOT EXISTS movies_au AFTER UPDATE ON movies BEGIN
+    INSERT INTO movies_fts(movies_fts, rowid, title) VALUES ('delete', old.tmdb_id, old.title);
+    INSERT INTO movies_fts(rowid, title) VALUES (new.tmdb_id, new.title);
+END;
+
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+ORDER_BY = {
+    "rating": "m.rating DESC, m.tmdb_id",
+    # NULLs sort first in SQLite DESC, so push unrated movies to the end explicitly
+    "community": "m.user_rating_score IS NULL, m.user_rating_score DESC, m.rating DESC, m.tmdb_id",
+}
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _content_hash(row: Dict[str, Any]) -> str:
+    raw = json.dumps([row.get(c) for c in COLUMNS], default=str, separators=(",", ":"))
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    d = {c: row[c] for c in COLUMNS}
+    d["user_rating_hist"] = json.loads(d["user_rating_hist"]) if d["user_rating_hist"] else None
+    return d
+
+
+class Replica:
+    def __init__(self, path: str = REPLICA_PATH):
+        self.path = path
+        self._local = threading.local()
+        conn = self._write_conn()
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                conn.executescript("DROP TABLE IF EXISTS movies_fts; DROP TABLE IF EXISTS movies; DROP TABLE IF EXISTS meta;")
+            conn.executescript(SCHEMA)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        finally:
+            conn.close()
+
+    def _write_conn(self) -> sqlite3.Connection:
+        return _connect(self.path)
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = _connect(self.path)
+        return conn
+
+    def meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    # SYNC
+
+    def apply(self, rows: List[Dict[str, Any]], high_water: Optional[str], keep_ids: Optional[set] = None) -> int:
+        """
+        Upsert rows whose content changed, optionally delete every movie not in
+        keep_ids (full sync), and record the sync. Returns the number of rows written.
+        """
+        conn = self._write_conn()
+        try:
+            with conn:
+                ids = list({row["tmdb_id"] for row in rows if row.get("tmdb_id")})
+                hashes: Dict[int, str] = {}
+                for i in range(0, len(ids), 500):
+                    chunk = ids[i:i + 500]
+                    hashes.update(conn.execute(
+                        f"SELECT tmdb_id, content_hash FROM movies WHERE tmdb_id IN ({','.join('?' * len(chunk))})", chunk
+                    ).fetchall())
+                changed = []
+                for row in rows:
+                    if not row.get("tmdb_id"):
+                        continue
+                    h = _content_hash(row)
+                    if hashes.get(row["tmdb_id"]) != h:
+                        values = [row.get(c) for c in COLUMNS]
+                        values[COLUMNS.index("user_rating_hist")] = json.dumps(row.get("user_rating_hist") or [0] * 5)
+                        values[COLUMNS.index("user_rating_count")] = row.get("user_rating_count") or 0
+                        values[COLUMNS.index("user_rating_sum")] = row.get("user_rating_sum") or 0
+                        values[COLUMNS.index("genre_mask")] = row.get("genre_mask") or 0
+                        changed.append(values + [h])
+                # A real upsert (not INSERT OR REPLACE) so the UPDATE trigger keeps movies_fts in step
+                placeholders = ",".join("?" * (len(COLUMNS) + 1))
+                updates = ",".join(f"{c} = excluded.{c}" for c in COLUMNS[1:] + ["content_hash"])
+                conn.executemany(
+                    f"INSERT INTO movies ({','.join(COLUMNS)}, content_hash) VALUES ({placeholders}) "
+                    f"ON CONFLICT(tmdb_id) DO UPDATE SET {updates}",
+                    changed,
+                )
+                if keep_ids is not None:
+                    stale = [(i,) for (i,) in conn.execute("SELECT tmdb_id FROM movies") if i not in keep_ids]
+                    conn.executemany("DELETE FROM movies WHERE tmdb_id = ?", stale)
+                    conn.execute("INSERT OR REPLACE INTO meta VALUES ('last_full_sync', ?)", (str(time.time()),))
+                if high_water:
+                    conn.execute("INSERT OR REPLACE INTO meta VALUES ('high_water', ?)", (high_water,))
+                conn.execute("INSERT OR REPLACE INTO meta SELECT 'movies', COUNT(*) FROM movies")
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('last_sync', ?)", (str(time.time()),))
+            return len(changed)
+        finally:
+            conn.close()
+
+    # QUERIES
+
+    def lag_seconds(self) -> Optional[float]:
+        last = self.meta("last_sync")
+        return time.time() - float(last) if last else None
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM movies").fetchone()[0]
+
+    def get(self, tmdb_id: int) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute(f"SELECT {','.join(COLUMNS)} FROM movies WHERE tmdb_id = ?", (tmdb_id,)).fetchone()
+        return _to_dict(row) if row else None
+
+    def get_many(self, tmdb_ids: List[int]) -> List[Dict[str, Any]]:
+        if not tmdb_ids:
+            return []
+        rows = self._conn.execute(
+            f"SELECT {','.join(COLUMNS)} FROM movies WHERE tmdb_id IN ({','.join('?' * len(tmdb_ids))})", list(tmdb_ids)
+        ).fetchall()
+        return [_to_dict(r) for r in rows]
+
+    def search(self, q: str, offset: int, limit: int, sort: str = "rating", genre_mask: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Case-insensitive substring match on title (same pattern as the
+        PostgREST path's ilike '%q%'), or every movie when q is empty,
+        optionally restricted to movies in any of the genres in genre_mask.
+        Returns (page of rows, total matches).
+        """
+        cols = ",".join(f"m.{c}" for c in COLUMNS)
+        page = f"ORDER BY {ORDER_BY[sort]} LIMIT ? OFFSET ?"
+        genre_filter, genre_params = ("AND m.genre_mask & ? != 0", [genre_mask]) if genre_mask else ("", [])
+        if not q and not genre_mask:
+            total = self.meta("movies")
+            total = int(total) if total is not None else self.count()
+            rows = self._conn.execute(f"SELECT {cols} FROM movies m {page}", (limit, offset)).fetchall()
+        elif len(q) < 3 or "%" in q or "_" in q:
+            # No title filter, too short for a trigram, or carries ilike wildcards: plain scan
+            where, params = ("WHERE m.title LIKE ?", [f"%{q}%"]) if q else ("WHERE 1", [])
+            where, params = f"{where} {genre_filter}", params + genre_params
+            total = self._conn.execute(f"SELECT COUNT(*) FROM movies m {where}", params).fetchone()[0]
+            rows = self._conn.execute(f"SELECT {cols} FROM movies m {where} {page}", params + [limit, offset]).fetchall()
+        else:
+            # A trigram phrase query is an index-only substring match
+            phrase = '"' + q.replace('"', '""') + '"'
+            matches = "SELECT rowid FROM movies_fts WHERE movies_fts MATCH ?"
+            if genre_mask:
+                total = self._conn.execute(
+                    f"SELECT COUNT(*) FROM movies m WHERE m.tmdb_id IN ({matches}) {genre_filter}", [phrase] + genre_params
+                ).fetchone()[0]
+            else:
+                total = self._conn.execute("SELECT COUNT(*) FROM movies_fts WHERE movies_fts MATCH ?", (phrase,)).fetchone()[0]
+            catalog = int(self.meta("movies") or 0)
+            if total and (offset + limit) * catalog / total < total:
+                # Common words: walking the sort index and filtering reaches the page
+                # before sorting every match would
+                rows = self._conn.execute(
+                    f"SELECT {cols} FROM movies m WHERE m.title LIKE ? {genre_filter} {page}",
+                    [f"%{q}%"] + genre_params + [limit, offset],
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    f"SELECT {cols} FROM movies m WHERE m.tmdb_id IN ({matches}) {genre_filter} {page}",
+                    [phrase] + genre_params + [limit, offset],
+                ).fetchall()
+        return [_to_dict(r) for r in rows], total
+
+
+# SYNCING FROM POSTGREST
+
+def _rewind(high_water: str) -> str:
+    """The high-water mark less COMMIT_LAG_SECONDS, as a timestamp PostgREST accepts."""
+    try:
+        return (datetime.fromisoformat(high_water) - timedelta(seconds=COMMIT_LAG_SECONDS)).isoformat()
+    except ValueError:
+        return high_water
+
+
+def _fetch_changed(since: Optional[str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Every movie with updated_at after `since` less COMMIT_LAG_SECONDS (all
+    movies when None), keyset-paged on (updated_at, id).
+    """
+    rows: List[Dict[str, Any]] = []
+    last: Optional[Tuple[str, str]] = None
+    while True:
+        query = supabase_admin.table("movies").select(",".join(COLUMNS + ["id", "updated_at"]))
+        if last is not None:
+            query = query.or_(f'updated_at.gt."{last[0]}",and(updated_at.eq."{last[0]}",id.gt.{last[1]})')
+        elif since:
+            # Rows committed late with an earlier timestamp are not missed (unchanged ones hash-skip)
+            query = query.gte("updated_at", _rewind(since))
+        page = query.order("updated_at").order("id").limit(PAGE_SIZE).execute().data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            break
+        last = (page[-1]["updated_at"], page[-1]["id"])
+    high_water = max((r["updated_at"] for r in rows if r.get("updated_at")), default=since)
+    return rows, high_water
+
+
+_replica: Optional[Replica] = None
+_replica_lock = threading.Lock()
+# Open while this process is the one that syncs
+_writer_lock_file = None
+
+
+def _open() -> Replica:
+    global _replica
+    with _replica_lock:
+        if _replica is None:
+            _replica = Replica(REPLICA_PATH)
+        return _replica
+
+
+def _is_writer() -> bool:
+    """Whether this process holds (or could just take) the replica's sync lock."""
+    global _writer_lock_file
+    if _writer_lock_file is None:
+        _writer_lock_file = file_lock.try_acquire(REPLICA_PATH + ".lock")
+    return _writer_lock_file is not None
+
+
+def sync(full: bool = False) -> int:
+    """Pull changes from `movies` into the replica. Returns the number of rows written."""
+    replica = _open()
+    if full:
+        rows, high_water = _fetch_changed(None)
+        written = replica.apply(rows, high_water, keep_ids={r["tmdb_id"] for r in rows if r.get("tmdb_id")})
+    else:
+        rows, high_water = _fetch_changed(replica.meta("high_water"))
+        written = replica.apply(rows, high_water)
+    print(f"[catalog_replica] Synced {len(rows)} changed movie(s), {written} rewritten{' (full)' if full else ''}")
+    return written
+
+
+def get_replica() -> Optional[Replica]:
+    """The replica if enabled and fresh enough to serve from, else None."""
+    if not ENABLED or _replica is None:
+        return None
+    lag = _replica.lag_seconds()
+    if lag is None or lag > MAX_LAG_SECONDS:
+        return None
+    return _replica
+
+
+def status() -> Dict[str, Any]:
+    """Replica freshness for /healthz."""
+    if not ENABLED:
+        return {"enabled": False}
+    if _replica is None:
+        return {"enabled": True, "ready": False}
+    lag = _replica.lag_seconds()
+    return {
+        "enabled": True,
+        "ready": get_replica() is not None,
+        "lag_seconds": round(lag, 1) if lag is not None else None,
+        "movies": _replica.count(),
+        "high_water": _replica.meta("high_water"),
+    }
+
+
+async def sync_periodically() -> None:
+    """
+    Background task started by main.py when the replica is enabled. Every
+    worker opens the replica to read it; only the one holding the lock syncs.
+    """
+    if not ENABLED:
+        return
+    while True:
+        try:
+            replica = await asyncio.to_thread(_open)
+            if not _is_writer():
+                await asyncio.sleep(SYNC_SECONDS)
+                continue
+            last_full = replica.meta("last_full_sync")
+            full = last_full is None or time.time() - float(last_full) >= FULL_SYNC_SECONDS
+            await asyncio.to_thread(sync, full)
+        except Exception as e:
+            print(f"[catalog_replica] Sync failed: {e}")
+            print(traceback.format_exc())
+        await asyncio.sleep(SYNC_SECONDS)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "sync":
+        print("Usage: python catalog_replica.py sync [--full]")
+        sys.exit(1)
+    count = sync(full="--full" in sys.argv[2:])
+    print(f"✅ Replica at {REPLICA_PATH} updated ({count} row(s) written)")
@@ -0,0 +1,275 @@
+# catalog_snapshot.py
+"""
+Compact, memory-mapped snapshot of the movie catalog.
+
+Pulling all of `movies` over the network in every worker is slow at boot, and
+per-row dicts cost far more memory than the data itself. The uploader
+(tmdb-api/batch_uploader.py) instead writes the catalog to one file that
+workers map read-only, so every worker shares the same pages and opening it
+takes milliseconds.
+
+Layout (little-endian; each section starts on an 8-byte boundary):
+
+    header      MAGIC, movie and genre counts, sizes of names and heap
+    tmdb_id     int32[n], sorted, so a lookup is a binary search
+    year        int16[n], 0 when unknown
+    rating      float32[n], NaN when unknown
+    genres      uint32[n], bit i set for genre_names[i]
+    offsets     uint32[3n + 1], start of each string in the heap; a movie's
+                title, poster and description are strings 3i, 3i+1, 3i+2
+    names       genre names, newline-separated
+    heap        UTF-8 strings, back to back
+
+Community rating aggregates change with every rating, so they are not part of
+the snapshot; read them from the database (or the catalog replica).
+
+To rebuild from the database:
+    python catalog_snapshot.py build
+"""
+import bisect
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+SNAPSHOT_PATH = os.getenv("CATALOG_SNAPSHOT_PATH") or os.path.join(os.path.dirname(__file__), "catalog_snapshot.bin")
+# How often a worker checks whether the uploader has replaced the file
+RELOAD_CHECK_SECONDS = 30
+PAGE_SIZE = 1000
+
+MAGIC = b"MCATSNP1"
+# magic, movies, genres, names bytes, heap bytes
+_HEADER = struct.Struct("<8sIIIQ")
+STRINGS = ("title", "poster", "description")
+MAX_GENRES = 32
+
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def split_genres(genre: Optional[str]) -> List[str]:
+    """Genre names in a movie's genre column (a single name, or a comma-separated list)."""
+    return [g.strip() for g in (genre or "").split(",") if g.strip() and g.strip() != "—"]
+
+
+def _sections(n: int, names_size: int):
+    """(name, dtype, count, offset) of every array section, and the heap offset."""
+    layout, offset = [], _align(_HEADER.size)
+    for name, dtype, count in (
+        ("tmdb_id", "<i4", n),
+        ("year", "<i2", n),
+        ("rating", "<f4", n),
+        ("genres", "<u4", n),
+        ("offsets", "<u4", len(STRINGS) * n + 1),
+    ):
+        layout.append((name, np.dtype(dtype), count, offset))
+        offset = _align(offset + np.dtype(dtype).itemsize * count)
+    names_offset = offset
+    return layout, names_offset, _align(names_offset + names_size)
+
+
+# WRITING
+
+def write(movies: Iterable[Dict[str, Any]], path: str = SNAPSHOT_PATH) -> int:
+    """
+    Write a snapshot of the given movie rows (the `movies` table's columns) and
+    atomically replace the file at `path`. Workers that still map the old file
+    keep reading it until they reopen. Returns the number of movies written.
+    """
+    latest = {int(m["tmdb_id"]): m for m in movies if m.get("tmdb_id")}
+    ids = sorted(latest)
+    n = len(ids)
+
+    genre_names: List[str] = []
+    bit: Dict[str, int] = {}
+    year = np.zeros(n, dtype="<i2")
+    rating = np.full(n, np.nan, dtype="<f4")
+    genres = np.zeros(n, dtype="<u4")
+    offsets = np.zeros(len(STRINGS) * n + 1, dtype="<u4")
+    heap = bytearray()
+    for i, tmdb_id in enumerate(ids):
+        m = latest[tmdb_id]
+        year[i] = int(m.get("release_year") or 0)
+        if m.get("rating") is not None:
+            rating[i] = float(m["rating"])
+        for name in split_genres(m.get("genre")):
+            if name not in bit:
+                if len(genre_names) == MAX_GENRES:
+                    raise ValueError(f"More than {MAX_GENRES} distinct genres")
+                bit[name] = len(genre_names)
+                genre_names.append(name)
+            genres[i] |= 1 << bit[name]
+        for k, field in enumerate(STRINGS):
+            offsets[len(STRINGS) * i + k] = len(heap)
+            heap += (m.get(field) or "").encode()
+    offsets[-1] = len(heap)
+    if len(heap) >= 1 << 32:
+        raise ValueError("String heap larger than 4 GB")
+
+    names = "\n".join(genre_names).encode()
+    layout, names_offset, heap_offset = _sections(n, len(names))
+    arrays = {"tmdb_id": np.array(ids, dtype="<i4"), "year": year, "rating": rating, "genres": genres, "offsets": offsets}
+
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, n, len(genre_names), len(names), len(heap)))
+        for name, _, _, offset in layout:
+            f.seek(offset)
+            f.write(arrays[name].tobytes())
+        f.seek(names_offset)
+        f.write(names)
+        f.seek(heap_offset)
+        f.write(heap)
+        f.truncate(heap_offset + len(heap))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return n
+
+
+def fetch_catalog(client) -> List[Dict[str, Any]]:
+    """Every movie row, keyset-paged on tmdb_id, from a supabase client."""
+    rows: List[Dict[str, Any]] = []
+    last = None
+    while True:
+        query = client.table("movies").select("tmdb_id,title,release_year,genre,poster,rating,description")
+        if last is not None:
+            query = query.gt("tmdb_id", last)
+        page = query.order("tmdb_id").limit(PAGE_SIZE).execute().data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        last = page[-1]["tmdb_id"]
+
+
+# READING
+
+class CatalogSnapshot:
+    """Read-only view of a snapshot file; columns are numpy views over the mapping."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            self.stamp = (st.st_ino, st.st_mtime_ns)
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n, n_genres, names_size, heap_size = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot")
+        layout, names_offset, self._heap_offset = _sections(n, names_size)
+        if self._heap_offset + heap_size > len(self._mm):
+            raise ValueError(f"{path} is truncated")
+        for name, dtype, count, offset in layout:
+            setattr(self, name, np.frombuffer(self._mm, dtype=dtype, count=count, offset=offset))
+        # Typed memoryviews over the same pages: much cheaper than numpy for single-element reads
+        view = memoryview(self._mm)
+        self._cols = {
+            name: view[offset:offset + dtype.itemsize * count].cast(dtype.char)
+            for name, dtype, count, offset in layout
+        }
+        names = bytes(self._mm[names_offset:names_offset + names_size]).decode()
+        self.genre_names: List[str] = names.split("\n") if names else []
+
+    @classmethod
+    def open(cls, path: str = SNAPSHOT_PATH) -> Optional["CatalogSnapshot"]:
+        """The snapshot at `path`, or None if none has been written yet."""
+        if not os.path.exists(path):
+            return None
+        return cls(path)
+
+    def __len__(self) -> int:
+        return len(self.tmdb_id)
+
+    def __contains__(self, tmdb_id: int) -> bool:
+        return self._row(tmdb_id) is not None
+
+    def _row(self, tmdb_id: int) -> Optional[int]:
+        ids = self._cols["tmdb_id"]
+        i = bisect.bisect_left(ids, tmdb_id)
+        return i if i < len(ids) and ids[i] == tmdb_id else None
+
+    def _string(self, i: int, k: int) -> str:
+        offsets, j = self._cols["offsets"], len(STRINGS) * i + k
+        return self._mm[self._heap_offset + offsets[j]:self._heap_offset + offsets[j + 1]].decode()
+
+    def _genres(self, i: int) -> List[str]:
+        mask = self._cols["genres"][i]
+        return [name for b, name in enumerate(self.genre_names) if mask >> b & 1]
+
+    def genres_of(self, tmdb_id: int) -> List[str]:
+        i = self._row(tmdb_id)
+        return [] if i is None else self._genres(i)
+
+    def genre_mask(self, names: Iterable[str]) -> int:
+        """Bitmask of the given genre names (unknown names are ignored)."""
+        mask = 0
+        for name in names:
+            if name in self.genre_names:
+                mask |= 1 << self.genre_names.index(name)
+        return mask
+
+    def get(self, tmdb_id: int) -> Optional[Dict[str, Any]]:
+        """One movie in the shape of a `movies` row, or None if not in the snapshot."""
+        i = self._row(tmdb_id)
+        if i is None:
+            return None
+        year, rating = self._cols["year"][i], self._cols["rating"][i]
+        row: Dict[str, Any] = {
+            "tmdb_id": self._cols["tmdb_id"][i],
+            "release_year": year or None,
+            "rating": None if math.isnan(rating) else round(rating, 3),
+            "genre": ", ".join(self._genres(i)) or None,
+        }
+        for k, field in enumerate(STRINGS):
+            row[field] = self._string(i, k) or None
+        return row
+
+    def get_many(self, tmdb_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """tmdb_id -> movie row for the ids present in the snapshot."""
+        found = {}
+        for tmdb_id in tmdb_ids:
+            row = self.get(tmdb_id)
+            if row is not None:
+                found[tmdb_id] = row
+        return found
+
+
+_snapshot: Optional[CatalogSnapshot] = None
+_snapshot_lock = threading.Lock()
+_last_check = 0.0
+
+
+def get_snapshot() -> Optional[CatalogSnapshot]:
+    """The current snapshot, reopened when the uploader has replaced the file."""
+    global _snapshot, _last_check
+    now = time.monotonic()
+    if _snapshot is not None and now - _last_check < RELOAD_CHECK_SECONDS:
+        return _snapshot
+    with _snapshot_lock:
+        _last_check = now
+        try:
+            st = os.stat(SNAPSHOT_PATH)
+        except FileNotFoundError:
+            return _snapshot
+        if _snapshot is None or _snapshot.stamp != (st.st_ino, st.st_mtime_ns):
+            try:
+                _snapshot = CatalogSnapshot(SNAPSHOT_PATH)
+            except Exception as e:
+                print(f"[catalog_snapshot] Failed to open {SNAPSHOT_PATH}: {e}")
+    return _snapshot
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "build":
+        print("Usage: python catalog_snapshot.py build")
+        sys.exit(1)
+    from config import supabase_admin
+    count = write(fetch_catalog(supabase_admin))
+    print(f"✅ Wrote {count} movie(s) to {SNAPSHOT_PATH}")
@@ -0,0 +1,224 @@
+# compression.py
+"""
+Response compression for the API.
+
+CompressionMiddleware compresses a response when the client accepts br or
+gzip (br preferred; brotli is optional), its Content-Type is in
+COMPRESSIBLE_TYPES and it is at least COMPRESSION_MIN_SIZE bytes. Responses
+with a Content-Length are compressed in one piece; streamed ones (the
+account export) are compressed chunk by chunk and flushed after each chunk,
+so nothing is buffered and the client keeps receiving data as it is produced.
+
+Levels default to COMPRESSION_GZIP_LEVEL / COMPRESSION_BROTLI_QUALITY and can
+be overridden per path prefix:
+    COMPRESSION_ROUTE_LEVELS="/api/export=1:1,/search/movies=6:5"
+(gzip level:brotli quality). The CPU time spent compressing and the bytes
+saved are counted per route and reported by stats() (see /healthz) to guide
+those choices. Counters are per worker.
+"""
+import os
+import threading
+import time
+import zlib
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from static_assets import accepted_encodings
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only without it
+    brotli = None
+
+ENABLED = (os.getenv("COMPRESSION_ENABLED") or "1").lower() in ("1", "true", "yes")
+MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE") or 1024)
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL") or 5)
+BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY") or 4)
+
+COMPRESSIBLE_TYPES = (
+    "application/json", "application/x-ndjson", "application/javascript",
+    "text/", "image/svg+xml",
+)
+# Status codes whose body must not be re-encoded
+_SKIP_STATUS = (204, 206, 304)
+
+
+def _parse_route_levels(value: str) -> Dict[str, Tuple[int, int]]:
+    levels = {}
+    for item in value.split(","):
+        prefix, _, spec = item.strip().partition("=")
+        if not prefix or not spec:
+            continue
+        gzip_level, _, brotli_quality = spec.partition(":")
+        levels[prefix] = (int(gzip_level), int(brotli_quality or BROTLI_QUALITY))
+    return levels
+
+
+ROUTE_LEVELS = _parse_route_levels(os.getenv("COMPRESSION_ROUTE_LEVELS") or "")
+
+# route -> [responses, bytes in, bytes out, CPU seconds]
+_stats: Dict[str, list] = {}
+_stats_lock = threading.Lock()
+
+
+def levels_for(path: str) -> Tuple[int, int]:
+    """(gzip level, brotli quality) for a request path: the longest matching prefix in ROUTE_LEVELS."""
+    best = None
+    for prefix in ROUTE_LEVELS:
+        if path.startswith(prefix) and (best is None or len(prefix) > len(best)):
+            best = prefix
+    return ROUTE_LEVELS[best] if best is not None else (GZIP_LEVEL, BROTLI_QUALITY)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    accepted = accepted_encodings(accept_encoding)
+    candidates = [e for e in (("br",) if brotli is not None else ()) + ("gzip",) if e in accepted]
+    # Ties go to br, the better ratio
+    return max(candidates, key=lambda e: accepted[e], default=None)
+
+
+# Event streams are long-lived and tiny per message; proxies expect them unencoded
+INCOMPRESSIBLE_TYPES = ("text/event-stream",)
+
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";")[0].strip().lower()
+    return media_type.startswith(COMPRESSIBLE_TYPES) and media_type not in INCOMPRESSIBLE_TYPES
+
+
+class _Encoder:
+    """Incremental gzip or brotli encoder that tracks its own CPU time."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._obj = brotli.Compressor(quality=brotli_quality)
+            self._compress, self._flush, self._finish = self._obj.process, self._obj.flush, self._obj.finish
+        else:
+            # wbits 16+ writes a gzip header and trailer
+            self._obj = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._compress = self._obj.compress
+            self._flush = lambda: self._obj.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = self._obj.flush
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu = 0.0
+
+    def encode(self, data: bytes, last: bool) -> bytes:
+        start = time.thread_time()
+        out = self._compress(data)
+        out += self._finish() if last else self._flush()
+        self.cpu += time.thread_time() - start
+        self.bytes_in += len(data)
+        self.bytes_out += len(out)
+        return out
+
+
+def _record(route: str, encoder: _Encoder) -> None:
+    with _stats_lock:
+        entry = _stats.setdefault(route, [0, 0, 0, 0.0])
+        entry[0] += 1
+        entry[1] += encoder.bytes_in
+        entry[2] += encoder.bytes_out
+        entry[3] += encoder.cpu
+
+
+def stats() -> Dict[str, Dict[str, float]]:
+    """Per route: responses compressed, bytes in/out, compression ratio and CPU time."""
+    with _stats_lock:
+        return {
+            route: {
+                "responses": n,
+                "bytes_in": bytes_in,
+                "bytes_out": bytes_out,
+                "ratio": round(bytes_in / bytes_out, 2) if bytes_out else None,
+                "cpu_ms": round(cpu * 1000, 2),
+                "cpu_ms_per_response": round(cpu * 1000 / n, 3),
+            }
+            for route, (n, bytes_in, bytes_out, cpu) in _stats.items()
+        }
+
+
+def reset_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+def _route_name(scope: Scope) -> str:
+    # The router stores the matched route in the scope; unmatched paths share one bucket
+    route = scope.get("route")
+    return getattr(route, "path", None) or ("(static)" if route is not None else "(unmatched)")
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not ENABLED or scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        encoder: Optional[_Encoder] = None
+        # Body of a sized response, collected until the last chunk
+        sized = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, encoder, sized, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                length = headers.get("content-length")
+                if (
+                    message["status"] < 200
+                    or message["status"] in _SKIP_STATUS
+                    or "content-encoding" in headers
+                    or "no-transform" in headers.get("cache-control", "")
+                    or not is_compressible(headers.get("content-type", ""))
+                    or (length is not None and int(length) < MIN_SIZE)
+                ):
+                    passthrough = True
+                    await send(message)
+                    return
+                start = message
+                if length is not None:
+                    sized = []
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if sized is not None:
+                sized.append(body)
+                if more:
+                    return
+                body = b"".join(sized)
+            if encoder is None:
+                encoder = _Encoder(encoding, *levels_for(scope["path"]))
+                headers = MutableHeaders(raw=start["headers"])
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                del headers["Content-Length"]
+                # The encoded body is not byte-identical to what a strong ETag named
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = "W/" + etag
+                out = encoder.encode(body, last=not more)
+                if sized is not None:
+                    headers["Content-Length"] = str(len(out))
+                await send(start)
+            else:
+                out = encoder.encode(body, last=not more)
+            await send({"type": "http.response.body", "body": out, "more_body": more})
+            if not more:
+                _record(_route_name(scope), encoder)
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,284 @@
+# content_index.py
+"""
+Content-based "more like this" from movie titles and descriptions.
+
+New titles have no ratings yet, so similarity_index.py cannot place them. This
+index works from text alone and runs fully offline:
+
+  - Title and description are tokenized (title words count double) and each
+    token is hashed into one of TERM_BUCKETS columns, so no vocabulary has to
+    be kept in sync between builds.
+  - Rows are TF-IDF weighted ((1 + log tf) * idf) and L2-normalized, so the
+    dot product of two rows is their cosine similarity.
+  - The matrix is stored column-wise too (an inverted index: term -> movies),
+    which turns "score every movie against these queries" into a batched
+    sparse dot product: gather the postings of the queries' terms and sum the
+    products per (query, movie) with one bincount.
+
+The uploader (tmdb-api/batch_uploader.py) updates the index at ingest time.
+Arrays are plain .npy files opened with mmap, so every worker shares one copy
+of the pages. Each update is written to a new version directory and published
+by atomically replacing the CURRENT pointer file.
+"""
+import os
+import re
+import shutil
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+INDEX_DIR = os.getenv("CONTENT_INDEX_DIR") or os.path.join(os.path.dirname(__file__), "content_index")
+
+TERM_BUCKETS = 1 << 18
+TITLE_WEIGHT = 2
+# Only a query's highest-weighted terms are matched; the rest barely move the ranking
+QUERY_TERMS = 40
+# Dense (query x movie) score cells per batch; bigger blocks thrash the cache
+BLOCK_CELLS = 1 << 20
+# Versions kept on disk (older ones may still be mapped by running workers)
+KEEP_VERSIONS = 2
+# How often a worker checks CURRENT for a newer version
+RELOAD_CHECK_SECONDS = 30
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_STOPWORDS = frozenset("""
+a about after all also an and any are as at be been but by can could do does for from had has have he her
+his how i if in into is it its just more most no not of on one or our out over she so some than that the
+their them then there these they this to up was we were what when where which while who will with would you
+your it's he's she's they're""".split())
+
+
+def _stem(token: str) -> str:
+    """Very light stemming: fold simple plurals ("stars" -> "star", but not "boss")."""
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return [_stem(t) for t in _TOKEN_RE.findall((text or "").lower()) if t not in _STOPWORDS and len(t) > 1]
+
+
+def _bucket(token: str) -> int:
+    # crc32 is stable across processes (unlike hash()), which keeps buckets valid between builds
+    return zlib.crc32(token.encode()) % TERM_BUCKETS
+
+
+def term_counts(title: Optional[str], description: Optional[str]) -> Counter:
+    counts: Counter = Counter()
+    for t in tokenize(title):
+        counts[_bucket(t)] += TITLE_WEIGHT
+    for t in tokenize(description):
+        counts[_bucket(t)] += 1
+    return counts
+
+
+# BUILDING
+
+def _weigh(indptr: np.ndarray, terms: np.ndarray, tf: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """TF-IDF weights for raw counts, L2-normalized per row. Returns (weights, document frequencies)."""
+    n_docs = len(indptr) - 1
+    df = np.bincount(terms, minlength=TERM_BUCKETS).astype(np.int32)
+    idf = np.log((1.0 + n_docs) / (1.0 + df)) + 1.0
+    weights = (1.0 + np.log(np.maximum(tf, 1.0))) * idf[terms]
+    rows = np.repeat(np.arange(n_docs), np.diff(indptr))
+    norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=n_docs))
+    weights /= np.where(norms[rows] > 0, norms[rows], 1.0)
+    return weights.astype(np.float32), df
+
+
+def _write_version(ids: np.ndarray, indptr: np.ndarray, terms: np.ndarray, tf: np.ndarray, index_dir: str) -> str:
+    """Write a complete index version and publish it as CURRENT."""
+    weights, df = _weigh(indptr, terms, tf)
+    rows = np.repeat(np.arange(len(ids), dtype=np.int32), np.diff(indptr))
+    order = np.argsort(terms, kind="stable")
+    postings_indptr = np.zeros(TERM_BUCKETS + 1, dtype=np.int64)
+    np.cumsum(np.bincount(terms, minlength=TERM_BUCKETS), out=postings_indptr[1:])
+
+    version = f"v{time.time_ns()}"
+    path = os.path.join(index_dir, version)
+    os.makedirs(path)
+    arrays = {
+        "ids": ids.astype(np.int32),
+        "indptr": indptr.astype(np.int64),
+        "terms": terms.astype(np.int32),
+        "tf": tf.astype(np.float32),
+        "weights": weights,
+        "df": df,
+        "postings_indptr": postings_indptr,
+        "postings_docs": rows[order],
+        "postings_weights": weights[order],
+    }
+    for name, arr in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), arr)
+
+    pointer = os.path.join(index_dir, "CURRENT")
+    with open(pointer + ".tmp", "w") as f:
+        f.write(version)
+    os.replace(pointer + ".tmp", pointer)
+
+    versions = sorted(d for d in os.listdir(index_dir) if d.startswith("v") and os.path.isdir(os.path.join(index_dir, d)))
+    for old in versions[:-KEEP_VERSIONS]:
+        shutil.rmtree(os.path.join(index_dir, old), ignore_errors=True)
+    return path
+
+
+def update(movies: Iterable[Dict], index_dir: str = INDEX_DIR) -> int:
+    """
+    Add or replace movies ({"tmdb_id", "title", "description"}) and republish
+    the index. IDF and normalization are recomputed for the whole catalog,
+    which is a few vectorized passes over the stored term counts.
+    Returns the number of movies in the index.
+    """
+    new_ids, new_rows = [], []
+    for m in movies:
+        if m.get("tmdb_id"):
+            new_ids.append(int(m["tmdb_id"]))
+            new_rows.append(term_counts(m.get("title"), m.get("description")))
+
+    os.makedirs(index_dir, exist_ok=True)
+    current = ContentIndex.open(index_dir)
+    if current is not None:
+        # Keep existing rows except the ones being replaced
+        keep = ~np.isin(current.ids, np.array(new_ids, dtype=np.int32))
+        lengths = np.diff(current.indptr)[keep]
+        entry_keep = np.repeat(keep, np.diff(current.indptr))
+        ids = [np.asarray(current.ids[keep])]
+        lens = [lengths]
+        terms = [np.asarray(current.terms[entry_keep])]
+        tf = [np.asarray(current.tf[entry_keep])]
+    else:
+        ids, lens, terms, tf = [np.zeros(0, np.int32)], [np.zeros(0, np.int64)], [np.zeros(0, np.int32)], [np.zeros(0, np.float32)]
+
+    # Last occurrence wins if a batch contains the same movie twice
+    latest = {tmdb_id: counts for tmdb_id, counts in zip(new_ids, new_rows)}
+    for tmdb_id, counts in latest.items():
+        ids.append(np.array([tmdb_id], dtype=np.int32))
+        lens.append(np.array([len(counts)], dtype=np.int64))
+        items = sorted(counts.items())
+        terms.append(np.array([t for t, _ in items], dtype=np.int32))
+        tf.append(np.array([c for _, c in items], dtype=np.float32))
+
+    all_ids = np.concatenate(ids)
+    indptr = np.zeros(len(all_ids) + 1, dtype=np.int64)
+    np.cumsum(np.concatenate(lens), out=indptr[1:])
+    _write_version(all_ids, indptr, np.concatenate(terms), np.concatenate(tf), index_dir)
+    return len(all_ids)
+
+
+# QUERYING
+
+class ContentIndex:
+    """Read-only view of one index version; all arrays are memory-mapped."""
+
+    def __init__(self, path: str):
+        self.path = path
+        load = lambda name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+        self.ids = load("ids")
+        self.indptr = load("indptr")
+        self.terms = load("terms")
+        self.tf = load("tf")
+        self.weights = load("weights")
+        self.postings_indptr = load("postings_indptr")
+        self.postings_docs = load("postings_docs")
+        self.postings_weights = load("postings_weights")
+        self.row = {int(m): i for i, m in enumerate(self.ids)}
+
+    @classmethod
+    def open(cls, index_dir: str = INDEX_DIR) -> Optional["ContentIndex"]:
+        """The CURRENT version, or None if nothing has been built yet."""
+        try:
+            with open(os.path.join(index_dir, "CURRENT")) as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return cls(os.path.join(index_dir, version))
+
+    def _query_terms(self, row: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = self.indptr[row], self.indptr[row + 1]
+        terms, weights = np.asarray(self.terms[start:end]), np.asarray(self.weights[start:end])
+        if len(terms) > QUERY_TERMS:
+            top = np.argpartition(-weights, QUERY_TERMS - 1)[:QUERY_TERMS]
+            terms, weights = terms[top], weights[top]
+        return terms, weights
+
+    def similar_many(self, tmdb_ids: List[int], k: int = 20) -> Dict[int, List[Tuple[int, float]]]:
+        """
+        Top-k (tmdb_id, cosine) neighbours for several movies, scored in blocks
+        of queries with one batched sparse dot product per block.
+        """
+        results: Dict[int, List[Tuple[int, float]]] = {m: [] for m in tmdb_ids}
+        queries = [(m, self.row[m]) for m in tmdb_ids if m in self.row]
+        n = len(self.ids)
+        if not queries or n < 2:
+            return results
+        block = max(1, BLOCK_CELLS // n)
+        for i in range(0, len(queries), block):
+            results.update(self._score_block(queries[i:i + block], k))
+        return results
+
+    def _score_block(self, queries: List[Tuple[int, int]], k: int) -> Dict[int, List[Tuple[int, float]]]:
+        results: Dict[int, List[Tuple[int, float]]] = {}
+        n = len(self.ids)
+        q_local, q_terms, q_weights = [], [], []
+        for i, (_, row) in enumerate(queries):
+            terms, weights = self._query_terms(row)
+            q_local.append(np.full(len(terms), i))
+            q_terms.append(terms)
+            q_weights.append(weights)
+        q_local, q_terms, q_weights = np.concatenate(q_local), np.concatenate(q_terms), np.concatenate(q_weights)
+
+        # Expand each query term into its postings list
+        starts, ends = self.postings_indptr[q_terms], self.postings_indptr[q_terms + 1]
+        lengths = ends - starts
+        total = int(lengths.sum())
+        if not total:
+            return results
+        offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        entry = offsets + np.arange(total)
+        docs = np.asarray(self.postings_docs[entry]).astype(np.int64)
+        products = np.repeat(q_weights, lengths) * np.asarray(self.postings_weights[entry])
+        flat = np.repeat(q_local, lengths).astype(np.int64) * n + docs
+        scores = np.bincount(flat, weights=products, minlength=len(queries) * n).reshape(len(queries), n)
+
+        for i, (tmdb_id, row) in enumerate(queries):
+            s = scores[i]
+            s[row] = 0.0  # not similar to itself
+            kk = min(k, n - 1)
+            top = np.argpartition(-s, kk - 1)[:kk]
+            top = top[np.argsort(-s[top], kind="stable")]
+            results[tmdb_id] = [(int(self.ids[j]), float(s[j])) for j in top if s[j] > 0]
+        return results
+
+    def similar(self, tmdb_id: int, k: int = 20) -> List[Tuple[int, float]]:
+        return self.similar_many([tmdb_id], k)[tmdb_id]
+
+
+_index: Optional[ContentIndex] = None
+_index_lock = threading.Lock()
+_last_check = 0.0
+
+
+def get_index() -> Optional[ContentIndex]:
+    """The current index, reopened when the uploader has published a new version."""
+    global _index, _last_check
+    now = time.monotonic()
+    if _index is not None and now - _last_check < RELOAD_CHECK_SECONDS:
+        return _index
+    with _index_lock:
+        _last_check = now
+        try:
+            with open(os.path.join(INDEX_DIR, "CURRENT")) as f:
+                path = os.path.join(INDEX_DIR, f.read().strip())
+        except FileNotFoundError:
+            return _index
+        if _index is None or _index.path != path:
+            try:
+                _index = ContentIndex(path)
+            except Exception as e:
+                print(f"[content_index] Failed to open {path}: {e}")
+    return _index
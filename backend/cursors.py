@@ -0,0 +1,28 @@
+# cursors.py
+"""
+Opaque keyset-pagination cursors.
+
+A cursor is the sort key of the last item on a page (e.g. [score, tmdb_id]),
+JSON-encoded and base64url'd so clients treat it as an opaque string and pass
+it back unchanged to get the next page.
+"""
+import base64
+import json
+from typing import Any, List
+
+
+def encode_cursor(values: List[Any]) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Raises ValueError if the cursor was not produced by encode_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    if not isinstance(values, list):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return values
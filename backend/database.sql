@@ -135,4 +135,582 @@ CREATE TABLE group_movie_requests (
         FOREIGN KEY (requested_by_user_id)
         REFERENCES profiles (user_id)
         ON DELETE SET NULL
-);
\ No newline at end of file
+);
+
+-- Per-group genre aggregates for /api/groups/{id}/top-genre, kept up to date
+-- by group_genre_stats.py (rebuild with: python group_genre_stats.py rebuild)
+CREATE TABLE group_genre_stats (
+    group_id UUID NOT NULL,
+    genre TEXT NOT NULL,
+    fav_count INT4 NOT NULL DEFAULT 0,
+    rank_sum NUMERIC NOT NULL DEFAULT 0,
+    rank_count INT4 NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (group_id, genre),
+
+    CONSTRAINT fk_group_genre_stats_group
+        FOREIGN KEY (group_id)
+        REFERENCES Groups (id)
+        ON DELETE CASCADE
+);
+
+-- Adds the same per-genre deltas to several groups atomically.
+-- p_deltas: [{"genre": "Action", "fav_count": 1, "rank_sum": 3, "rank_count": 1}, ...]
+CREATE OR REPLACE FUNCTION apply_group_genre_deltas(p_group_ids UUID[], p_deltas JSONB)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    INSERT INTO group_genre_stats AS s (group_id, genre, fav_count, rank_sum, rank_count)
+    SELECT g.id, d.genre, d.fav_count, d.rank_sum, d.rank_count
+    FROM unnest(p_group_ids) AS g(id)
+    CROSS JOIN jsonb_to_recordset(p_deltas) AS d(genre TEXT, fav_count INT4, rank_sum NUMERIC, rank_count INT4)
+    ON CONFLICT (group_id, genre) DO UPDATE SET
+        fav_count = s.fav_count + EXCLUDED.fav_count,
+        rank_sum = s.rank_sum + EXCLUDED.rank_sum,
+        rank_count = s.rank_count + EXCLUDED.rank_count;
+
+    DELETE FROM group_genre_stats
+    WHERE group_id = ANY(p_group_ids) AND fav_count <= 0;
+$$;
+
+-- Community rating aggregates per movie, maintained incrementally by the
+-- user_movie_ratings_count trigger below (rebuild with: python movie_rating_stats.py rebuild)
+ALTER TABLE Movies
+    ADD COLUMN user_rating_count INT4 NOT NULL DEFAULT 0,
+    ADD COLUMN user_rating_sum INT4 NOT NULL DEFAULT 0,
+    ADD COLUMN user_rating_hist INT4[] NOT NULL DEFAULT '{0,0,0,0,0}',
+    -- Bayesian average; NULL until the movie has been rated
+    ADD COLUMN user_rating_score NUMERIC;
+
+CREATE INDEX movies_user_rating_score_idx ON Movies (user_rating_score DESC NULLS LAST);
+
+-- Adds per-movie rating deltas atomically.
+-- p_deltas: [{"tmdb_id": 550, "count": 0, "sum": 1, "hist": [0, 0, 0, -1, 1]}, ...]
+-- The prior (5 votes at 3.0) matches PRIOR_VOTES/PRIOR_MEAN in movie_rating_stats.py.
+CREATE OR REPLACE FUNCTION apply_movie_rating_deltas(p_deltas JSONB)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    UPDATE Movies AS m SET
+        user_rating_count = m.user_rating_count + d.count,
+        user_rating_sum = m.user_rating_sum + d.sum,
+        user_rating_hist = ARRAY(
+            SELECT h.old + h.delta
+            FROM unnest(m.user_rating_hist, ARRAY(SELECT jsonb_array_elements_text(d.hist)::INT4)) AS h(old, delta)
+        ),
+        user_rating_score = CASE
+            WHEN m.user_rating_count + d.count > 0
+            THEN (m.user_rating_sum + d.sum + 5 * 3.0) / (m.user_rating_count + d.count + 5)
+        END
+    FROM jsonb_to_recordset(p_deltas) AS d(tmdb_id INT4, count INT4, sum INT4, hist JSONB)
+    WHERE m.tmdb_id = d.tmdb_id;
+$$;
+
+-- One movie's delta for a rating going from p_old to p_new (NULL: no rating),
+-- in the format of apply_movie_rating_deltas.
+CREATE OR REPLACE FUNCTION movie_rating_delta(p_tmdb_id INT4, p_old INT4, p_new INT4)
+RETURNS JSONB
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT jsonb_build_object(
+        'tmdb_id', p_tmdb_id,
+        'count', (p_new IS NOT NULL)::INT4 - (p_old IS NOT NULL)::INT4,
+        'sum', COALESCE(p_new, 0) - COALESCE(p_old, 0),
+        'hist', (
+            SELECT jsonb_agg(COALESCE(i = p_new, FALSE)::INT4 - COALESCE(i = p_old, FALSE)::INT4 ORDER BY i)
+            FROM generate_series(1, 5) AS i
+        )
+    );
+$$;
+
+-- Keeps the aggregates in step with user_movie_ratings in the same
+-- transaction as the write, so concurrent upserts of one rating (the second
+-- one sees the first as OLD) are counted once.
+CREATE OR REPLACE FUNCTION count_movie_rating()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND OLD.tmdb_id IS NOT DISTINCT FROM NEW.tmdb_id THEN
+        IF OLD.rating IS DISTINCT FROM NEW.rating THEN
+            PERFORM apply_movie_rating_deltas(jsonb_build_array(movie_rating_delta(NEW.tmdb_id, OLD.rating, NEW.rating)));
+        END IF;
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.rating IS NOT NULL THEN
+        PERFORM apply_movie_rating_deltas(jsonb_build_array(movie_rating_delta(OLD.tmdb_id, OLD.rating, NULL)));
+    END IF;
+    IF TG_OP IN ('UPDATE', 'INSERT') AND NEW.rating IS NOT NULL THEN
+        PERFORM apply_movie_rating_deltas(jsonb_build_array(movie_rating_delta(NEW.tmdb_id, NULL, NEW.rating)));
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER user_movie_ratings_count
+    AFTER INSERT OR UPDATE OF rating, tmdb_id OR DELETE ON user_movie_ratings
+    FOR EACH ROW
+    EXECUTE FUNCTION count_movie_rating();
+
+-- Applies a batch of favourite mutations for one user in one transaction and
+-- renumbers ranks 1..n. Ops run in order against the current list:
+--   {"op": "add", "movie_id": 550}                  append (no-op if present)
+--   {"op": "add", "movie_id": 550, "position": 1}   insert at a 1-based position
+--   {"op": "remove", "movie_id": 550}
+--   {"op": "move", "movie_id": 550, "position": 3}  (no-op if not a favourite)
+-- Returns {"before": [{"movie_id", "rank"}...], "after": [...]} in rank order.
+CREATE OR REPLACE FUNCTION apply_favourite_ops(p_user_id UUID, p_ops JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    before_rows JSONB;
+    after_rows JSONB;
+    ids INT4[];
+    op JSONB;
+    mid INT4;
+    pos INT4;
+BEGIN
+    -- Concurrent batches for the same user apply one after the other
+    PERFORM pg_advisory_xact_lock(hashtext(p_user_id::TEXT));
+
+    SELECT COALESCE(jsonb_agg(jsonb_build_object('movie_id', movie_id, 'rank', rank) ORDER BY rank NULLS LAST, movie_id), '[]'),
+           COALESCE(array_agg(movie_id ORDER BY rank NULLS LAST, movie_id), '{}')
+    INTO before_rows, ids
+    FROM favourite_movies WHERE user_id = p_user_id;
+
+    FOR op IN SELECT * FROM jsonb_array_elements(p_ops) LOOP
+        mid := (op->>'movie_id')::INT4;
+        IF op->>'op' = 'remove' THEN
+            ids := array_remove(ids, mid);
+            CONTINUE;
+        END IF;
+        IF (op->>'op' = 'add') = (mid = ANY(ids)) THEN
+            CONTINUE;  -- adding a favourite twice, or moving a non-favourite
+        END IF;
+        ids := array_remove(ids, mid);
+        pos := LEAST(GREATEST(COALESCE((op->>'position')::INT4, cardinality(ids) + 1), 1), cardinality(ids) + 1);
+        ids := ids[1:pos - 1] || mid || ids[pos:];
+    END LOOP;
+
+    DELETE FROM favourite_movies WHERE user_id = p_user_id AND NOT (movie_id = ANY(ids));
+    -- Negative ranks first so renumbering never collides with an existing rank
+    UPDATE favourite_movies AS f SET rank = -o.ord
+    FROM unnest(ids) WITH ORDINALITY AS o(movie_id, ord)
+    WHERE f.user_id = p_user_id AND f.movie_id = o.movie_id;
+    INSERT INTO favourite_movies (user_id, movie_id, rank)
+    SELECT p_user_id, o.movie_id, o.ord
+    FROM unnest(ids) WITH ORDINALITY AS o(movie_id, ord)
+    WHERE NOT EXISTS (SELECT 1 FROM favourite_movies f WHERE f.user_id = p_user_id AND f.movie_id = o.movie_id);
+    UPDATE favourite_movies SET rank = -rank WHERE user_id = p_user_id AND rank < 0;
+
+    SELECT COALESCE(jsonb_agg(jsonb_build_object('movie_id', o.movie_id, 'rank', o.ord) ORDER BY o.ord), '[]')
+    INTO after_rows
+    FROM unnest(ids) WITH ORDINALITY AS o(movie_id, ord);
+
+    RETURN jsonb_build_object('before', before_rows, 'after', after_rows);
+END;
+$$;
+
+-- Change tracking for the local catalog replica (catalog_replica.py pulls rows
+-- with updated_at past its high-water mark, keyset-paged on (updated_at, id))
+ALTER TABLE Movies
+    ADD COLUMN updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
+CREATE INDEX movies_updated_at_idx ON Movies (updated_at, id);
+
+CREATE OR REPLACE FUNCTION touch_movie_updated_at()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.updated_at := clock_timestamp();
+    RETURN NEW;
+END;
+$$;
+
+CREATE TRIGGER movies_touch_updated_at
+    BEFORE UPDATE ON Movies
+    FOR EACH ROW
+    WHEN (OLD IS DISTINCT FROM NEW)
+    EXECUTE FUNCTION touch_movie_updated_at();
+
+-- Every genre of a movie as a bitmask (see genres.py). The genres table maps
+-- bits to TMDB genres; the uploader assigns bits and never reuses them.
+CREATE TABLE genres (
+    bit INT2 PRIMARY KEY CHECK (bit BETWEEN 0 AND 30),
+    tmdb_genre_id INT4 UNIQUE,
+    name TEXT NOT NULL UNIQUE
+);
+
+-- TMDB's movie genres, with bits assigned in tmdb_genre_id order as the
+-- uploader does, so filters and the backfill below work before any upload
+INSERT INTO genres (bit, tmdb_genre_id, name) VALUES
+    (0, 12, 'Adventure'), (1, 14, 'Fantasy'), (2, 16, 'Animation'), (3, 18, 'Drama'),
+    (4, 27, 'Horror'), (5, 28, 'Action'), (6, 35, 'Comedy'), (7, 36, 'History'),
+    (8, 37, 'Western'), (9, 53, 'Thriller'), (10, 80, 'Crime'), (11, 99, 'Documentary'),
+    (12, 878, 'Science Fiction'), (13, 9648, 'Mystery'), (14, 10402, 'Music'),
+    (15, 10749, 'Romance'), (16, 10751, 'Family'), (17, 10752, 'War'), (18, 10770, 'TV Movie')
+ON CONFLICT DO NOTHING;
+
+ALTER TABLE Movies
+    ADD COLUMN genre_mask INT4 NOT NULL DEFAULT 0;
+
+-- The set bits of a mask as an array, so "shares a genre with this mask" can
+-- use a GIN index (a plain `genre_mask & mask <> 0` can only scan)
+CREATE OR REPLACE FUNCTION genre_bits(p_mask INT4)
+RETURNS INT2[]
+LANGUAGE sql
+IMMUTABLE
+PARALLEL SAFE
+AS $$
+    SELECT COALESCE(array_agg(b::INT2), '{}') FROM generate_series(0, 30) AS b WHERE p_mask & (1 << b) <> 0;
+$$;
+
+CREATE INDEX movies_genre_bits_idx ON Movies USING GIN (genre_bits(genre_mask));
+
+-- Movies with any of the genres in p_mask. Returns whole rows so callers can
+-- keep filtering, ordering and paging through PostgREST.
+CREATE OR REPLACE FUNCTION movies_with_genres(p_mask INT4)
+RETURNS SETOF Movies
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT * FROM Movies WHERE genre_bits(genre_mask) && genre_bits(p_mask);
+$$;
+
+-- Sets the mask of rows uploaded before masks existed (their genre column
+-- holds one name). Run here and by the uploader after it syncs the genres
+-- table, which may have added names. Returns the number of rows updated.
+CREATE OR REPLACE FUNCTION backfill_genre_masks()
+RETURNS INT4
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_updated INT4;
+BEGIN
+    UPDATE Movies AS m
+    SET genre_mask = 1 << g.bit
+    FROM genres AS g
+    WHERE m.genre_mask = 0 AND g.name = trim(m.genre);
+    GET DIAGNOSTICS v_updated = ROW_COUNT;
+    RETURN v_updated;
+END;
+$$;
+
+SELECT backfill_genre_masks();
+
+-- Group watch queue (/api/groups/{id}/requests). Each request carries its vote
+-- count as an aggregate, kept in step with group_movie_request_votes by a
+-- trigger, so the ranked queue is a single indexed read.
+ALTER TABLE group_movie_requests
+    ADD COLUMN vote_count INT4 NOT NULL DEFAULT 0;
+
+CREATE INDEX group_movie_requests_queue_idx
+    ON group_movie_requests (group_id, vote_count DESC, requested_at, movie_id);
+
+CREATE TABLE group_movie_request_votes (
+    group_id UUID NOT NULL,
+    movie_id UUID NOT NULL,
+    user_id UUID NOT NULL,
+    voted_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (group_id, movie_id, user_id),
+
+    CONSTRAINT fk_request_votes_request
+        FOREIGN KEY (group_id, movie_id)
+        REFERENCES group_movie_requests (group_id, movie_id)
+        ON DELETE CASCADE,
+    CONSTRAINT fk_request_votes_user
+        FOREIGN KEY (user_id)
+        REFERENCES profiles (user_id)
+        ON DELETE CASCADE
+);
+
+CREATE OR REPLACE FUNCTION count_group_request_vote()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE group_movie_requests SET vote_count = vote_count + 1
+        WHERE group_id = NEW.group_id AND movie_id = NEW.movie_id;
+    ELSE
+        -- Also runs for votes removed by a deleted profile; a deleted request has no row left to update
+        UPDATE group_movie_requests SET vote_count = vote_count - 1
+        WHERE group_id = OLD.group_id AND movie_id = OLD.movie_id;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER group_movie_request_votes_count
+    AFTER INSERT OR DELETE ON group_movie_request_votes
+    FOR EACH ROW
+    EXECUTE FUNCTION count_group_request_vote();
+
+-- Requests a movie for a group; requesting counts as the requester's vote.
+-- Requesting an already-requested movie just adds the vote.
+-- Returns {"created", "tmdb_id", "requested_by_user_id", "requested_at", "vote_count"},
+-- or NULL if no movie has that tmdb_id.
+CREATE OR REPLACE FUNCTION add_group_movie_request(p_group_id UUID, p_user_id UUID, p_tmdb_id INT4)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    mid UUID;
+    created BOOLEAN;
+BEGIN
+    SELECT id INTO mid FROM Movies WHERE tmdb_id = p_tmdb_id;
+    IF mid IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO group_movie_requests (group_id, movie_id, requested_by_user_id)
+    VALUES (p_group_id, mid, p_user_id)
+    ON CONFLICT DO NOTHING;
+    created := FOUND;
+
+    INSERT INTO group_movie_request_votes (group_id, movie_id, user_id)
+    VALUES (p_group_id, mid, p_user_id)
+    ON CONFLICT DO NOTHING;
+
+    RETURN (
+        SELECT jsonb_build_object(
+            'created', created, 'tmdb_id', p_tmdb_id, 'requested_by_user_id', r.requested_by_user_id,
+            'requested_at', r.requested_at, 'vote_count', r.vote_count
+        )
+        FROM group_movie_requests r
+        WHERE r.group_id = p_group_id AND r.movie_id = mid
+    );
+END;
+$$;
+
+-- Casts (vote = true) or withdraws (vote = false) one user's votes on several
+-- requests of a group in one transaction. Movies the group has not requested
+-- are skipped. p_votes: [{"tmdb_id": 550, "vote": true}, ...], one entry per movie.
+-- Returns [{"tmdb_id", "vote_count", "voted"}] for the requests it touched.
+CREATE OR REPLACE FUNCTION apply_group_request_votes(p_group_id UUID, p_user_id UUID, p_votes JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    result JSONB;
+BEGIN
+    INSERT INTO group_movie_request_votes (group_id, movie_id, user_id)
+    SELECT p_group_id, r.movie_id, p_user_id
+    FROM jsonb_to_recordset(p_votes) AS v(tmdb_id INT4, vote BOOLEAN)
+    JOIN Movies m ON m.tmdb_id = v.tmdb_id
+    JOIN group_movie_requests r ON r.group_id = p_group_id AND r.movie_id = m.id
+    WHERE v.vote
+    ON CONFLICT DO NOTHING;
+
+    DELETE FROM group_movie_request_votes AS gv
+    USING jsonb_to_recordset(p_votes) AS v(tmdb_id INT4, vote BOOLEAN), Movies AS m
+    WHERE NOT v.vote
+      AND m.tmdb_id = v.tmdb_id
+      AND gv.group_id = p_group_id AND gv.movie_id = m.id AND gv.user_id = p_user_id;
+
+    SELECT COALESCE(jsonb_agg(jsonb_build_object(
+        'tmdb_id', m.tmdb_id,
+        'vote_count', r.vote_count,
+        'voted', EXISTS (
+            SELECT 1 FROM group_movie_request_votes gv
+            WHERE gv.group_id = r.group_id AND gv.movie_id = r.movie_id AND gv.user_id = p_user_id
+        )
+    )), '[]')
+    INTO result
+    FROM jsonb_to_recordset(p_votes) AS v(tmdb_id INT4, vote BOOLEAN)
+    JOIN Movies m ON m.tmdb_id = v.tmdb_id
+    JOIN group_movie_requests r ON r.group_id = p_group_id AND r.movie_id = m.id;
+
+    RETURN result;
+END;
+$$;
+
+-- Existing requests count as their requester's vote
+INSERT INTO group_movie_request_votes (group_id, movie_id, user_id)
+SELECT group_id, movie_id, requested_by_user_id
+FROM group_movie_requests
+WHERE requested_by_user_id IS NOT NULL
+ON CONFLICT DO NOTHING;
+
+-- Activity feed (activity_feed.py). Actions are written once to
+-- activity_events and copied by id into the timelines of the actor's
+-- friends (the members of the actor's own friend lists) that the actor's
+-- privacy settings allow (activity_visible), so reading a feed is one keyset
+-- scan. Actors with more than p_fanout_limit friends are switched to pull
+-- mode: their events are not copied, and readers merge them in at read time
+-- (activity_feed_page).
+CREATE TABLE activity_events (
+    id INT8 GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    actor_user_id UUID NOT NULL,
+    -- rated | favourited | created_group | joined_group | requested_movie
+    verb TEXT NOT NULL,
+    tmdb_id INT4,
+    group_id UUID,
+    -- the rating, for "rated"
+    value INT4,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT fk_activity_events_actor
+        FOREIGN KEY (actor_user_id)
+        REFERENCES profiles (user_id)
+        ON DELETE CASCADE
+);
+
+CREATE INDEX activity_events_actor_idx ON activity_events (actor_user_id, id DESC);
+
+CREATE TABLE activity_timelines (
+    user_id UUID NOT NULL,
+    event_id INT8 NOT NULL,
+    actor_user_id UUID NOT NULL,
+
+    -- Also the keyset index of a feed page: user_id = ? AND event_id < ? ORDER BY event_id DESC
+    PRIMARY KEY (user_id, event_id),
+
+    CONSTRAINT fk_activity_timelines_event
+        FOREIGN KEY (event_id)
+        REFERENCES activity_events (id)
+        ON DELETE CASCADE
+);
+
+-- For removing one actor's entries (privacy and block changes)
+CREATE INDEX activity_timelines_actor_idx ON activity_timelines (actor_user_id, user_id);
+
+CREATE TABLE activity_pull_actors (
+    user_id UUID PRIMARY KEY,
+    since TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Whether the actor's current privacy settings let their friends see an
+-- event of this verb: the same rules as privacy_policy.py, where friends are
+-- the members of the actor's own friend lists. show_activity off hides
+-- everything; favourites also need show_favorites_to everyone | friends.
+-- profile_visibility is compared as text because the column started out as
+-- a boolean and the API writes public | friends | private.
+CREATE OR REPLACE FUNCTION activity_shared_with_friends(p_actor UUID, p_verb TEXT)
+RETURNS BOOLEAN
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT COALESCE(s.show_activity, TRUE)
+       AND COALESCE(s.profile_visibility::TEXT, 'public') IN ('true', 'public', 'friends')
+       AND (p_verb <> 'favourited' OR COALESCE(s.show_favorites_to, 'friends') IN ('everyone', 'friends'))
+    FROM (SELECT 1) AS one
+    LEFT JOIN privacy_settings s ON s.user_id = p_actor;
+$$;
+
+-- Whether p_viewer may see the actor's event: the viewer is on one of the
+-- actor's friend lists, neither has blocked the other, and the actor's
+-- settings share the verb with friends.
+CREATE OR REPLACE FUNCTION activity_visible(p_actor UUID, p_viewer UUID, p_verb TEXT)
+RETURNS BOOLEAN
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT activity_shared_with_friends(p_actor, p_verb)
+       AND EXISTS (
+           SELECT 1 FROM FriendLists fl
+           JOIN FriendList_Members fm ON fm.friend_list_id = fl.id
+           WHERE fl.owner_user_id = p_actor AND fm.member_user_id = p_viewer
+       )
+       AND NOT EXISTS (
+           SELECT 1 FROM blocked_users b
+           WHERE (b.user_id = p_actor AND b.blocked = p_viewer)
+              OR (b.user_id = p_viewer AND b.blocked = p_actor)
+       );
+$$;
+
+-- Records an action and fans it out to the actor's friends, skipping friends
+-- either side has blocked. Nothing is recorded when the actor's settings do
+-- not share the verb with friends. Returns the event id (or NULL).
+CREATE OR REPLACE FUNCTION record_activity(
+    p_actor UUID, p_verb TEXT, p_tmdb_id INT4, p_group_id UUID, p_value INT4, p_fanout_limit INT4
+)
+RETURNS INT8
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_event_id INT8;
+    v_friends INT4;
+BEGIN
+    IF NOT activity_shared_with_friends(p_actor, p_verb) THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO activity_events (actor_user_id, verb, tmdb_id, group_id, value)
+    VALUES (p_actor, p_verb, p_tmdb_id, p_group_id, p_value)
+    RETURNING id INTO v_event_id;
+
+    IF EXISTS (SELECT 1 FROM activity_pull_actors WHERE user_id = p_actor) THEN
+        RETURN v_event_id;
+    END IF;
+
+    SELECT count(DISTINCT fm.member_user_id) INTO v_friends
+    FROM FriendLists fl
+    JOIN FriendList_Members fm ON fm.friend_list_id = fl.id
+    WHERE fl.owner_user_id = p_actor;
+
+    IF v_friends > p_fanout_limit THEN
+        -- Friends pull this actor's events from now on
+        INSERT INTO activity_pull_actors (user_id) VALUES (p_actor) ON CONFLICT DO NOTHING;
+        RETURN v_event_id;
+    END IF;
+
+    INSERT INTO activity_timelines (user_id, event_id, actor_user_id)
+    SELECT DISTINCT fm.member_user_id, v_event_id, p_actor
+    FROM FriendLists fl
+    JOIN FriendList_Members fm ON fm.friend_list_id = fl.id
+    WHERE fl.owner_user_id = p_actor
+      AND fm.member_user_id <> p_actor
+      AND NOT EXISTS (
+          SELECT 1 FROM blocked_users b
+          WHERE (b.user_id = p_actor AND b.blocked = fm.member_user_id)
+             OR (b.user_id = fm.member_user_id AND b.blocked = p_actor)
+      )
+    ON CONFLICT DO NOTHING;
+
+    RETURN v_event_id;
+END;
+$$;
+
+-- One page of a user's feed, newest first, strictly before event id p_before
+-- (NULL for the first page): their timeline merged with the events of the
+-- pull-mode actors who have them on a friend list. Every event is checked
+-- against the actor's current settings, friend lists and blocks
+-- (activity_visible), so a change after fan-out hides it at once.
+CREATE OR REPLACE FUNCTION activity_feed_page(p_user_id UUID, p_before INT8, p_limit INT4)
+RETURNS SETOF activity_events
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT * FROM (
+        (
+            SELECT e.*
+            FROM activity_timelines t
+            JOIN activity_events e ON e.id = t.event_id
+            WHERE t.user_id = p_user_id
+              AND (p_before IS NULL OR t.event_id < p_before)
+              AND activity_visible(e.actor_user_id, p_user_id, e.verb)
+            ORDER BY t.event_id DESC
+            LIMIT p_limit
+        )
+        UNION
+        (
+            SELECT e.*
+            FROM FriendList_Members fm
+            JOIN FriendLists fl ON fl.id = fm.friend_list_id
+            JOIN activity_pull_actors p ON p.user_id = fl.owner_user_id
+            JOIN activity_events e ON e.actor_user_id = fl.owner_user_id
+            WHERE fm.member_user_id = p_user_id
+              AND (p_before IS NULL OR e.id < p_before)
+              AND activity_visible(e.actor_user_id, p_user_id, e.verb)
+            ORDER BY e.id DESC
+            LIMIT p_limit
+        )
+    ) AS page
+    ORDER BY id DESC
+    LIMIT p_limit;
+$$;
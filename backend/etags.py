@@ -0,0 +1,116 @@
+# etags.py
+"""
+Entity tags for conditional GETs.
+
+An ETag is a hash of the data a response is built from, so a client that
+sends it back in If-None-Match can be answered with an empty 304 when
+nothing changed, skipping any further lookups and the response body.
+
+Two layers use them:
+  - routes with a cheap version of their data (the ratings listing, the
+    catalog routes) compute the ETag from that version and answer 304
+    before doing the expensive work
+  - ConditionalGetMiddleware covers every other GET: it hashes the finished
+    body, so a 304 still costs the handler but saves the transfer
+"""
+import hashlib
+import json
+from typing import Any, Optional
+
+from fastapi import Request
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Cache-Control for responses that set none: the browser may store them but must revalidate first
+DEFAULT_CACHE_CONTROL = "private, no-cache"
+_BODY_HEADERS = (b"content-length", b"content-type", b"content-encoding")
+
+
+def compute_etag(data: Any) -> str:
+    """Weak ETag for any JSON-serializable value (stable across processes)."""
+    raw = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str).encode()
+    return f'W/"{hashlib.blake2b(raw, digest_size=16).hexdigest()}"'
+
+
+def body_etag(body: bytes) -> str:
+    """Weak ETag for an encoded response body."""
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match already names this ETag."""
+    return _if_none_match(request.headers.get("if-none-match"), etag)
+
+
+def _if_none_match(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison: W/"x" and "x" name the same entity
+    tags = {t.strip().removeprefix("W/") for t in header.split(",")}
+    return etag.removeprefix("W/") in tags
+
+
+class ConditionalGetMiddleware:
+    """
+    ETag every 200 GET response whose handler did not set one, from a
+    hash of the body, and turn it into an empty 304 when If-None-Match
+    already names it. Streamed responses (no Content-Length) and responses
+    marked no-store pass through untouched, so streaming is never buffered.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        start: Optional[Message] = None
+        chunks = []
+        passthrough = False
+
+        async def send_with_etag(message: Message) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if (
+                    message["status"] != 200
+                    or "etag" in headers
+                    or "content-length" not in headers
+                    or "no-store" in headers.get("cache-control", "")
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body"):
+                return
+            body = b"".join(chunks)
+            etag = body_etag(body)
+            headers = MutableHeaders(raw=start["headers"])
+            headers["ETag"] = etag
+            if "cache-control" not in headers:
+                headers["Cache-Control"] = DEFAULT_CACHE_CONTROL
+            if _if_none_match(if_none_match, etag):
+                # A 304 repeats the validators and caching headers, not the body's
+                await send({
+                    "type": "http.response.start",
+                    "status": 304,
+                    "headers": [(k, v) for k, v in start["headers"] if k.lower() not in _BODY_HEADERS],
+                })
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_with_etag)
@@ -0,0 +1,55 @@
+# file_lock.py
+"""
+Cross-process exclusive locks on a lock file, so one of several workers
+sharing a data file (a trained model, an index, the catalog replica) does
+the writing while the others wait or just read.
+
+Uses fcntl.flock on POSIX and msvcrt.locking on Windows (the dev setup in
+dev.ps1); either way the OS drops the lock when the process exits. Lock
+files are left in place, next to the file they guard.
+"""
+import time
+from contextlib import contextmanager
+from typing import IO, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _lock(f: IO, blocking: bool) -> bool:
+    if fcntl is not None:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            return True
+        except OSError:
+            return False
+    # msvcrt locks a byte range from the current position; LK_LOCK gives up after ~10s, so keep trying
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            if not blocking:
+                return False
+            time.sleep(0.5)
+
+
+def try_acquire(path: str) -> Optional[IO]:
+    """The open, locked lock file, or None when another process holds it. Closing it releases the lock."""
+    f = open(path, "a")
+    if _lock(f, blocking=False):
+        return f
+    f.close()
+    return None
+
+
+@contextmanager
+def exclusive(path: str) -> Iterator[None]:
+    """Hold the lock on path for the with block, waiting for other processes first."""
+    with open(path, "a") as f:
+        _lock(f, blocking=True)
+        yield
@@ -0,0 +1,88 @@
+# genres.py
+"""
+Genre lookup table and per-movie genre bitmasks.
+
+A movie stores every one of its genres in Movies.genre_mask: bit `bit` is
+set for each row of the genres table (bit, tmdb_genre_id, name) it belongs
+to. database.sql seeds TMDB's genres; the uploader (tmdb-api/batch_uploader.py)
+assigns bits to any that appear later and never reuses them, so masks stay
+valid across uploads.
+Filtering by several genres is then one indexed overlap test (see
+movies_with_genres in database.sql).
+
+The table is small and rarely changes, so it is cached in-process.
+"""
+import threading
+import time
+import traceback
+from typing import Any, Dict, Iterable, List, Tuple
+
+from config import supabase_admin
+from catalog_snapshot import split_genres
+
+CACHE_TTL_SECONDS = 600
+# INT4 column, sign bit left alone
+MAX_BITS = 31
+
+# lower-cased name -> (bit, display name)
+_table: Dict[str, Tuple[int, str]] = {}
+_loaded_at = 0.0
+_lock = threading.Lock()
+
+
+def genre_table() -> Dict[str, Tuple[int, str]]:
+    """lower-cased genre name -> (bit, name); empty if the table cannot be read."""
+    global _table, _loaded_at
+    now = time.monotonic()
+    if _loaded_at and now - _loaded_at < CACHE_TTL_SECONDS:
+        return _table
+    with _lock:
+        try:
+            res = supabase_admin.table("genres").select("bit,name").order("bit").execute()
+            _table = {g["name"].lower(): (g["bit"], g["name"]) for g in (res.data or [])}
+            _loaded_at = now
+        except Exception as e:
+            # Keep serving the previous table and retry on the next call;
+            # callers fall back to the genre text column
+            print(f"[genres] Failed to load genre table: {e}")
+            print(traceback.format_exc())
+    return _table
+
+
+def invalidate() -> None:
+    global _loaded_at
+    _loaded_at = 0.0
+
+
+def mask_for(names: Iterable[str], ignore_unknown: bool = False) -> int:
+    """Bitmask of genre names (case-insensitive). Raises ValueError on an unknown name unless ignore_unknown."""
+    table = genre_table()
+    mask = 0
+    for name in names:
+        entry = table.get(name.strip().lower())
+        if entry is None:
+            if ignore_unknown:
+                continue
+            raise ValueError(f"Unknown genre: {name.strip()}")
+        mask |= 1 << entry[0]
+    return mask
+
+
+def names_for(mask: int) -> List[str]:
+    """Genre names of a bitmask, in bit order."""
+    return [name for bit, name in sorted(genre_table().values()) if mask >> bit & 1]
+
+
+def parse_genres(value: str) -> List[str]:
+    """The ?genre= query parameter ("Action,Comedy") as a list of names."""
+    return [g.strip() for g in value.split(",") if g.strip()]
+
+
+def movie_genres(m: Dict[str, Any]) -> List[str]:
+    """
+    Every genre of a movie row: from genre_mask, or from the genre text column
+    for rows uploaded before masks existed.
+    """
+    mask = m.get("genre_mask") or 0
+    names = names_for(mask) if mask else []
+    return names or split_genres(m.get("genre"))
@@ -0,0 +1,201 @@
+# group_events.py
+"""
+Live group activity, pushed to group pages over server-sent events
+(GET /api/groups/{id}/events).
+
+Routes call publish(group_id, event, data) after a change (a member joined,
+the group was updated, a movie was requested, voted on or removed). Every open stream
+of that group receives it as
+
+    event: member_joined
+    data: {"user_id": "...", ...}
+
+Fan-out is in-process: each connection is a small bounded queue and the
+event is encoded once per publish, so an idle connection costs a queue and
+a parked coroutine, and a worker holds thousands of them. A client too slow
+to drain its queue is disconnected; EventSource reconnects on its own and
+the page refetches.
+
+With several workers, a change handled by one worker must reach streams held
+by the others. GROUP_EVENTS_BACKEND selects how events travel between them:
+  - memory (default): this worker only; enough for a single worker, and
+    run_backend() warns at startup when WEB_CONCURRENCY (the worker count
+    gunicorn reads, and the Dockerfile sets) says there are more
+  - redis: published to Redis (GROUP_EVENTS_REDIS_URL) and delivered by every
+    worker's listener (start with run_backend() at startup; needs the
+    optional redis package)
+"""
+import asyncio
+import json
+import os
+import threading
+import traceback
+from typing import Any, Dict, Optional, Set
+
+BACKEND = (os.getenv("GROUP_EVENTS_BACKEND") or "memory").lower()
+REDIS_URL = os.getenv("GROUP_EVENTS_REDIS_URL") or "redis://localhost:6379/0"
+REDIS_CHANNEL_PREFIX = "movielily:group:"
+QUEUE_SIZE = int(os.getenv("GROUP_EVENTS_QUEUE_SIZE") or 64)
+# Worker processes serving the app; gunicorn reads the same variable
+WORKERS = int(os.getenv("WEB_CONCURRENCY") or 1)
+HEARTBEAT_SECONDS = 25
+
+MEMBER_JOINED = "member_joined"
+GROUP_UPDATED = "group_updated"
+MOVIE_REQUESTED = "movie_requested"
+REQUEST_VOTES = "request_votes"
+REQUEST_REMOVED = "request_removed"
+
+
+class Subscription:
+    """One open stream of a group's events."""
+
+    def __init__(self, group_id: str):
+        self.group_id = group_id
+        self.queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(QUEUE_SIZE)
+
+    async def get(self) -> Optional[bytes]:
+        """The next encoded event; None once the subscription was dropped for falling behind."""
+        return await self.queue.get()
+
+    def _offer(self, message: bytes) -> bool:
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+
+# group_id -> open subscriptions, touched only from the event loop thread
+_subscriptions: Dict[str, Set[Subscription]] = {}
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_redis = None
+_redis_lock = threading.Lock()
+
+
+def encode(event: str, data: Any) -> bytes:
+    """An SSE message."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str, separators=(',', ':'))}\n\n".encode()
+
+
+def subscribe(group_id: str) -> Subscription:
+    global _loop
+    _loop = asyncio.get_running_loop()
+    sub = Subscription(group_id)
+    _subscriptions.setdefault(group_id, set()).add(sub)
+    return sub
+
+
+def unsubscribe(sub: Subscription) -> None:
+    subs = _subscriptions.get(sub.group_id)
+    if subs is not None:
+        subs.discard(sub)
+        if not subs:
+            del _subscriptions[sub.group_id]
+
+
+def subscriber_count(group_id: Optional[str] = None) -> int:
+    if group_id is not None:
+        return len(_subscriptions.get(group_id, ()))
+    return sum(len(s) for s in _subscriptions.values())
+
+
+def _deliver(group_id: str, message: bytes) -> None:
+    """Fan an encoded event out to this worker's streams of the group (event loop thread only)."""
+    for sub in list(_subscriptions.get(group_id, ())):
+        if not sub._offer(message):
+            # Too far behind: drop it and make room for the end-of-stream marker
+            unsubscribe(sub)
+            while not sub.queue.empty():
+                sub.queue.get_nowait()
+            sub.queue.put_nowait(None)
+
+
+def _deliver_locally(group_id: str, message: bytes) -> None:
+    loop = _loop
+    if loop is None or loop.is_closed():
+        return
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        _deliver(group_id, message)
+    else:
+        # Called from a worker thread (sync route, to_thread)
+        loop.call_soon_threadsafe(_deliver, group_id, message)
+
+
+def _redis_client():
+    global _redis
+    with _redis_lock:
+        if _redis is None:
+            import redis  # optional dependency, only for GROUP_EVENTS_BACKEND=redis
+            _redis = redis.Redis.from_url(REDIS_URL)
+        return _redis
+
+
+def publish(group_id: str, event: str, data: Any) -> None:
+    """
+    Send an event to every open stream of the group. Best-effort: a failure
+    is logged, never raised, so it cannot fail the change that caused it.
+    """
+    try:
+        message = encode(event, data)
+        if BACKEND == "redis":
+            _redis_client().publish(REDIS_CHANNEL_PREFIX + group_id, message)
+        else:
+            _deliver_locally(group_id, message)
+    except Exception as e:
+        print(f"[group_events] Failed to publish {event} for group {group_id}: {e}")
+        print(traceback.format_exc())
+
+
+async def run_backend() -> None:
+    """
+    For GROUP_EVENTS_BACKEND=redis: deliver events published by any worker to
+    this worker's streams. Reconnects after errors; returns at once for memory.
+    """
+    global _loop
+    if BACKEND != "redis":
+        if WORKERS > 1:
+            print(
+                f"[group_events] WARNING: GROUP_EVENTS_BACKEND={BACKEND} with {WORKERS} workers; "
+                "a change only reaches streams held by the worker that handled it. "
+                "Set GROUP_EVENTS_BACKEND=redis and GROUP_EVENTS_REDIS_URL."
+            )
+        return
+    _loop = asyncio.get_running_loop()
+    import redis.asyncio as aioredis  # optional dependency
+    while True:
+        try:
+            client = aioredis.Redis.from_url(REDIS_URL)
+            async with client.pubsub() as pubsub:
+                await pubsub.psubscribe(REDIS_CHANNEL_PREFIX + "*")
+                async for msg in pubsub.listen():
+                    if msg.get("type") != "pmessage":
+                        continue
+                    channel = msg["channel"].decode() if isinstance(msg["channel"], bytes) else msg["channel"]
+                    _deliver(channel[len(REDIS_CHANNEL_PREFIX):], msg["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[group_events] Redis listener failed, retrying: {e}")
+            await asyncio.sleep(5)
+
+
+async def stream(sub: Subscription):
+    """The SSE body of one subscription, with keep-alive comments while idle; unsubscribes when closed."""
+    try:
+        yield b"retry: 3000\n\n" + encode("ready", {"group_id": sub.group_id})
+        while True:
+            try:
+                message = await asyncio.wait_for(sub.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            if message is None:
+                return
+            yield message
+    finally:
+        unsubscribe(sub)
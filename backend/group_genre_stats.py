@@ -0,0 +1,179 @@
+# group_genre_stats.py
+"""
+Per-group genre aggregates behind /api/groups/{id}/top-genre.
+
+For every (group, genre) the group_genre_stats table keeps how many favourites
+the members have in that genre, plus the sum and count of their numeric ranks.
+A favourite counts once in each of its movie's genres.
+Rows are adjusted with deltas whenever a favourite is added, removed or
+reordered and whenever a member joins or leaves, so reading a group's genre
+profile is a single keyed query.
+
+To recompute everything from favourite_movies:
+    python group_genre_stats.py rebuild [group_id]
+"""
+import sys
+import traceback
+from typing import Any, Dict, Iterable, List, Optional
+
+from config import supabase_admin
+import catalog_snapshot
+from genres import movie_genres
+
+# genre -> {"fav_count": int, "rank_sum": float, "rank_count": int}
+GenreStats = Dict[str, Dict[str, Any]]
+
+
+def _genres_for(movie_ids: Iterable[int]) -> Dict[int, List[str]]:
+    """Map tmdb_id -> every genre name of the given movies (movies without a genre are left out)."""
+    ids = sorted(set(movie_ids))
+    if not ids:
+        return {}
+    genres = {}
+    # Genres never change after upload, so the mapped snapshot answers most lookups
+    snapshot = catalog_snapshot.get_snapshot()
+    if snapshot is not None:
+        for tmdb_id in ids:
+            names = snapshot.genres_of(tmdb_id)
+            if names:
+                genres[tmdb_id] = names
+        ids = [i for i in ids if i not in snapshot]
+        if not ids:
+            return genres
+    res = supabase_admin.table("movies").select("tmdb_id,genre,genre_mask").in_("tmdb_id", ids).execute()
+    for m in res.data or []:
+        names = movie_genres(m)
+        if names:
+            genres[m["tmdb_id"]] = names
+    return genres
+
+
+def _aggregate(rows: Iterable[Dict[str, Any]], genres: Dict[int, List[str]], sign: int = 1, into: Optional[GenreStats] = None) -> GenreStats:
+    """Add (sign=1) or subtract (sign=-1) favourite rows into per-genre totals; a movie counts in each of its genres."""
+    stats: GenreStats = into if into is not None else {}
+    for row in rows:
+        for genre in genres.get(row["movie_id"], []):
+            s = stats.setdefault(genre, {"fav_count": 0, "rank_sum": 0.0, "rank_count": 0})
+            s["fav_count"] += sign
+            # rank may be null; only include numeric ranks
+            rnk = row.get("rank")
+            if isinstance(rnk, (int, float)):
+                s["rank_sum"] += sign * float(rnk)
+                s["rank_count"] += sign
+    return stats
+
+
+def _apply_deltas(group_ids: List[str], deltas: GenreStats) -> None:
+    """Add the deltas to every listed group in one round-trip (see apply_group_genre_deltas in database.sql)."""
+    payload = [
+        {"genre": genre, **d}
+        for genre, d in deltas.items()
+        if d["fav_count"] or d["rank_sum"] or d["rank_count"]
+    ]
+    if not group_ids or not payload:
+        return
+    supabase_admin.rpc("apply_group_genre_deltas", {"p_group_ids": group_ids, "p_deltas": payload}).execute()
+
+
+def fetch_favourites(user_ids: List[str]) -> List[Dict[str, Any]]:
+    """All favourites for the given users (NOTE: table name is 'favourite_movies')."""
+    if not user_ids:
+        return []
+    res = (
+        supabase_admin.table("favourite_movies")
+        .select("user_id,movie_id,rank")
+        .in_("user_id", user_ids)
+        .execute()
+    )
+    return res.data or []
+
+
+def read_group_stats(group_id: str) -> GenreStats:
+    """The stored genre aggregates for one group."""
+    res = (
+        supabase_admin.table("group_genre_stats")
+        .select("genre,fav_count,rank_sum,rank_count")
+        .eq("group_id", group_id)
+        .execute()
+    )
+    return {
+        row["genre"]: {
+            "fav_count": row["fav_count"],
+            "rank_sum": float(row.get("rank_sum") or 0),
+            "rank_count": row.get("rank_count") or 0,
+        }
+        for row in (res.data or [])
+    }
+
+
+def record_favourite_changes(user_id: str, added: Iterable[Dict[str, Any]] = (), removed: Iterable[Dict[str, Any]] = ()) -> None:
+    """
+    Apply a change to a user's favourites to every group they belong to.
+
+    `added` and `removed` are favourite rows ({"movie_id", "rank"}). A reorder is
+    the old rows removed and the new rows added: counts cancel out and only the
+    rank sums move. Failures are logged and never break the favourites request;
+    run a rebuild to repair drift.
+    """
+    added, removed = list(added), list(removed)
+    if not added and not removed:
+        return
+    try:
+        memberships = supabase_admin.table("group_members").select("group_id").eq("user_id", user_id).execute()
+        group_ids = [m["group_id"] for m in (memberships.data or [])]
+        if not group_ids:
+            return
+        genres = _genres_for(r["movie_id"] for r in added + removed)
+        deltas = _aggregate(added, genres)
+        _aggregate(removed, genres, sign=-1, into=deltas)
+        _apply_deltas(group_ids, deltas)
+    except Exception as e:
+        print(f"[group_genre_stats] Failed to record favourite changes for {user_id}: {e}")
+        print(traceback.format_exc())
+
+
+def record_membership_change(group_id: str, user_id: str, joined: bool = True) -> None:
+    """Add (joined) or subtract (left) all of a user's favourites to/from one group's aggregates."""
+    try:
+        favs = fetch_favourites([user_id])
+        if not favs:
+            return
+        genres = _genres_for(r["movie_id"] for r in favs)
+        _apply_deltas([group_id], _aggregate(favs, genres, sign=1 if joined else -1))
+    except Exception as e:
+        print(f"[group_genre_stats] Failed to record membership change of {user_id} in {group_id}: {e}")
+        print(traceback.format_exc())
+
+
+def rebuild(group_id: Optional[str] = None) -> int:
+    """
+    Recompute the aggregates from scratch for one group, or for every group.
+    Returns the number of groups rebuilt.
+    """
+    if group_id:
+        group_ids = [group_id]
+    else:
+        res = supabase_admin.table("groups").select("id").execute()
+        group_ids = [g["id"] for g in (res.data or [])]
+
+    for gid in group_ids:
+        members = supabase_admin.table("group_members").select("user_id").eq("group_id", gid).execute()
+        favs = fetch_favourites([m["user_id"] for m in (members.data or [])])
+        stats = _aggregate(favs, _genres_for(r["movie_id"] for r in favs))
+
+        supabase_admin.table("group_genre_stats").delete().eq("group_id", gid).execute()
+        if stats:
+            supabase_admin.table("group_genre_stats").insert(
+                [{"group_id": gid, "genre": genre, **s} for genre, s in stats.items()]
+            ).execute()
+        print(f"[group_genre_stats] Rebuilt {gid}: {len(stats)} genres from {len(favs)} favourites")
+
+    return len(group_ids)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "rebuild":
+        print("Usage: python group_genre_stats.py rebuild [group_id]")
+        sys.exit(1)
+    count = rebuild(sys.argv[2] if len(sys.argv) > 2 else None)
+    print(f"✅ Rebuilt genre stats for {count} group(s)")
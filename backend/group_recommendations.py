@@ -0,0 +1,147 @@
+# group_recommendations.py
+"""
+Server-side movie recommendations for a group.
+
+Candidates are catalog movies in the genres the members favourite (the same
+group_genre_stats profile behind /top-genre). Each movie scores
+
+    genre_weight * rating / 10
+
+where genre_weight is the genre's share of the group's favourites, boosted up
+to 2x for genres the members rank near the top of their lists, summed over
+the movie's genres. Movies that any
+member has already favourited or rated are left out.
+
+The ranked list is cached per group in-process until the group changes
+(a member joins, or a member's favourites or ratings change). The TTL bounds
+staleness on other workers, which never see those invalidations.
+"""
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from config import supabase_admin
+from group_genre_stats import GenreStats, fetch_favourites, read_group_stats
+import genres
+
+# How many of the best-rated movies in the group's genres are considered
+CANDIDATE_POOL_SIZE = 500
+CACHE_TTL_SECONDS = 600
+
+# (score, movie row), best first
+Ranked = List[Tuple[float, Dict[str, Any]]]
+
+# group_id -> {"members": set of user ids, "ranked": Ranked, "stats": GenreStats, "expires": float}
+_cache: Dict[str, Dict[str, Any]] = {}
+_cache_lock = threading.Lock()
+# Bumped on every invalidation, so a build that raced with one is not cached
+_generation = 0
+
+
+def genre_weights(stats: GenreStats) -> Dict[str, float]:
+    """Turn a group's genre aggregates into a weight per genre (weights sum to <= 2)."""
+    total = sum(s["fav_count"] for s in stats.values() if s["fav_count"] > 0)
+    if not total:
+        return {}
+    weights = {}
+    for genre, s in stats.items():
+        if s["fav_count"] <= 0:
+            continue
+        weight = s["fav_count"] / total
+        if s["rank_count"]:
+            avg_rank = s["rank_sum"] / s["rank_count"]
+            weight *= 1 + 1 / max(avg_rank, 1.0)
+        weights[genre] = weight
+    return weights
+
+
+def rank_candidates(movies: Iterable[Dict[str, Any]], weights: Dict[str, float], exclude: Set[int]) -> Ranked:
+    """Score and sort candidate movie rows; ties go to the lower tmdb_id so paging is stable."""
+    ranked = []
+    for m in movies:
+        tmdb_id = m.get("tmdb_id")
+        weight = sum(weights.get(genre, 0.0) for genre in genres.movie_genres(m))
+        if not tmdb_id or tmdb_id in exclude or not weight:
+            continue
+        score = round(weight * float(m.get("rating") or 0) / 10, 6)
+        ranked.append((score, m))
+    ranked.sort(key=lambda item: (-item[0], item[1]["tmdb_id"]))
+    return ranked
+
+
+def page_after(ranked: Ranked, after: Optional[List[Any]], limit: int) -> Tuple[Ranked, Optional[List[Any]]]:
+    """
+    Keyset page over a ranked list: the items strictly after the [score, tmdb_id]
+    key `after`, plus the key to continue from (None on the last page).
+    """
+    items = ranked
+    if after is not None:
+        after_key = (-float(after[0]), int(after[1]))
+        items = [item for item in ranked if (-item[0], item[1]["tmdb_id"]) > after_key]
+    page = items[:limit]
+    next_key = [page[-1][0], page[-1][1]["tmdb_id"]] if len(items) > limit else None
+    return page, next_key
+
+
+def _seen_movie_ids(member_ids: List[str]) -> Set[int]:
+    """Every movie a member has favourited or rated."""
+    seen = {row["movie_id"] for row in fetch_favourites(member_ids)}
+    if member_ids:
+        ratings = (
+            supabase_admin.table("user_movie_ratings")
+            .select("tmdb_id")
+            .in_("user_id", member_ids)
+            .execute()
+        )
+        seen.update(row["tmdb_id"] for row in (ratings.data or []))
+    return seen
+
+
+def _build(group_id: str, member_ids: List[str]) -> Dict[str, Any]:
+    stats = read_group_stats(group_id)
+    weights = genre_weights(stats)
+    if not weights:
+        return {"ranked": [], "stats": stats}
+
+    mask = genres.mask_for(weights, ignore_unknown=True)
+    if mask:
+        query = supabase_admin.rpc("movies_with_genres", {"p_mask": mask})
+    else:
+        # Genre table not populated yet: match the genre text column
+        query = supabase_admin.table("movies").select("*").in_("genre", sorted(weights))
+    candidates = query.order("rating", desc=True).limit(CANDIDATE_POOL_SIZE).execute()
+    ranked = rank_candidates(candidates.data or [], weights, _seen_movie_ids(member_ids))
+    return {"ranked": ranked, "stats": stats}
+
+
+def get_recommendations(group_id: str, member_ids: List[str]) -> Dict[str, Any]:
+    """The group's ranked recommendations and genre stats ({"ranked", "stats"}), from cache when possible."""
+    now = time.monotonic()
+    with _cache_lock:
+        entry = _cache.get(group_id)
+        if entry and entry["expires"] > now and entry["members"] == set(member_ids):
+            return entry
+        generation = _generation
+
+    built = _build(group_id, member_ids)
+    entry = {**built, "members": set(member_ids), "expires": now + CACHE_TTL_SECONDS}
+    with _cache_lock:
+        if generation == _generation:
+            _cache[group_id] = entry
+    return entry
+
+
+def invalidate_group(group_id: str) -> None:
+    global _generation
+    with _cache_lock:
+        _generation += 1
+        _cache.pop(group_id, None)
+
+
+def invalidate_user(user_id: str) -> None:
+    """Drop the cached recommendations of every group this user is a member of."""
+    global _generation
+    with _cache_lock:
+        _generation += 1
+        for group_id in [gid for gid, entry in _cache.items() if user_id in entry["members"]]:
+            del _cache[group_id]
@@ -1,5 +1,6 @@
 # main.py
 import os
+import asyncio
 import uvicorn
 from dotenv import load_dotenv
 
@@ -8,7 +9,6 @@ load_dotenv()
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 
 
 # Rotas
@@ -19,6 +19,19 @@ from routes.tmdb_routes import router as tmdb_router
 from routes.favourite_movies_routes import router as favourite_movies_router
 from routes.rated_movies_route import router as user_ratings_router
 from routes.groups_routes import router as groups_router
+from routes.recommendation_routes import router as recommendations_router
+from routes.export_routes import router as export_router
+from routes.batch_routes import router as batch_router
+from routes.activity_routes import router as activity_router
+import catalog_replica
+import compression
+import group_events
+from compression import CompressionMiddleware
+from etags import ConditionalGetMiddleware
+from static_assets import PrecompressedStaticFiles
+import rating_buffer
+import recommender
+import similarity_index
 
 app = FastAPI(title="Advanced SW Dev API")
 
@@ -36,6 +49,11 @@ app.add_middleware(
     expose_headers=["X-Conversation-Id"],
 )
 
+# ETags and 304s for every GET that does not handle conditional requests itself
+app.add_middleware(ConditionalGetMiddleware)
+# Outside the ETag layer, so ETags and 304s are computed on the uncompressed body
+app.add_middleware(CompressionMiddleware)
+
 # Rotas principais
 app.include_router(user_router)
 app.include_router(friend_router)
@@ -44,9 +62,53 @@ app.include_router(tmdb_router)
 app.include_router(favourite_movies_router)
 app.include_router(user_ratings_router)
 app.include_router(groups_router)
+app.include_router(recommendations_router)
+app.include_router(export_router)
+app.include_router(batch_router)
+app.include_router(activity_router)
+
+# Retrain the collaborative-filtering model and similarity index in the background
+@app.on_event("startup")
+async def start_recommender_refresh():
+    asyncio.create_task(recommender.refresh_periodically())
+    asyncio.create_task(similarity_index.refresh_periodically())
+
+# Local SQLite copy of the catalog for the movie read paths (CATALOG_REPLICA=1)
+@app.on_event("startup")
+async def start_catalog_replica_sync():
+    if catalog_replica.ENABLED:
+        asyncio.create_task(catalog_replica.sync_periodically())
 
-if os.path.isdir("static"):
-    app.mount("/", StaticFiles(directory="static", html=True), name="static")
+# Buffered rating writes (RATING_WRITE_BEHIND=1): flush periodically, and once more on shutdown
+@app.on_event("startup")
+async def start_group_events_backend():
+    # Only does something for the redis backend (see group_events.py)
+    asyncio.create_task(group_events.run_backend())
+
+@app.on_event("startup")
+async def start_rating_flush():
+    if rating_buffer.ENABLED:
+        asyncio.create_task(rating_buffer.flush_periodically())
+
+@app.on_event("shutdown")
+async def flush_rating_buffer():
+    if rating_buffer.ENABLED:
+        try:
+            written = await asyncio.to_thread(rating_buffer.flush)
+            print(f"[rating_buffer] Flushed {written} pending rating(s) on shutdown")
+        except Exception as e:
+            print(f"[rating_buffer] Shutdown flush failed, {rating_buffer.pending_count()} rating(s) lost: {e}")
+
+@app.get("/healthz")
+async def healthz():
+    return {"ok": True, "catalog_replica": catalog_replica.status(), "compression": compression.stats()}
+
+# The built frontend (the Dockerfile copies and precompresses it there). The
+# catch-all "/" mount shadows routes declared after it, so it only gives way
+# to the placeholder below when there is no build
+frontend_dist = os.path.join(os.path.dirname(__file__), "..", "frontend", "dist")
+if os.path.isdir(frontend_dist):
+    app.mount("/", PrecompressedStaticFiles(directory=frontend_dist, html=True), name="static")
 
 @app.get("/")
 async def read_root():
@@ -57,6 +119,3 @@ if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
 
 ## Removed old demo friends endpoints in favor of routes.friend_list_routes
-@app.get("/healthz")
-async def healthz():
-    return {"ok": True}
@@ -0,0 +1,107 @@
+# movie_json.py
+"""
+Fast JSON encoding for movie list responses.
+
+Search, trending and "more like this" return rows that transform_db_movie
+has already shaped, so validating them again through the response model and
+encoding them with the stdlib json module is wasted work on every page. The
+routes instead return the encoded body directly:
+
+  - bodies are encoded with orjson when it is installed (stdlib json otherwise)
+  - each movie's encoded object is cached by tmdb_id (and the sparse fieldset
+    requested, if any) together with the source fields it was built from; a
+    hit is only used if those fields are unchanged, so a list body is mostly a
+    join of cached fragments
+
+FAST_MOVIE_JSON=0 switches back to response-model validation.
+MOVIE_JSON_CACHE_SIZE bounds the per-worker cache (0 disables it).
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional; fall back to the stdlib encoder
+    orjson = None
+
+ENABLED = (os.getenv("FAST_MOVIE_JSON") or "1").lower() in ("1", "true", "yes")
+CACHE_SIZE = int(os.getenv("MOVIE_JSON_CACHE_SIZE") or 20000)
+
+# Columns of a movie row that transform_db_movie reads
+SOURCE_FIELDS = (
+    "tmdb_id", "title", "release_year", "poster", "genre", "rating", "description",
+    "user_rating_count", "user_rating_sum", "user_rating_hist",
+)
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+class JSONBytesResponse(Response):
+    """A response whose body is already-encoded JSON."""
+    media_type = "application/json"
+
+
+# (tmdb_id, fieldset) -> (source fields, encoded movie)
+_cache: "OrderedDict[Tuple[int, Optional[Tuple[str, ...]]], Tuple[Tuple[Any, ...], bytes]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def movie_fragment(
+    m: Dict[str, Any],
+    to_fields: Callable[[Dict[str, Any]], Dict[str, Any]],
+    fields: Optional[Tuple[str, ...]] = None,
+    source_fields: Tuple[str, ...] = SOURCE_FIELDS,
+) -> bytes:
+    """
+    The encoded API object of one movie row (to_fields builds it), narrowed to
+    fields if given, from cache when the source_fields of the row are unchanged.
+    """
+    key = tuple(m.get(c) for c in source_fields)
+    tmdb_id = m.get("tmdb_id")
+    slot = (tmdb_id, fields)
+    if CACHE_SIZE and tmdb_id is not None:
+        with _lock:
+            hit = _cache.get(slot)
+            if hit is not None and hit[0] == key:
+                _cache.move_to_end(slot)
+                return hit[1]
+    obj = to_fields(m)
+    if fields is not None:
+        obj = {f: obj[f] for f in fields}
+    encoded = dumps(obj)
+    if CACHE_SIZE and tmdb_id is not None:
+        with _lock:
+            _cache[slot] = (key, encoded)
+            _cache.move_to_end(slot)
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+    return encoded
+
+
+def array_body(fragments: Iterable[bytes]) -> bytes:
+    return b"[" + b",".join(fragments) + b"]"
+
+
+def list_body(fragments: Iterable[bytes], **fields: Any) -> bytes:
+    """{"movies": [...], **fields}, in that key order (the order of PaginatedMoviesResponse)."""
+    rest = dumps(fields)
+    return b'{"movies":' + array_body(fragments) + (b"," + rest[1:] if fields else b"}")
+
+
+def clear_cache() -> None:
+    with _lock:
+        _cache.clear()
+
+
+def cache_size() -> int:
+    with _lock:
+        return len(_cache)
@@ -0,0 +1,133 @@
+# movie_rating_stats.py
+"""
+Per-movie community rating aggregates.
+
+Every movie row carries how many users rated it, the sum of those ratings and
+a histogram of the 1-5 stars (user_rating_count, user_rating_sum,
+user_rating_hist), plus a Bayesian average (user_rating_score) used for the
+"community" sort of /search/movies and /trending:
+
+    score = (sum + PRIOR_VOTES * PRIOR_MEAN) / (count + PRIOR_VOTES)
+
+so a movie with a single 5-star rating does not outrank one with hundreds of
+4s. A trigger on user_movie_ratings (count_movie_rating in database.sql)
+adjusts the columns with deltas in the same transaction as every create,
+change or delete, so concurrent writes cannot double-count and reading them
+costs nothing beyond the movie row itself.
+
+To recompute everything from user_movie_ratings:
+    python movie_rating_stats.py rebuild
+"""
+import sys
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config import supabase_admin
+
+# Keep in sync with apply_movie_rating_deltas and movie_rating_delta in database.sql
+PRIOR_MEAN = 3.0
+PRIOR_VOTES = 5
+STARS = 5
+
+# tmdb_id -> {"count": int, "sum": int, "hist": [5 ints, one per star]}
+RatingDeltas = Dict[int, Dict[str, Any]]
+
+# Deltas sent per RPC call when rebuilding
+REBUILD_BATCH = 500
+
+
+def _empty() -> Dict[str, Any]:
+    return {"count": 0, "sum": 0, "hist": [0] * STARS}
+
+
+def delta_for(old: Optional[int], new: Optional[int]) -> Dict[str, Any]:
+    """
+    The change to one movie's aggregates when a user's rating goes from `old`
+    to `new` (None means no rating: a create has old=None, a delete new=None).
+    """
+    d = _empty()
+    if old is not None:
+        d["count"] -= 1
+        d["sum"] -= old
+        d["hist"][old - 1] -= 1
+    if new is not None:
+        d["count"] += 1
+        d["sum"] += new
+        d["hist"][new - 1] += 1
+    return d
+
+
+def aggregate(changes: Iterable[Tuple[int, Optional[int], Optional[int]]]) -> RatingDeltas:
+    """Fold (tmdb_id, old, new) rating changes into one delta per movie, dropping no-ops."""
+    deltas: RatingDeltas = defaultdict(_empty)
+    for tmdb_id, old, new in changes:
+        d, step = deltas[tmdb_id], delta_for(old, new)
+        d["count"] += step["count"]
+        d["sum"] += step["sum"]
+        d["hist"] = [a + b for a, b in zip(d["hist"], step["hist"])]
+    return {tmdb_id: d for tmdb_id, d in deltas.items() if d["count"] or d["sum"] or any(d["hist"])}
+
+
+def _apply_deltas(deltas: RatingDeltas) -> None:
+    """Add the deltas to the movies in one round-trip (see apply_movie_rating_deltas in database.sql)."""
+    payload = [{"tmdb_id": tmdb_id, **d} for tmdb_id, d in deltas.items()]
+    if payload:
+        supabase_admin.rpc("apply_movie_rating_deltas", {"p_deltas": payload}).execute()
+
+
+def community_rating(m: Dict[str, Any]) -> Dict[str, Any]:
+    """The aggregates of one movie row, as exposed by the API."""
+    count = m.get("user_rating_count") or 0
+    hist = list(m.get("user_rating_hist") or [0] * STARS)
+    return {
+        "user_rating_count": count,
+        "user_rating_avg": round((m.get("user_rating_sum") or 0) / count, 2) if count else None,
+        "user_rating_histogram": hist,
+    }
+
+
+def _fetch_all_ratings() -> List[Dict[str, Any]]:
+    rows, start, page = [], 0, 1000
+    while True:
+        res = (
+            supabase_admin.table("user_movie_ratings")
+            .select("tmdb_id,rating")
+            .order("id")
+            .range(start, start + page - 1)
+            .execute()
+        )
+        batch = res.data or []
+        rows.extend(batch)
+        if len(batch) < page:
+            return rows
+        start += page
+
+
+def rebuild() -> int:
+    """
+    Recompute every movie's aggregates from user_movie_ratings.
+    Returns the number of movies with at least one rating.
+    """
+    ratings = _fetch_all_ratings()
+    deltas = aggregate((r["tmdb_id"], None, r["rating"]) for r in ratings if r.get("rating"))
+
+    supabase_admin.table("movies").update({
+        "user_rating_count": 0,
+        "user_rating_sum": 0,
+        "user_rating_hist": [0] * STARS,
+        "user_rating_score": None,
+    }).gt("user_rating_count", 0).execute()
+
+    items = list(deltas.items())
+    for i in range(0, len(items), REBUILD_BATCH):
+        _apply_deltas(dict(items[i:i + REBUILD_BATCH]))
+    print(f"[movie_rating_stats] Rebuilt {len(deltas)} movies from {len(ratings)} ratings")
+    return len(deltas)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "rebuild":
+        print("Usage: python movie_rating_stats.py rebuild")
+        sys.exit(1)
+    count = rebuild()
+    print(f"✅ Rebuilt rating stats for {count} movie(s)")
@@ -0,0 +1,149 @@
+# privacy_policy.py
+"""
+Who may see a user's profile, favourites and ratings.
+
+can_view(viewer_id, owner_id, resource) answers from an in-process cache of
+the owner's privacy_settings, block list and friends (the members of their
+friend lists), so reads that enforce it cost no extra database round-trips
+once the owner is cached. A miss costs three small queries.
+
+    resource     visible when
+    profile      profile_visibility: public | friends | private
+    ratings      the profile is visible
+    favourites   the profile is visible and show_favorites_to allows it:
+                 everyone | friends | only_me
+
+Owners always see their own data; a viewer the owner blocked sees nothing,
+and anonymous viewers only what is public.
+
+Entries are dropped when the owner changes their settings, blocks or
+unblocks someone, or adds a friend (invalidate). The TTL bounds staleness
+on other workers, which never see those invalidations.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Optional
+
+from config import supabase_admin
+
+CACHE_TTL_SECONDS = int(os.getenv("PRIVACY_CACHE_TTL_SECONDS") or 60)
+CACHE_SIZE = int(os.getenv("PRIVACY_CACHE_SIZE") or 50000)
+
+PROFILE = "profile"
+FAVOURITES = "favourites"
+RATINGS = "ratings"
+
+# Column defaults of privacy_settings, for owners without a row
+DEFAULT_PROFILE_VISIBILITY = "public"
+DEFAULT_SHOW_FAVORITES_TO = "friends"
+
+
+class OwnerPolicy:
+    """One owner's cached settings, block list and friends."""
+
+    __slots__ = ("profile_visibility", "show_favorites_to", "blocked", "friends", "expires")
+
+    def __init__(self, profile_visibility: str, show_favorites_to: str, blocked: FrozenSet[str], friends: FrozenSet[str], expires: float):
+        self.profile_visibility = profile_visibility
+        self.show_favorites_to = show_favorites_to
+        self.blocked = blocked
+        self.friends = friends
+        self.expires = expires
+
+
+# owner_id -> policy, least recently used first
+_cache: "OrderedDict[str, OwnerPolicy]" = OrderedDict()
+_cache_lock = threading.Lock()
+# Bumped on every invalidation, so a load that raced with one is not cached
+_generation = 0
+
+
+def _visibility(value) -> str:
+    # The column started out as a boolean; the API writes public | friends | private
+    if value is None:
+        return DEFAULT_PROFILE_VISIBILITY
+    if isinstance(value, bool):
+        return "public" if value else "private"
+    return str(value)
+
+
+def _load(owner_id: str) -> Dict[str, object]:
+    settings = (
+        supabase_admin.table("privacy_settings")
+        .select("profile_visibility, show_favorites_to")
+        .eq("user_id", owner_id)
+        .execute()
+    )
+    blocked = supabase_admin.table("blocked_users").select("blocked").eq("user_id", owner_id).execute()
+    lists = (
+        supabase_admin.table("friendlists")
+        .select("friendlist_members(member_user_id)")
+        .eq("owner_user_id", owner_id)
+        .execute()
+    )
+    row = (settings.data or [{}])[0]
+    return {
+        "profile_visibility": _visibility(row.get("profile_visibility")),
+        "show_favorites_to": row.get("show_favorites_to") or DEFAULT_SHOW_FAVORITES_TO,
+        "blocked": frozenset(str(r["blocked"]) for r in (blocked.data or [])),
+        "friends": frozenset(
+            str(m["member_user_id"])
+            for fl in (lists.data or [])
+            for m in (fl.get("friendlist_members") or [])
+        ),
+    }
+
+
+def policy_for(owner_id: str) -> OwnerPolicy:
+    """The owner's cached policy, loaded on a miss or once expired."""
+    now = time.monotonic()
+    with _cache_lock:
+        policy = _cache.get(owner_id)
+        if policy is not None and policy.expires > now:
+            _cache.move_to_end(owner_id)
+            return policy
+        generation = _generation
+
+    policy = OwnerPolicy(**_load(owner_id), expires=now + CACHE_TTL_SECONDS)
+    with _cache_lock:
+        if generation == _generation:
+            _cache[owner_id] = policy
+            _cache.move_to_end(owner_id)
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+    return policy
+
+
+def can_view(viewer_id: Optional[str], owner_id: str, resource: str) -> bool:
+    """Whether viewer_id (None when anonymous) may read owner_id's resource (PROFILE, FAVOURITES or RATINGS)."""
+    if viewer_id is not None and str(viewer_id) == str(owner_id):
+        return True
+    policy = policy_for(str(owner_id))
+    viewer = str(viewer_id) if viewer_id is not None else None
+    if viewer is not None and viewer in policy.blocked:
+        return False
+    is_friend = viewer is not None and viewer in policy.friends
+
+    # Unknown values hide rather than show
+    if not (policy.profile_visibility == "public" or (policy.profile_visibility == "friends" and is_friend)):
+        return False
+    if resource == FAVOURITES:
+        return policy.show_favorites_to == "everyone" or (policy.show_favorites_to == "friends" and is_friend)
+    return True
+
+
+def invalidate(owner_id: str) -> None:
+    """Forget an owner's policy (their settings, blocks or friends changed)."""
+    global _generation
+    with _cache_lock:
+        _generation += 1
+        _cache.pop(str(owner_id), None)
+
+
+def clear() -> None:
+    global _generation
+    with _cache_lock:
+        _generation += 1
+        _cache.clear()
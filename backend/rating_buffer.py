@@ -0,0 +1,133 @@
+# rating_buffer.py
+"""
+Optional write-behind buffer for rating upserts (RATING_WRITE_BEHIND=1).
+
+Star widgets send an upsert on every click, and users often click through
+several stars in a row. In write-behind mode upsert_rating only records the
+rating here and returns; a background task flushes every FLUSH_SECONDS:
+
+  - repeated writes to the same (user_id, tmdb_id) coalesce, the last wins
+  - all pending ratings go out in one batched upsert (the movies'
+    aggregates follow by trigger), with the users' group recommendations
+    invalidated once
+  - a failed flush puts its entries back unless they were overwritten since
+
+Reads see this worker's pending ratings: point reads overlay them, and the
+paged listing flushes the user's entries first (keyset pages cannot be
+overlaid). main.py flushes everything on graceful shutdown. Each worker has
+its own buffer, so with several workers another worker's reads may lag by up
+to FLUSH_SECONDS.
+"""
+import asyncio
+import os
+import threading
+import traceback
+from typing import Dict, List, Optional, Tuple
+
+from config import supabase_admin
+import activity_feed
+import group_recommendations
+
+ENABLED = (os.getenv("RATING_WRITE_BEHIND") or "").lower() in ("1", "true", "yes")
+FLUSH_SECONDS = float(os.getenv("RATING_FLUSH_SECONDS") or 2.0)
+# Rows per upsert statement
+FLUSH_BATCH = 500
+
+Key = Tuple[str, int]
+
+# (user_id, tmdb_id) -> latest rating
+_pending: Dict[Key, int] = {}
+_lock = threading.Lock()
+# Serializes flushes so an older batch never lands after a newer one
+_flush_lock = threading.Lock()
+
+
+def put(user_id: str, tmdb_id: int, rating: int) -> None:
+    with _lock:
+        _pending[(user_id, tmdb_id)] = rating
+
+
+def discard(user_id: str, tmdb_id: int) -> None:
+    """Forget a pending write (the rating is being deleted); waits out a flush in progress."""
+    with _flush_lock, _lock:
+        _pending.pop((user_id, tmdb_id), None)
+
+
+def pending_rating(user_id: str, tmdb_id: int) -> Optional[int]:
+    with _lock:
+        return _pending.get((user_id, tmdb_id))
+
+
+def pending_count() -> int:
+    with _lock:
+        return len(_pending)
+
+
+def _write(entries: Dict[Key, int]) -> None:
+    """Upsert one batch and apply its side effects."""
+    by_user: Dict[str, List[int]] = {}
+    for user_id, tmdb_id in entries:
+        by_user.setdefault(user_id, []).append(tmdb_id)
+    users = sorted(by_user)
+    # One lookup per user: filtering users and movies together would fetch
+    # their cross product, which PostgREST silently truncates at max-rows
+    old: Dict[Key, int] = {}
+    for user_id in users:
+        existing = (
+            supabase_admin.table("user_movie_ratings")
+            .select("tmdb_id,rating")
+            .eq("user_id", user_id)
+            .in_("tmdb_id", sorted(by_user[user_id]))
+            .execute()
+        )
+        old.update(((user_id, e["tmdb_id"]), e["rating"]) for e in (existing.data or []))
+
+    supabase_admin.table("user_movie_ratings").upsert(
+        [{"user_id": user_id, "tmdb_id": tmdb_id, "rating": rating} for (user_id, tmdb_id), rating in entries.items()],
+        on_conflict="user_id,tmdb_id",
+    ).execute()
+
+    for user_id in users:
+        group_recommendations.invalidate_user(user_id)
+    # Coalesced writes record one event per rating that actually changed
+    for (user_id, tmdb_id), rating in entries.items():
+        if old.get((user_id, tmdb_id)) != rating:
+            activity_feed.record(user_id, activity_feed.RATED, tmdb_id=tmdb_id, value=rating)
+
+
+def flush(user_id: Optional[str] = None) -> int:
+    """
+    Write pending ratings (all of them, or one user's) and return how many
+    were written. Entries of a failed batch are requeued and the error re-raised.
+    """
+    with _flush_lock:
+        with _lock:
+            keys = [k for k in _pending if user_id is None or k[0] == user_id]
+            taken = {k: _pending.pop(k) for k in keys}
+
+        items = list(taken.items())
+        written = 0
+        for i in range(0, len(items), FLUSH_BATCH):
+            batch = dict(items[i:i + FLUSH_BATCH])
+            try:
+                _write(batch)
+                written += len(batch)
+            except Exception:
+                with _lock:
+                    for key, entry in items[i:]:
+                        # A newer write since we took the batch wins
+                        _pending.setdefault(key, entry)
+                raise
+        return written
+
+
+async def flush_periodically() -> None:
+    """Background task started by main.py when write-behind is enabled."""
+    while True:
+        await asyncio.sleep(FLUSH_SECONDS)
+        try:
+            if pending_count():
+                await asyncio.to_thread(flush)
+        except Exception as e:
+            print(f"[rating_buffer] Flush failed, will retry: {e}")
+            print(traceback.format_exc())
@@ -0,0 +1,256 @@
+# rating_import.py
+"""
+Bulk import of a user's ratings from CSV or NDJSON.
+
+The body is parsed as it streams in and handled in batches of BATCH_SIZE rows:
+each batch resolves its titles/ids against the catalog with one query per kind,
+reads the user's existing ratings for those movies, upserts in one statement
+and yields one result per input row. Nothing but the current batch is held in
+memory, so a 100k-row file costs the same memory as a 500-row one.
+
+Rows name a movie by tmdb_id, or by title (exact match) with an optional year
+to pick between remakes. Ratings may be fractional (e.g. Letterboxd half
+stars) and are rounded to the nearest whole star.
+
+CSV needs a header row; column names are case-insensitive and "name" is
+accepted for "title", so a Letterboxd ratings.csv imports as-is:
+    tmdb_id,rating          or      Date,Name,Year,Letterboxd URI,Rating
+NDJSON is one object per line with the same keys:
+    {"tmdb_id": 550, "rating": 5}
+    {"title": "Heat", "year": 1995, "rating": 4.5}
+"""
+import asyncio
+import codecs
+import csv
+import json
+import traceback
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from config import supabase_admin
+
+BATCH_SIZE = 500
+# A single line longer than this is rejected rather than buffered forever
+MAX_LINE_BYTES = 64 * 1024
+
+COLUMN_ALIASES = {"name": "title", "id": "tmdb_id", "release_year": "year"}
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a UTF-8 byte stream into lines without reading it all first."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+        if len(pending) > MAX_LINE_BYTES:
+            raise ValueError(f"Line longer than {MAX_LINE_BYTES} bytes")
+    pending += decoder.decode(b"", final=True)
+    if pending.strip():
+        yield pending.rstrip("\r")
+
+
+def _normalize(row: Dict[str, Any]) -> Dict[str, Any]:
+    out = {}
+    for key, value in row.items():
+        if key is None:
+            continue
+        key = key.strip().lower()
+        out[COLUMN_ALIASES.get(key, key)] = value.strip() if isinstance(value, str) else value
+    return out
+
+
+async def iter_records(lines: AsyncIterator[str], fmt: str) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Yield (line number, record, error) for every data row. CSV fields may
+    contain quoted newlines; such records are reassembled before parsing.
+    """
+    header: Optional[List[str]] = None
+    buffered, start = "", 0
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if fmt == "ndjson":
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_no, None, f"Invalid JSON: {e}"
+                continue
+            if isinstance(record, dict):
+                yield line_no, _normalize(record), None
+            else:
+                yield line_no, None, "Expected a JSON object"
+            continue
+
+        # CSV: an odd number of quotes means the record continues on the next line
+        if not buffered:
+            start = line_no
+        buffered = f"{buffered}\n{line}" if buffered else line
+        if buffered.count('"') % 2:
+            continue
+        text, buffered = buffered, ""
+        if not text.strip():
+            continue
+        fields = next(csv.reader([text]))
+        if header is None:
+            header = fields
+            continue
+        yield start, _normalize(dict(zip(header, fields))), None
+
+    if buffered:
+        yield start, None, "Unterminated quoted field"
+
+
+def parse_rating(value: Any) -> int:
+    """Round to the nearest whole star (half up); raises ValueError outside 1..5."""
+    rating = int(Decimal(str(value).strip()).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    if not 1 <= rating <= 5:
+        raise ValueError(f"Rating must be between 1 and 5, got {value}")
+    return rating
+
+
+def _resolve(rows: List[Dict[str, Any]]) -> None:
+    """Fill in row["tmdb_id"] (or row["error"]) for a batch with one catalog query per kind."""
+    ids = sorted({r["tmdb_id"] for r in rows if r.get("tmdb_id") is not None})
+    known = set()
+    if ids:
+        res = supabase_admin.table("movies").select("tmdb_id").in_("tmdb_id", ids).execute()
+        known = {m["tmdb_id"] for m in (res.data or [])}
+
+    titles = sorted({r["title"] for r in rows if r.get("tmdb_id") is None and r.get("title")})
+    by_title: Dict[str, List[Dict[str, Any]]] = {}
+    if titles:
+        res = supabase_admin.table("movies").select("tmdb_id,title,release_year").in_("title", titles).execute()
+        for m in res.data or []:
+            by_title.setdefault(m["title"], []).append(m)
+
+    for r in rows:
+        if r.get("error"):
+            continue
+        if r.get("tmdb_id") is not None:
+            if r["tmdb_id"] not in known:
+                r["error"] = f"Movie {r['tmdb_id']} not found"
+            continue
+        matches = by_title.get(r.get("title") or "", [])
+        if r.get("year"):
+            matches = [m for m in matches if str(m.get("release_year")) == str(r["year"])]
+        ids_found = {m["tmdb_id"] for m in matches}
+        if len(ids_found) == 1:
+            r["tmdb_id"] = ids_found.pop()
+        elif ids_found:
+            r["error"] = "Ambiguous title; add a year"
+        else:
+            r["error"] = "Movie not found"
+
+
+def _prepare(line: int, record: Optional[Dict[str, Any]], error: Optional[str]) -> Dict[str, Any]:
+    row: Dict[str, Any] = {"line": line, "tmdb_id": None, "title": None, "year": None, "rating": None, "error": error}
+    if error:
+        return row
+    try:
+        row["rating"] = parse_rating(record.get("rating"))
+    except Exception:
+        row["error"] = f"Invalid rating: {record.get('rating')!r}"
+        return row
+    raw_id = record.get("tmdb_id")
+    if raw_id not in (None, ""):
+        try:
+            row["tmdb_id"] = int(raw_id)
+        except (TypeError, ValueError):
+            row["error"] = f"Invalid tmdb_id: {raw_id!r}"
+    elif record.get("title"):
+        row["title"] = str(record["title"])
+        row["year"] = record.get("year") or None
+    else:
+        row["error"] = "Row needs a tmdb_id or a title"
+    return row
+
+
+def import_batch(user_id: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Resolve and upsert one batch of prepared rows; returns one result per row, in order."""
+    _resolve(rows)
+    # Within a batch the last rating of a movie wins (one upsert can't touch a row twice)
+    latest: Dict[int, Dict[str, Any]] = {}
+    for r in rows:
+        if not r.get("error"):
+            latest[r["tmdb_id"]] = r
+
+    old: Dict[int, int] = {}
+    if latest:
+        existing = (
+            supabase_admin.table("user_movie_ratings")
+            .select("tmdb_id,rating")
+            .eq("user_id", user_id)
+            .in_("tmdb_id", sorted(latest))
+            .execute()
+        )
+        old = {e["tmdb_id"]: e["rating"] for e in (existing.data or [])}
+        changed = [r for tmdb_id, r in latest.items() if old.get(tmdb_id) != r["rating"]]
+        if changed:
+            supabase_admin.table("user_movie_ratings").upsert(
+                [{"user_id": user_id, "tmdb_id": r["tmdb_id"], "rating": r["rating"]} for r in changed],
+                on_conflict="user_id,tmdb_id",
+            ).execute()
+
+    results = []
+    for r in rows:
+        if r.get("error"):
+            status = "error"
+        elif latest[r["tmdb_id"]] is not r:
+            status = "superseded"
+        elif r["tmdb_id"] not in old:
+            status = "created"
+        elif old[r["tmdb_id"]] != r["rating"]:
+            status = "updated"
+        else:
+            status = "unchanged"
+        result = {"line": r["line"], "status": status, "tmdb_id": r["tmdb_id"], "rating": r["rating"]}
+        if r.get("error"):
+            result["error"] = r["error"]
+        results.append(result)
+    return results
+
+
+async def run_import(user_id: str, chunks: AsyncIterator[bytes], fmt: str, batch_size: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Import a streamed file, yielding each row's result as its batch completes
+    and finally {"summary": {status: count, ...}}. batch_size defaults to
+    BATCH_SIZE, read at call time.
+    """
+    batch_size = batch_size or BATCH_SIZE
+    summary: Dict[str, int] = {"rows": 0, "created": 0, "updated": 0, "unchanged": 0, "superseded": 0, "error": 0}
+    batch: List[Dict[str, Any]] = []
+
+    async def flush() -> AsyncIterator[Dict[str, Any]]:
+        try:
+            results = await asyncio.to_thread(import_batch, user_id, batch)
+        except Exception as e:
+            # A failed batch is reported row by row; later batches still run
+            print(f"[rating_import] Batch failed for {user_id}: {e}")
+            print(traceback.format_exc())
+            results = [
+                {"line": r["line"], "status": "error", "tmdb_id": r.get("tmdb_id"), "rating": r["rating"], "error": "Import failed"}
+                for r in batch
+            ]
+        for result in results:
+            summary["rows"] += 1
+            summary[result["status"]] += 1
+            yield result
+
+    try:
+        async for line, record, error in iter_records(iter_lines(chunks), fmt):
+            batch.append(_prepare(line, record, error))
+            if len(batch) >= batch_size:
+                async for result in flush():
+                    yield result
+                batch = []
+        if batch:
+            async for result in flush():
+                yield result
+    except ValueError as e:
+        summary["aborted"] = str(e)
+    yield {"summary": summary}
@@ -0,0 +1,318 @@
+# recommender.py
+"""
+Collaborative-filtering "recommended for you" lists.
+
+A model is trained periodically (not per request) from user_movie_ratings and
+favourite_movies:
+
+  1) Every (user, movie) interaction becomes one entry of a sparse user x movie
+     matrix, stored CSR-style in NumPy arrays. Its confidence grows with the
+     star rating, and favouriting a movie counts as a strong extra signal.
+  2) The matrix is factorized with implicit-feedback ALS (alternating least
+     squares, Hu/Koren/Volinsky 2008) into float32 user and movie factors.
+  3) Serving a user is one matrix-vector product of the movie factors with the
+     user's factor row, with the movies they have already seen masked out.
+
+Train and save a model by hand:
+    python recommender.py train
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import file_lock
+
+# Where the trained model is kept between restarts
+MODEL_PATH = os.getenv("RECOMMENDER_MODEL_PATH") or os.path.join(os.path.dirname(__file__), "recommender_model.npz")
+# How often the API retrains in the background (0 disables it)
+REFRESH_SECONDS = int(os.getenv("RECOMMENDER_REFRESH_SECONDS") or 6 * 60 * 60)
+# Whether the API trains at all (RECOMMENDER_TRAIN=1, as the Dockerfile sets);
+# otherwise it only serves a model saved by `python recommender.py train`
+TRAIN = (os.getenv("RECOMMENDER_TRAIN") or "").lower() in ("1", "true", "yes")
+
+# Confidence weights (c = 1 + ALPHA * strength)
+RATING_WEIGHT = 1.0       # per star
+FAVOURITE_WEIGHT = 5.0    # a favourite counts like an extra 5 stars
+ALPHA = 4.0
+
+# PostgREST returns at most this many rows per request
+PAGE_SIZE = 1000
+
+
+class RecommenderModel:
+    """
+    Trained factors plus the seen-items mask, all as compact NumPy arrays.
+
+    user_factors: float32 (n_users, k)      movie_factors: float32 (n_movies, k)
+    movie_ids:    int32 tmdb ids, row i of movie_factors is movie_ids[i]
+    seen_indptr / seen_indices: CSR rows of movie indexes each user interacted with
+    """
+
+    def __init__(self, user_ids: List[str], movie_ids: np.ndarray, user_factors: np.ndarray,
+                 movie_factors: np.ndarray, seen_indptr: np.ndarray, seen_indices: np.ndarray,
+                 trained_at: float):
+        self.user_ids = list(user_ids)
+        self.user_index = {uid: i for i, uid in enumerate(self.user_ids)}
+        self.movie_ids = movie_ids.astype(np.int32, copy=False)
+        self.user_factors = user_factors.astype(np.float32, copy=False)
+        self.movie_factors = movie_factors.astype(np.float32, copy=False)
+        self.seen_indptr = seen_indptr.astype(np.int32, copy=False)
+        self.seen_indices = seen_indices.astype(np.int32, copy=False)
+        self.trained_at = trained_at
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.movie_ids, self.user_factors, self.movie_factors, self.seen_indptr, self.seen_indices))
+
+    def recommend(self, user_id: str, k: int = 20) -> List[Tuple[int, float]]:
+        """Top-k (tmdb_id, score) for a user, best first. Empty for users the model has not seen."""
+        u = self.user_index.get(user_id)
+        if u is None or not len(self.movie_ids):
+            return []
+        scores = self.movie_factors @ self.user_factors[u]
+        scores[self.seen_indices[self.seen_indptr[u]:self.seen_indptr[u + 1]]] = -np.inf
+        return self._top_k(scores, k)
+
+    def recommend_many(self, user_ids: List[str], k: int = 20) -> Dict[str, List[Tuple[int, float]]]:
+        """recommend() for several users with one matrix-matrix product."""
+        rows = [self.user_index[uid] for uid in user_ids if uid in self.user_index]
+        if not rows or not len(self.movie_ids):
+            return {uid: [] for uid in user_ids}
+        scores = self.user_factors[rows] @ self.movie_factors.T
+        results = {uid: [] for uid in user_ids}
+        for i, u in enumerate(rows):
+            scores[i, self.seen_indices[self.seen_indptr[u]:self.seen_indptr[u + 1]]] = -np.inf
+            results[self.user_ids[u]] = self._top_k(scores[i], k)
+        return results
+
+    def _top_k(self, scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(self.movie_ids[i]), float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+    def save(self, path: str = MODEL_PATH) -> None:
+        tmp = path + ".tmp.npz"
+        np.savez(
+            tmp,
+            user_ids=np.array(self.user_ids, dtype=str),
+            movie_ids=self.movie_ids,
+            user_factors=self.user_factors,
+            movie_factors=self.movie_factors,
+            seen_indptr=self.seen_indptr,
+            seen_indices=self.seen_indices,
+            trained_at=np.array(self.trained_at),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = MODEL_PATH) -> "RecommenderModel":
+        with np.load(path) as f:
+            return cls(
+                user_ids=f["user_ids"].tolist(),
+                movie_ids=f["movie_ids"],
+                user_factors=f["user_factors"],
+                movie_factors=f["movie_factors"],
+                seen_indptr=f["seen_indptr"],
+                seen_indices=f["seen_indices"],
+                trained_at=float(f["trained_at"]),
+            )
+
+
+# BUILDING THE MATRIX
+
+def build_interactions(ratings: Iterable[Dict], favourites: Iterable[Dict]):
+    """
+    Sparse user x movie interaction matrix from rating and favourite rows.
+
+    Returns (user_ids, movie_ids, indptr, indices, strength): CSR arrays where
+    row u holds the movie indexes user_ids[u] interacted with and how strongly.
+    """
+    users: List[str] = []
+    movies: List[int] = []
+    strengths: List[float] = []
+    for r in ratings:
+        if r.get("tmdb_id") is None or r.get("rating") is None:
+            continue
+        users.append(str(r["user_id"]))
+        movies.append(int(r["tmdb_id"]))
+        strengths.append(RATING_WEIGHT * float(r["rating"]))
+    for f in favourites:
+        users.append(str(f["user_id"]))
+        movies.append(int(f["movie_id"]))
+        strengths.append(FAVOURITE_WEIGHT)
+
+    if not users:
+        return [], np.zeros(0, np.int32), np.zeros(1, np.int32), np.zeros(0, np.int32), np.zeros(0, np.float32)
+
+    user_ids, user_idx = np.unique(np.array(users), return_inverse=True)
+    movie_ids, movie_idx = np.unique(np.array(movies, dtype=np.int32), return_inverse=True)
+    user_idx = user_idx.reshape(-1)
+    movie_idx = movie_idx.reshape(-1)
+
+    # Sum duplicate (user, movie) pairs, e.g. a rated favourite
+    keys = user_idx.astype(np.int64) * len(movie_ids) + movie_idx
+    keys, inverse = np.unique(keys, return_inverse=True)
+    strength = np.bincount(inverse.reshape(-1), weights=np.array(strengths)).astype(np.float32)
+    rows = (keys // len(movie_ids)).astype(np.int32)
+    indices = (keys % len(movie_ids)).astype(np.int32)
+
+    indptr = np.zeros(len(user_ids) + 1, dtype=np.int32)
+    np.cumsum(np.bincount(rows, minlength=len(user_ids)), out=indptr[1:])
+    return user_ids.tolist(), movie_ids, indptr, indices, strength
+
+
+def _transpose(indptr: np.ndarray, indices: np.ndarray, data: np.ndarray, n_cols: int):
+    """CSR -> CSR of the transposed matrix."""
+    rows = np.repeat(np.arange(len(indptr) - 1, dtype=np.int32), np.diff(indptr))
+    order = np.argsort(indices, kind="stable")
+    t_indptr = np.zeros(n_cols + 1, dtype=np.int32)
+    np.cumsum(np.bincount(indices, minlength=n_cols), out=t_indptr[1:])
+    return t_indptr, rows[order], data[order]
+
+
+# TRAINING
+
+def _als_half_step(indptr: np.ndarray, indices: np.ndarray, confidence: np.ndarray,
+                   fixed: np.ndarray, regularization: float) -> np.ndarray:
+    """Solve every row's factors with the other side held fixed (implicit ALS)."""
+    n_rows, k = len(indptr) - 1, fixed.shape[1]
+    gram = fixed.T @ fixed
+    reg = regularization * np.eye(k)
+    out = np.zeros((n_rows, k))
+    for u in range(n_rows):
+        start, end = indptr[u], indptr[u + 1]
+        if start == end:
+            continue
+        y = fixed[indices[start:end]]
+        c = confidence[start:end]
+        a = gram + (y.T * (c - 1.0)) @ y + reg
+        out[u] = np.linalg.solve(a, y.T @ c)
+    return out
+
+
+def train(user_ids: List[str], movie_ids: np.ndarray, indptr: np.ndarray, indices: np.ndarray,
+          strength: np.ndarray, factors: int = 32, regularization: float = 0.1,
+          iterations: int = 10, seed: int = 0) -> RecommenderModel:
+    """Factorize a CSR interaction matrix (see build_interactions) into a RecommenderModel."""
+    n_users, n_movies = len(user_ids), len(movie_ids)
+    confidence = 1.0 + ALPHA * strength.astype(np.float64)
+    t_indptr, t_indices, t_confidence = _transpose(indptr, indices, confidence, n_movies)
+
+    rng = np.random.default_rng(seed)
+    user_f = rng.normal(scale=0.01, size=(n_users, factors))
+    movie_f = rng.normal(scale=0.01, size=(n_movies, factors))
+    for _ in range(iterations):
+        user_f = _als_half_step(indptr, indices, confidence, movie_f, regularization)
+        movie_f = _als_half_step(t_indptr, t_indices, t_confidence, user_f, regularization)
+
+    return RecommenderModel(user_ids, movie_ids, user_f, movie_f, indptr, indices, trained_at=time.time())
+
+
+# LOADING FROM SUPABASE
+
+def _fetch_all(client, table: str, columns: str, order: str) -> List[Dict]:
+    """Every row of a table, paged past PostgREST's per-request row limit."""
+    rows: List[Dict] = []
+    offset = 0
+    while True:
+        res = client.table(table).select(columns).order(order).range(offset, offset + PAGE_SIZE - 1).execute()
+        batch = res.data or []
+        rows.extend(batch)
+        if len(batch) < PAGE_SIZE:
+            return rows
+        offset += PAGE_SIZE
+
+
+def train_from_database(**train_kwargs) -> RecommenderModel:
+    from config import supabase_admin
+
+    ratings = _fetch_all(supabase_admin, "user_movie_ratings", "user_id,tmdb_id,rating", "id")
+    favourites = _fetch_all(supabase_admin, "favourite_movies", "user_id,movie_id", "user_id")
+    return train(*build_interactions(ratings, favourites), **train_kwargs)
+
+
+# THE SERVED MODEL
+
+_model: Optional[RecommenderModel] = None
+_model_lock = threading.Lock()
+
+
+def get_model() -> Optional[RecommenderModel]:
+    """The model being served; loaded from MODEL_PATH on first use if one was saved."""
+    global _model
+    if _model is None and os.path.exists(MODEL_PATH):
+        with _model_lock:
+            if _model is None:
+                try:
+                    _model = RecommenderModel.load(MODEL_PATH)
+                except Exception as e:
+                    print(f"[recommender] Failed to load {MODEL_PATH}: {e}")
+    return _model
+
+
+def refresh() -> RecommenderModel:
+    """Retrain from the database, save, and start serving the new model."""
+    global _model
+    started = time.perf_counter()
+    model = train_from_database()
+    model.save(MODEL_PATH)
+    with _model_lock:
+        _model = model
+    print(f"[recommender] Trained {len(model.user_ids)} users x {len(model.movie_ids)} movies "
+          f"in {time.perf_counter() - started:.1f}s ({model.nbytes / 1e6:.1f} MB)")
+    return model
+
+
+def _refresh_if_stale() -> None:
+    """
+    Retrain if TRAIN is set and the saved model is missing or older than
+    REFRESH_SECONDS, else load it. Workers take MODEL_PATH.lock first, so one
+    of them trains while the others wait and then load what it saved.
+    """
+    with file_lock.exclusive(MODEL_PATH + ".lock"):
+        age = time.time() - os.path.getmtime(MODEL_PATH) if os.path.exists(MODEL_PATH) else None
+        if TRAIN and (age is None or age >= REFRESH_SECONDS):
+            refresh()
+        elif age is not None:
+            _reload_if_newer()
+
+
+def _reload_if_newer() -> None:
+    """Pick up a model another worker (or the CLI) saved since ours was loaded."""
+    global _model
+    model = RecommenderModel.load(MODEL_PATH)
+    with _model_lock:
+        if _model is None or model.trained_at > _model.trained_at:
+            _model = model
+
+
+async def refresh_periodically() -> None:
+    """
+    Background task started by main.py. With TRAIN, retrains once the saved
+    model is older than REFRESH_SECONDS; otherwise just serves the saved one,
+    so several gunicorn workers share one training run through MODEL_PATH.
+    """
+    if REFRESH_SECONDS <= 0:
+        return
+    while True:
+        try:
+            await asyncio.to_thread(_refresh_if_stale)
+        except Exception as e:
+            print(f"[recommender] Background refresh failed: {e}")
+        await asyncio.sleep(min(REFRESH_SECONDS, 15 * 60))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "train":
+        print("Usage: python recommender.py train")
+        sys.exit(1)
+    refresh()
+    print(f"✅ Model saved to {MODEL_PATH}")
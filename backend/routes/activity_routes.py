@@ -0,0 +1,82 @@
+# routes/activity_routes.py
+import asyncio
+import traceback
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+
+from auth import get_current_user
+from cursors import encode_cursor, decode_cursor
+import activity_feed
+
+router = APIRouter(prefix="/api/feed", tags=["feed"])
+
+
+class ActivityEvent(BaseModel):
+    id: int
+    actor_user_id: str
+    actor_handle: Optional[str] = None
+    verb: str
+    tmdb_id: Optional[int] = None
+    group_id: Optional[str] = None
+    value: Optional[int] = None
+    created_at: str
+
+
+class ActivityFeedResponse(BaseModel):
+    events: List[ActivityEvent]
+    next_cursor: Optional[str] = None
+
+
+def _event_from_row(row: Dict[str, Any]) -> ActivityEvent:
+    actor = row.get("actor") or {}
+    return ActivityEvent(
+        id=row["id"],
+        actor_user_id=row["actor_user_id"],
+        actor_handle=actor.get("handle"),
+        verb=row["verb"],
+        tmdb_id=row.get("tmdb_id"),
+        group_id=row.get("group_id"),
+        value=row.get("value"),
+        created_at=row["created_at"],
+    )
+
+
+@router.get("", response_model=ActivityFeedResponse)
+async def get_feed(
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=100, description="Number of events per page"),
+    current_user=Depends(get_current_user)
+):
+    """
+    What the users who have the caller on a friend list have been doing,
+    newest first, as far as their privacy settings share it: ratings, new
+    favourites and group activity. Each page is one keyset read of the
+    caller's timeline (see activity_feed.py), keyed on the event id.
+    """
+    before = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+            if len(after) != 1 or not isinstance(after[0], int):
+                raise ValueError(f"Invalid cursor: {cursor!r}")
+            before = after[0]
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        user_id_str = str(current_user.id)
+        # One extra row tells us whether there is a next page
+        rows = await asyncio.to_thread(activity_feed.read_page, user_id_str, before, limit + 1)
+        page = rows[:limit]
+        next_cursor = encode_cursor([page[-1]["id"]]) if len(rows) > limit else None
+        return ActivityFeedResponse(events=[_event_from_row(r) for r in page], next_cursor=next_cursor)
+
+    except Exception as e:
+        print(f"Error in get_feed: {str(e)}")
+        print(f"Full traceback: {traceback.format_exc()}")
+        raise HTTPException(
+            status_code=500,
+            detail={"error": str(e), "message": "An error occurred while getting the activity feed."}
+        )
@@ -0,0 +1,162 @@
+import asyncio
+import os
+import re
+import traceback
+from typing import List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import BaseModel, Field
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Scope
+
+from auth import get_current_user, BATCH_USER_STATE
+import movie_json
+
+router = APIRouter(prefix="/api/batch", tags=["batch"])
+
+MAX_BATCH_REQUESTS = 20
+ITEM_TIMEOUT_SECONDS = float(os.getenv("BATCH_ITEM_TIMEOUT_SECONDS") or 10)
+
+# The JSON read routes a batch may call. Everything else (streams such as the
+# account export or group events, the batch itself) is refused up front.
+BATCHABLE_PATHS = [re.compile(p) for p in (
+    r"/health",
+    r"/search/movies",
+    r"/trending",
+    r"/movies/\d+(/similar)?",
+    r"/api/profile(/[^/]+)?",
+    r"/api/privacy(/blocklist)?",
+    r"/api/friends",
+    r"/api/feed",
+    r"/api/recommendations",
+    r"/api/favourite_movies/[^/]+(/\d+)?",
+    r"/api/ratings/[^/]+(/\d+)?",
+    r"/api/groups(/[^/]+(/(members|top-genre|overview|recommendations|requests))?)?",
+)]
+
+
+class BatchItem(BaseModel):
+    path: str = Field(..., description="Path and query string of a GET route, e.g. /api/ratings/<id>?limit=50")
+    id: Optional[str] = Field(None, description="Echoed back so the client can match results")
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem] = Field(..., min_length=1, max_length=MAX_BATCH_REQUESTS)
+
+
+def _sub_scope(request: Request, path: str, user) -> Scope:
+    """An ASGI scope for GET path, carrying the batch's credentials and already-authenticated user."""
+    url = urlsplit(path)
+    headers = [(b"accept", b"application/json")]
+    for name in (b"authorization", b"host"):
+        value = request.headers.get(name.decode())
+        if value is not None:
+            headers.append((name, value.encode("latin-1")))
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": request.url.scheme,
+        "server": request.scope.get("server"),
+        "client": request.scope.get("client"),
+        "root_path": request.scope.get("root_path", ""),
+        "path": unquote(url.path),
+        "raw_path": url.path.encode(),
+        "query_string": url.query.encode(),
+        "headers": headers,
+        "state": {BATCH_USER_STATE: user},
+    }
+
+
+class _StreamingResponse(Exception):
+    """A sub-request answered with a body of unknown length; batches only carry whole JSON bodies."""
+
+
+def is_batchable(path: str) -> bool:
+    if not path.startswith("/") or path.startswith("//"):
+        return False
+    return any(p.fullmatch(unquote(urlsplit(path).path)) for p in BATCHABLE_PATHS)
+
+
+async def _call(app: ASGIApp, scope: Scope) -> Tuple[int, Headers, bytes]:
+    """Run one request through the app and collect its response."""
+    status, raw_headers, chunks = 500, [], []
+    sent = False
+    never = asyncio.Event()
+
+    async def receive() -> Message:
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await never.wait()  # the client never disconnects
+        return {"type": "http.disconnect"}
+
+    async def send(message: Message) -> None:
+        nonlocal status, raw_headers
+        if message["type"] == "http.response.start":
+            status, raw_headers = message["status"], message["headers"]
+            if status not in (204, 304) and "content-length" not in Headers(raw=raw_headers):
+                raise _StreamingResponse(scope["path"])
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, Headers(raw=raw_headers), b"".join(chunks)
+
+
+async def _run(app: ASGIApp, scope: Scope) -> Tuple[int, Headers, bytes]:
+    # The route handlers call the Supabase client synchronously, so on one
+    # event loop they would run one after another. Each sub-request gets its
+    # own thread and loop instead, which lets their database calls overlap.
+    # The timeout runs on that loop, so a slow item is cancelled there and
+    # gives its thread back instead of only being abandoned.
+    async def call_with_timeout() -> Tuple[int, Headers, bytes]:
+        return await asyncio.wait_for(_call(app, scope), ITEM_TIMEOUT_SECONDS)
+
+    try:
+        return await asyncio.to_thread(asyncio.run, call_with_timeout())
+    except asyncio.TimeoutError:
+        print(f"Batch sub-request {scope['path']} timed out after {ITEM_TIMEOUT_SECONDS}s")
+        return 504, Headers(), movie_json.dumps({"detail": "Sub-request timed out"})
+    except _StreamingResponse:
+        return 400, Headers(), movie_json.dumps({"detail": "Streaming responses cannot be batched"})
+    except Exception as e:
+        print(f"Error in batch sub-request {scope['path']}: {str(e)}")
+        print(f"Full traceback: {traceback.format_exc()}")
+        return 500, Headers(), movie_json.dumps({"detail": "Internal Server Error"})
+
+
+def _item_body(item: BatchItem, status: int, headers: Headers, body: bytes) -> bytes:
+    """One result of the batch: {"id", "status", "body"}, with a JSON body spliced in as-is."""
+    if not body:
+        encoded = b"null"
+    elif headers.get("content-type", "").startswith("application/json"):
+        encoded = body
+    else:
+        encoded = movie_json.dumps(body.decode("utf-8", "replace"))
+    head = movie_json.dumps({"id": item.id, "status": status, "etag": headers.get("etag")})
+    return head[:-1] + b',"body":' + encoded + b"}"
+
+
+@router.post("")
+async def batch(payload: BatchRequest, request: Request, current_user=Depends(get_current_user)):
+    """
+    Run several GET requests to JSON read routes (BATCHABLE_PATHS) in one
+    round-trip. The caller is authenticated once, for the whole batch; the
+    sub-requests run concurrently and each result carries its own status, so
+    one failing item does not fail the rest. An item slower than
+    ITEM_TIMEOUT_SECONDS gets a 504.
+    Returns {"responses": [{"id", "status", "etag", "body"}, ...]} in request order.
+    """
+    for item in payload.requests:
+        if not is_batchable(item.path):
+            raise HTTPException(status_code=400, detail=f"Invalid batch path: {item.path}")
+
+    results = await asyncio.gather(*(
+        _run(request.app, _sub_scope(request, item.path, current_user)) for item in payload.requests
+    ))
+    items = [_item_body(item, *result) for item, result in zip(payload.requests, results)]
+    return movie_json.JSONBytesResponse(b'{"responses":[' + b",".join(items) + b"]}")
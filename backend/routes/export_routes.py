@@ -0,0 +1,54 @@
+# routes/export_routes.py
+import asyncio
+import itertools
+import traceback
+from typing import Iterator, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from auth import get_current_user
+import account_export
+
+router = APIRouter(prefix="/api/export", tags=["export"])
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _guarded(chunks: Iterator[bytes], fmt: str, user_id: str) -> Iterator[bytes]:
+    """Headers are already sent once streaming starts, so a failure is reported as a final error row."""
+    try:
+        yield from chunks
+    except Exception as e:
+        print(f"Error in export for {user_id}: {str(e)}")
+        print(f"Full traceback: {traceback.format_exc()}")
+        yield b'{"type": "error", "message": "Export interrupted"}\n' if fmt == "ndjson" else b"error\n"
+
+
+@router.get("")
+async def export_account(
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="ndjson or csv"),
+    current_user=Depends(get_current_user)
+):
+    """
+    Stream everything stored for the current user: ratings, favourites, group
+    memberships and blocked users (see account_export.py for the layout).
+    """
+    user_id_str = str(current_user.id)
+    chunks = account_export.iter_ndjson(user_id_str) if format == "ndjson" else account_export.iter_csv(user_id_str)
+    try:
+        # Read the first chunk up front so a broken database still gets a proper 500
+        first = await asyncio.to_thread(next, chunks, b"")
+    except Exception as e:
+        print(f"Error in export_account: {str(e)}")
+        print(f"Full traceback: {traceback.format_exc()}")
+        raise HTTPException(
+            status_code=500,
+            detail={"error": str(e), "message": "An error occurred while exporting your data."}
+        )
+
+    return StreamingResponse(
+        _guarded(itertools.chain([first], chunks), format, user_id_str),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="movielily-export.{format}"'},
+    )
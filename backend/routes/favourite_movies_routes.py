@@ -1,16 +1,63 @@
-from fastapi import APIRouter, HTTPException, Body
+import asyncio
+from typing import Any, Dict, List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Body
+from pydantic import BaseModel, Field, model_validator
+from auth import get_optional_user
 from config import supabase_admin
+import activity_feed
+import group_genre_stats
+import group_recommendations
+import privacy_policy
 import traceback
 
 router = APIRouter(tags=["favourite_movies"])
 
+class FavouriteOp(BaseModel):
+    op: Literal["add", "remove", "move"]
+    movie_id: int
+    # 1-based; "add" appends when omitted, "move" requires it
+    position: Optional[int] = Field(None, ge=1)
+
+    @model_validator(mode="after")
+    def _move_needs_position(self):
+        if self.op == "move" and self.position is None:
+            raise ValueError("move needs a position")
+        return self
+
+class FavouriteOpsPayload(BaseModel):
+    ops: List[FavouriteOp] = Field(..., min_length=1, max_length=500)
+
+def _apply_favourite_ops(user_id: str, ops: List[Dict[str, Any]]) -> List[int]:
+    """
+    Apply ops in one database call (apply_favourite_ops in database.sql), keep
+    the group genre stats in step and return the resulting movie ids in rank order.
+    """
+    result = supabase_admin.rpc("apply_favourite_ops", {"p_user_id": user_id, "p_ops": ops}).execute()
+    before, after = result.data["before"], result.data["after"]
+
+    # Anything whose rank changed is the old row removed and the new row added
+    old_ranks = {row["movie_id"]: row.get("rank") for row in before}
+    new_ranks = {row["movie_id"]: row["rank"] for row in after}
+    removed = [row for row in before if new_ranks.get(row["movie_id"], -1) != row.get("rank")]
+    added = [row for row in after if old_ranks.get(row["movie_id"], -1) != row["rank"]]
+    if added or removed:
+        group_genre_stats.record_favourite_changes(user_id, added=added, removed=removed)
+        group_recommendations.invalidate_user(user_id)
+    # Moves are not news; only movies that were not favourites before are
+    new_ids = [row["movie_id"] for row in after if row["movie_id"] not in old_ranks]
+    for movie_id in new_ids[:activity_feed.MAX_EVENTS_PER_CHANGE]:
+        activity_feed.record(user_id, activity_feed.FAVOURITED, tmdb_id=movie_id)
+    return [row["movie_id"] for row in after]
+
 # --GET--
 @router.get("/api/favourite_movies/{user_id}")
-async def get_favourite_movies_by_user_id(user_id: str):
+async def get_favourite_movies_by_user_id(user_id: str, viewer=Depends(get_optional_user)):
     """
     Get a user's favourite movies using their user id
     """
     try:
+        if not await asyncio.to_thread(privacy_policy.can_view, viewer.id if viewer else None, user_id, privacy_policy.FAVOURITES):
+            raise HTTPException(status_code=403, detail="This user's favourites are private.")
         result = supabase_admin.table("favourite_movies").select("movie_id").eq("user_id", user_id).order("rank", desc=False).execute()
         
         if result.data:
@@ -18,20 +65,24 @@ async def get_favourite_movies_by_user_id(user_id: str):
             return movie_ids
         return [-1]
     
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in get_favourite_movies_by_user_id: {str(e)}")
         print(f"Full traceback: {traceback.format_exc()}")
         raise HTTPException(
-            status_code=404,
+            status_code=500,
             detail={"error": str(e), "message": "An error occurred while fetching a user's favourite movies."}
         )
 
 @router.get("/api/favourite_movies/{user_id}/{movie_id}")
-async def is_movie_favourite(user_id: str, movie_id: int):
+async def is_movie_favourite(user_id: str, movie_id: int, viewer=Depends(get_optional_user)):
     """
     Check if a user has favourited a specific movie
     """
     try:
+        if not await asyncio.to_thread(privacy_policy.can_view, viewer.id if viewer else None, user_id, privacy_policy.FAVOURITES):
+            raise HTTPException(status_code=403, detail="This user's favourites are private.")
         result = (
             supabase_admin
             .table("favourite_movies")
@@ -43,15 +94,37 @@ async def is_movie_favourite(user_id: str, movie_id: int):
 
         return bool(result.data and len(result.data) > 0)
     
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in is_movie_favourite: {str(e)}")
         print(f"Full traceback: {traceback.format_exc()}")
         raise HTTPException(
-            status_code=404,
+            status_code=500,
             detail={"error": str(e), "message": "An error occurred while fetching a user's favourite movies."}
         )
 
 # -- POST --
+# Declared before POST /{user_id}/{movie_id} so "batch" is not taken for a movie_id
+@router.post("/api/favourite_movies/{user_id}/batch")
+async def apply_favourite_movie_ops(user_id: str, payload: FavouriteOpsPayload):
+    """
+    Apply a list of add / remove / move operations to a user's favourites in
+    one database operation. Ops run in order; ranks come out as 1..n.
+    Returns the resulting list of movie ids in rank order.
+    """
+    try:
+        movie_ids = _apply_favourite_ops(user_id, [op.model_dump(exclude_none=True) for op in payload.ops])
+        return {"message": "Favourite movies updated successfully", "user": user_id, "movie_ids": movie_ids}
+
+    except Exception as e:
+        print(f"Error in apply_favourite_movie_ops: {str(e)}")
+        print(f"Full traceback: {traceback.format_exc()}")
+        raise HTTPException(
+            status_code=400,
+            detail={"error": str(e), "message": "An error occurred while updating favourite movies."}
+        )
+
 @router.post("/api/favourite_movies/{user_id}/{movie_id}")
 async def add_favourite_movie(user_id: str, movie_id: int):
     """
@@ -64,6 +137,9 @@ async def add_favourite_movie(user_id: str, movie_id: int):
         }).execute()
 
         if result.data:
+            group_genre_stats.record_favourite_changes(user_id, added=result.data)
+            group_recommendations.invalidate_user(user_id)
+            activity_feed.record(user_id, activity_feed.FAVOURITED, tmdb_id=movie_id)
             return {"message": "New favourite movie added successfully", "user": user_id, "movie": movie_id}
         
     except Exception as e:
@@ -81,23 +157,12 @@ async def reorder_favourite_movies(user_id: str, movie_ids: list[int] = Body(...
     The first movie in the array will have rank 1, second rank 2, etc.
     """
     try:
-        # Add temporary offset to avoid unique constraint conflicts
-        temp_offset = 1000
-        for idx, movie_id in enumerate(movie_ids):
-            # Step 1: assign temporary rank
-            supabase_admin.table("favourite_movies")\
-                .update({"rank": idx + 1 + temp_offset})\
-                .eq("user_id", user_id)\
-                .eq("movie_id", movie_id)\
-                .execute()
-
-        # Step 2: remove the offset to finalize ranks
-        for idx, movie_id in enumerate(movie_ids):
-            supabase_admin.table("favourite_movies")\
-                .update({"rank": idx + 1})\
-                .eq("user_id", user_id)\
-                .eq("movie_id", movie_id)\
-                .execute()
+        # Moving each movie to the front, last one first, reproduces the list
+        # in one database call (ids that aren't favourites are skipped)
+        _apply_favourite_ops(user_id, [
+            {"op": "move", "movie_id": movie_id, "position": 1}
+            for movie_id in reversed(movie_ids)
+        ])
 
         return {"message": "Favourites reordered successfully", "user": user_id}
 
@@ -123,6 +188,8 @@ async def remove_favourite_movie(user_id: str, movie_id: int):
             .execute()
 
         if result.data:
+            group_genre_stats.record_favourite_changes(user_id, removed=result.data)
+            group_recommendations.invalidate_user(user_id)
             return {"message": "Favourite movie removed successfully", "user": user_id, "movie": movie_id}
         
     except Exception as e:
@@ -3,6 +3,7 @@ import traceback
 
 from auth import get_current_user
 from config import supabase_admin
+import privacy_policy
 
 router = APIRouter()
 
@@ -116,6 +117,8 @@ async def add_friend(friend_email: str, current_user=Depends(get_current_user)):
             })
             .execute()
         )
+        # friends may see more of the owner's profile
+        privacy_policy.invalidate(owner_user_id)
 
         return {"friend_list_id": friend_list_id, "added": insert_result.data}
     except HTTPException:
@@ -1,14 +1,23 @@
 # groups_routes.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+import asyncio
 import traceback
 import logging
+import uuid
 
 # Import dependencies from our modular files
-from auth import get_current_user
+from auth import get_current_user, BATCH_USER_STATE
 from config import supabase_admin
+from group_genre_stats import GenreStats, read_group_stats, record_membership_change
+import activity_feed
+import group_recommendations
+import group_events
+from cursors import encode_cursor, decode_cursor
+from routes.tmdb_routes import MovieOut, transform_db_movie
 
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime, timezone
 
 class CreateGroupRequest(BaseModel):
@@ -32,8 +41,53 @@ class GroupMemberResponse(BaseModel):
 class AddMemberRequest(BaseModel):
     user_id: str
 
+class GroupRecommendationsResponse(BaseModel):
+    group_id: str
+    top_genre: Optional[str] = None
+    movies: List[MovieOut]
+    next_cursor: Optional[str] = None
+
+class MovieRequestIn(BaseModel):
+    tmdb_id: int
+
+class RequestVote(BaseModel):
+    tmdb_id: int
+    vote: bool = True  # false withdraws the vote
+
+# Votes accepted per batch
+MAX_REQUEST_VOTES = 50
+
+class RequestVotesIn(BaseModel):
+    votes: List[RequestVote] = Field(..., min_length=1, max_length=MAX_REQUEST_VOTES)
+
+class GroupMovieRequestResponse(BaseModel):
+    tmdb_id: int
+    movie: Optional[MovieOut] = None
+    requested_by_user_id: Optional[str] = None
+    requested_at: str
+    vote_count: int
+    voted: bool  # whether the current user voted for it
+
+class GroupRequestQueueResponse(BaseModel):
+    group_id: str
+    requests: List[GroupMovieRequestResponse]
+    next_cursor: Optional[str] = None
+
 router = APIRouter()
 
+# Columns used whenever we list a group's members (email merged from profiles)
+MEMBER_COLUMNS = "user_id, group_id, is_admin, joined_at, user_email, profiles(email)"
+
+def _member_from_row(member: Dict[str, Any]) -> GroupMemberResponse:
+    """Build a GroupMemberResponse, falling back to the profile email if user_email is not set."""
+    return GroupMemberResponse(
+        user_id=member["user_id"],
+        group_id=member["group_id"],
+        is_admin=member["is_admin"],
+        joined_at=member["joined_at"],
+        user_email=member.get("user_email") or (member.get("profiles", {}).get("email") if member.get("profiles") else None),
+    )
+
 @router.post("/api/groups", response_model=GroupResponse)
 async def create_group(
     payload: CreateGroupRequest, 
@@ -80,6 +134,10 @@ async def create_group(
             supabase_admin.table("groups").delete().eq("id", group_id).execute()
             raise Exception("Failed to add creator as group member.")
         
+        record_membership_change(group_id, user_id_str, joined=True)
+        group_recommendations.invalidate_group(group_id)
+        activity_feed.record(user_id_str, activity_feed.CREATED_GROUP, group_id=group_id)
+
         print(f"Group created successfully with ID: {group_id}")
         return GroupResponse(**group)
         
@@ -150,24 +208,13 @@ async def get_group_members(
             )
         
         # Get all members of the group with their email from profiles
-        result = supabase_admin.table("group_members").select(
-            "user_id, group_id, is_admin, joined_at, user_email, profiles(email)"
-        ).eq("group_id", group_id).execute()
+        result = supabase_admin.table("group_members").select(MEMBER_COLUMNS).eq("group_id", group_id).execute()
         
         if not result.data:
             return []
         
         # Merge email from profiles table if user_email is not set
-        members = []
-        for member in result.data:
-            member_data = {
-                "user_id": member["user_id"],
-                "group_id": member["group_id"],
-                "is_admin": member["is_admin"],
-                "joined_at": member["joined_at"],
-                "user_email": member.get("user_email") or (member.get("profiles", {}).get("email") if member.get("profiles") else None)
-            }
-            members.append(GroupMemberResponse(**member_data))
+        members = [_member_from_row(member) for member in result.data]
         
         print(f"Found {len(members)} members in group {group_id}")
         return members
@@ -266,6 +313,18 @@ async def add_group_member(
         if not result.data:
             raise Exception("Failed to add member to group.")
         
+        record_membership_change(group_id, payload.user_id, joined=True)
+        group_recommendations.invalidate_group(group_id)
+        member = result.data[0]
+        group_events.publish(group_id, group_events.MEMBER_JOINED, {
+            "user_id": member.get("user_id"),
+            "is_admin": member.get("is_admin", False),
+            "joined_at": member.get("joined_at"),
+            "user_email": member.get("user_email"),
+            "added_by": user_id_str,
+        })
+        activity_feed.record(payload.user_id, activity_feed.JOINED_GROUP, group_id=group_id)
+
         print(f"Successfully added member {payload.user_id} to group {group_id}")
         return {"message": "Member added successfully", "member": result.data[0]}
         
@@ -324,9 +383,10 @@ async def update_group(
         if not result.data:
             raise HTTPException(status_code=404, detail="Group not found.")
 
-        updated_group = result.data[0]
+        updated_group = GroupResponse(**result.data[0])
+        group_events.publish(group_id, group_events.GROUP_UPDATED, {**updated_group.model_dump(), "updated_by": user_id_str})
         print(f"Group {group_id} updated successfully.")
-        return GroupResponse(**updated_group)
+        return updated_group
 
     except HTTPException:
         raise
@@ -338,10 +398,83 @@ async def update_group(
             detail={"error": str(e), "message": "An error occurred while updating the group."}
         )
 
+@router.get("/api/groups/{group_id}/events")
+async def group_events_stream(
+    group_id: str,
+    request: Request,
+    current_user=Depends(get_current_user)
+):
+    """
+    Server-sent events for a group page: member_joined, group_updated,
+    movie_requested and request_votes as they happen (see group_events.py).
+    Only accessible by group members.
+    """
+    if getattr(request.state, BATCH_USER_STATE, None) is not None:
+        raise HTTPException(status_code=400, detail="Event streams cannot be part of a batch.")
+    try:
+        user_id_str = str(current_user.id)
+        membership_check = await asyncio.to_thread(
+            lambda: supabase_admin.table("group_members").select("user_id").eq(
+                "group_id", group_id
+            ).eq("user_id", user_id_str).execute()
+        )
+    except Exception as e:
+        print(f"Error in group_events_stream: {str(e)}")
+        print(f"Full traceback: {traceback.format_exc()}")
+        raise HTTPException(
+            status_code=500,
+            detail={"error": str(e), "message": "An error occurred while opening the group event stream."}
+        )
+    if not membership_check.data:
+        raise HTTPException(
+            status_code=403,
+            detail="You are not a member of this group."
+        )
+
+    return StreamingResponse(
+        group_events.stream(group_events.subscribe(group_id)),
+        media_type="text/event-stream",
+        # X-Accel-Buffering: stop nginx-style proxies from holding events back
+        headers={"Cache-Control": "no-cache, no-store", "X-Accel-Buffering": "no"},
+    )
+
+def _empty_top_genre(group_id: str) -> Dict[str, Any]:
+    return {"group_id": group_id, "top_genre": None, "reason": None, "breakdown": []}
+
+def _top_genre_from_stats(group_id: str, stats: GenreStats) -> Dict[str, Any]:
+    """
+    Rank a group's genre aggregates (see group_genre_stats.py).
+    See group_top_genre for the ranking rules and response shape.
+    """
+    if not stats:
+        return _empty_top_genre(group_id)
+
+    # compute avg_rank and choose winner
+    breakdown: List[Dict[str, Any]] = []
+    for g, s in stats.items():
+        avg_rank: Optional[float] = s["rank_sum"] / s["rank_count"] if s["rank_count"] else None
+        breakdown.append({"genre": g, "count": s["fav_count"], "avg_rank": avg_rank})
+
+    # sort: highest count desc, then lowest avg_rank asc (None treated as large), then genre asc
+    def sort_key(item: Dict[str, Any]):
+        avg = item["avg_rank"]
+        avg_key = avg if avg is not None else 1e9
+        return (-item["count"], avg_key, item["genre"] or "")
+
+    breakdown.sort(key=sort_key)
+    top = breakdown[0]
+    return {
+        "group_id": group_id,
+        "top_genre": top["genre"],
+        "reason": {"count": top["count"], "avg_rank": top["avg_rank"]},
+        "breakdown": breakdown,
+    }
+
 @router.get("/api/groups/{group_id}/top-genre")
 def group_top_genre(group_id: str, current_user=Depends(get_current_user)):
     """
     Compute the most 'liked' genre for a group.
+    Reads the aggregates kept by group_genre_stats.py instead of scanning favourites.
 
     Rules:
       1) Count how many favourites each genre has across the group.
@@ -372,75 +505,389 @@ def group_top_genre(group_id: str, current_user=Depends(get_current_user)):
     if not mem_check.data:
         raise HTTPException(status_code=403, detail="You are not a member of this group.")
 
-    # 1) all member user_ids
-    members_res = (
-        supabase_admin.table("group_members")
-        .select("user_id")
-        .eq("group_id", group_id)
-        .execute()
-    )
-    user_ids = [m["user_id"] for m in (members_res.data or [])]
-    if not user_ids:
-        return {"group_id": group_id, "top_genre": None, "reason": None, "breakdown": []}
-
-    # 2) all favourites for those users (NOTE: table name is 'favourite_movies')
-    favs_res = (
-        supabase_admin.table("favourite_movies")
-        .select("user_id,movie_id,rank")
-        .in_("user_id", user_ids)
-        .order("rank", desc=False)  # lowest rank is best
-        .execute()
-    )
-    favs = favs_res.data or []
-    if not favs:
-        return {"group_id": group_id, "top_genre": None, "reason": None, "breakdown": []}
-
-    # 3) movie metadata for those tmdb ids
-    tmdb_ids = sorted({row["movie_id"] for row in favs})
-    movies_res = (
-        supabase_admin.table("movies")
-        .select("tmdb_id,genre")
-        .in_("tmdb_id", tmdb_ids)
-        .execute()
+    # 1) the group's genre aggregates are maintained incrementally; one keyed read
+    return _top_genre_from_stats(group_id, read_group_stats(group_id))
+
+
+# Sections that /overview can return; all of them by default
+OVERVIEW_FIELDS = ("details", "members", "top_genre")
+
+@router.get("/api/groups/{group_id}/overview")
+async def get_group_overview(
+    group_id: str,
+    include: Optional[str] = Query(None, description="Comma-separated subset of: details, members, top_genre"),
+    current_user=Depends(get_current_user)
+):
+    """
+    Everything a group page needs in one call: group details, members and top genre.
+
+    The member list doubles as the membership check, then the group row and the
+    group's genre aggregates are fetched concurrently: 2 database round-trips
+    instead of one request per section.
+    """
+    if include:
+        fields = {f.strip() for f in include.split(",") if f.strip()}
+        unknown = fields - set(OVERVIEW_FIELDS)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown include field(s): {', '.join(sorted(unknown))}. Allowed: {', '.join(OVERVIEW_FIELDS)}"
+            )
+    else:
+        fields = set(OVERVIEW_FIELDS)
+
+    try:
+        user_id_str = str(current_user.id)
+        print(f"Getting overview ({', '.join(sorted(fields))}) for group {group_id} by user {user_id_str}")
+
+        # 1) all members; the current user must be one of them
+        members_res = await asyncio.to_thread(
+            lambda: supabase_admin.table("group_members").select(MEMBER_COLUMNS).eq("group_id", group_id).execute()
+        )
+        member_rows = members_res.data or []
+        if not any(m["user_id"] == user_id_str for m in member_rows):
+            raise HTTPException(
+                status_code=403,
+                detail="You are not a member of this group."
+            )
+
+        # 2) independent queries run concurrently
+        def load_details():
+            result = supabase_admin.table("groups").select("*").eq("id", group_id).execute()
+            if not result.data:
+                raise HTTPException(status_code=404, detail="Group not found.")
+            return GroupResponse(**result.data[0])
+
+        def load_top_genre():
+            return _top_genre_from_stats(group_id, read_group_stats(group_id))
+
+        loaders = {"details": load_details, "top_genre": load_top_genre}
+        names = [name for name in OVERVIEW_FIELDS if name in fields and name in loaders]
+        results = await asyncio.gather(*(asyncio.to_thread(loaders[name]) for name in names))
+
+        overview: Dict[str, Any] = {"group_id": group_id}
+        overview.update(zip(names, results))
+        if "members" in fields:
+            overview["members"] = [_member_from_row(m) for m in member_rows]
+        return overview
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in get_group_overview: {str(e)}")
+        print(f"Full traceback: {traceback.format_exc()}")
+        raise HTTPException(
+            status_code=500,
+            detail={"error": str(e), "message": "An error occurred while getting the group overview."}
+        )
+
+@router.get("/api/groups/{group_id}/recommendations", response_model=GroupRecommendationsResponse)
+async def get_group_recommendations(
+    group_id: str,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=100, description="Number of movies per page"),
+    current_user=Depends(get_current_user)
+):
+    """
+    Movies for the group to watch, ranked by the group's genre profile and
+    excluding anything a member already favourited or rated.
+    See group_recommendations.py for the scoring and caching.
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+            if (
+                len(after) != 2
+                or isinstance(after[0], bool) or not isinstance(after[0], (int, float))
+                or isinstance(after[1], bool) or not isinstance(after[1], int)
+            ):
+                raise ValueError(f"Invalid cursor: {cursor!r}")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        user_id_str = str(current_user.id)
+        print(f"Getting recommendations for group {group_id} by user {user_id_str}")
+
+        # Member ids double as the membership check
+        members_res = await asyncio.to_thread(
+            lambda: supabase_admin.table("group_members").select("user_id").eq("group_id", group_id).execute()
+        )
+        member_ids = [m["user_id"] for m in (members_res.data or [])]
+        if user_id_str not in member_ids:
+            raise HTTPException(
+                status_code=403,
+                detail="You are not a member of this group."
+            )
+
+        recs = await asyncio.to_thread(group_recommendations.get_recommendations, group_id, member_ids)
+        page, next_key = group_recommendations.page_after(recs["ranked"], after, limit)
+
+        return GroupRecommendationsResponse(
+            group_id=group_id,
+            top_genre=_top_genre_from_stats(group_id, recs["stats"])["top_genre"],
+            movies=[transform_db_movie(m) for _, m in page],
+            next_cursor=encode_cursor(next_key) if next_key else None,
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in get_group_recommendations: {str(e)}")
+        print(f"Full traceback: {traceback.format_exc()}")
+        raise HTTPException(
+            status_code=500,
+            detail={"error": str(e), "message": "An error occurred while getting group recommendations."}
+        )
+
+# The ranked watch queue: each request with its movie, vote aggregate and
+# (through the filtered my_vote embed) whether the current user voted
+QUEUE_COLUMNS = "movie_id, requested_by_user_id, requested_at, vote_count, movies(*), my_vote:group_movie_request_votes(user_id)"
+
+def _membership(group_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+    """The user's group_members row ({"is_admin"}), or None if not a member."""
+    res = supabase_admin.table("group_members").select("is_admin").eq(
+        "group_id", group_id
+    ).eq("user_id", user_id).execute()
+    return res.data[0] if res.data else None
+
+def _request_from_row(row: Dict[str, Any]) -> GroupMovieRequestResponse:
+    movie = row.get("movies")
+    return GroupMovieRequestResponse(
+        tmdb_id=movie["tmdb_id"] if movie else 0,
+        movie=transform_db_movie(movie) if movie else None,
+        requested_by_user_id=row.get("requested_by_user_id"),
+        requested_at=row["requested_at"],
+        vote_count=row.get("vote_count") or 0,
+        voted=bool(row.get("my_vote")),
     )
-    movies = {m["tmdb_id"]: (m.get("genre") or "").strip() for m in (movies_res.data or [])}
-
-    # 4) aggregate per-genre
-    stats: Dict[str, Dict[str, Any]] = {}
-    for row in favs:
-        mid = row["movie_id"]
-        genre = movies.get(mid, "")
-        if not genre:
-            continue
-        if genre not in stats:
-            stats[genre] = {"count": 0, "ranks": []}
-        stats[genre]["count"] += 1
-        # rank may be null; only include numeric ranks
-        rnk = row.get("rank")
-        if isinstance(rnk, (int, float)):
-            stats[genre]["ranks"].append(float(rnk))
 
-    if not stats:
-        return {"group_id": group_id, "top_genre": None, "reason": None, "breakdown": []}
+@router.get("/api/groups/{group_id}/requests", response_model=GroupRequestQueueResponse)
+async def get_group_requests(
+    group_id: str,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=100, description="Number of requests per page"),
+    current_user=Depends(get_current_user)
+):
+    """
+    The group's watch queue, most votes first (then oldest request first).
+    Movies, vote counts and the caller's own votes come from one query;
+    pages are keyed on (vote_count, requested_at, movie_id).
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+            if len(after) != 3 or not isinstance(after[0], int) or not all(isinstance(v, str) for v in after[1:]):
+                raise ValueError(f"Invalid cursor: {cursor!r}")
+            # Both strings go into the or_ filter below; these parsers refuse anything that could break out of it
+            datetime.fromisoformat(after[1])
+            uuid.UUID(after[2])
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-    # 5) compute avg_rank and choose winner
-    breakdown: List[Dict[str, Any]] = []
-    for g, s in stats.items():
-        ranks = s["ranks"]
-        avg_rank: Optional[float] = sum(ranks) / len(ranks) if ranks else None
-        breakdown.append({"genre": g, "count": s["count"], "avg_rank": avg_rank})
+    try:
+        user_id_str = str(current_user.id)
+        print(f"Getting movie requests for group {group_id} by user {user_id_str}")
 
-    # sort: highest count desc, then lowest avg_rank asc (None treated as large), then genre asc
-    def sort_key(item: Dict[str, Any]):
-        avg = item["avg_rank"]
-        avg_key = avg if avg is not None else 1e9
-        return (-item["count"], avg_key, item["genre"] or "")
+        if await asyncio.to_thread(_membership, group_id, user_id_str) is None:
+            raise HTTPException(
+                status_code=403,
+                detail="You are not a member of this group."
+            )
 
-    breakdown.sort(key=sort_key)
-    top = breakdown[0]
-    return {
-        "group_id": group_id,
-        "top_genre": top["genre"],
-        "reason": {"count": top["count"], "avg_rank": top["avg_rank"]},
-        "breakdown": breakdown,
-    }
\ No newline at end of file
+        query = (
+            supabase_admin
+            .table("group_movie_requests")
+            .select(QUEUE_COLUMNS)
+            .eq("group_id", group_id)
+            .eq("my_vote.user_id", user_id_str)
+        )
+        if after is not None:
+            votes, requested_at, movie_id = after
+            # Strictly after the cursor in (vote_count desc, requested_at, movie_id) order
+            query = query.or_(
+                f'vote_count.lt.{votes},'
+                f'and(vote_count.eq.{votes},requested_at.gt."{requested_at}"),'
+                f'and(vote_count.eq.{votes},requested_at.eq."{requested_at}",movie_id.gt.{movie_id})'
+            )
+        # One extra row tells us whether there is a next page
+        res = await asyncio.to_thread(
+            lambda: query.order("vote_count", desc=True).order("requested_at").order("movie_id").limit(limit + 1).execute()
+        )
+        rows = res.data or []
+        page = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            last = page[-1]
+            next_cursor = encode_cursor([last.get("vote_count") or 0, last["requested_at"], last["movie_id"]])
+
+        return GroupRequestQueueResponse(
+            group_id=group_id,
+            requests=[_request_from_row(r) for r in page],
+            next_cursor=next_cursor,
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in get_group_requests: {str(e)}")
+        print(f"Full traceback: {traceback.format_exc()}")
+        raise HTTPException(
+            status_code=500,
+            detail={"error": str(e), "message": "An error occurred while getting the group's movie requests."}
+        )
+
+@router.post("/api/groups/{group_id}/requests")
+async def add_group_request(
+    group_id: str,
+    payload: MovieRequestIn,
+    current_user=Depends(get_current_user)
+):
+    """
+    Request a movie for the group to watch; the request counts as the
+    requester's vote. Requesting a movie that is already queued adds a vote.
+    Only accessible by group members.
+    """
+    try:
+        user_id_str = str(current_user.id)
+        print(f"Requesting movie {payload.tmdb_id} for group {group_id} by user {user_id_str}")
+
+        if await asyncio.to_thread(_membership, group_id, user_id_str) is None:
+            raise HTTPException(
+                status_code=403,
+                detail="You are not a member of this group."
+            )
+
+        res = await asyncio.to_thread(
+            lambda: supabase_admin.rpc("add_group_movie_request", {
+                "p_group_id": group_id, "p_user_id": user_id_str, "p_tmdb_id": payload.tmdb_id
+            }).execute()
+        )
+        request = res.data
+        if not request:
+            raise HTTPException(status_code=404, detail=f"Movie with ID {payload.tmdb_id} not found")
+
+        if request.get("created"):
+            group_events.publish(group_id, group_events.MOVIE_REQUESTED, request)
+            await asyncio.to_thread(
+                activity_feed.record, user_id_str, activity_feed.REQUESTED_MOVIE, tmdb_id=payload.tmdb_id, group_id=group_id
+            )
+        else:
+            group_events.publish(group_id, group_events.REQUEST_VOTES, {
+                "votes": [{"tmdb_id": request["tmdb_id"], "vote_count": request["vote_count"]}]
+            })
+        return request
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in add_group_request: {str(e)}")
+        print(f"Full traceback: {traceback.format_exc()}")
+        raise HTTPException(
+            status_code=500,
+            detail={"error": str(e), "message": "An error occurred while requesting the movie."}
+        )
+
+@router.post("/api/groups/{group_id}/requests/votes")
+async def vote_group_requests(
+    group_id: str,
+    payload: RequestVotesIn,
+    current_user=Depends(get_current_user)
+):
+    """
+    Cast or withdraw the current user's votes on several queued movies in one
+    call (one transaction). Returns the new vote counts; movies the group has
+    not requested are listed under "not_found". Only accessible by group members.
+    """
+    # One entry per movie; the last one wins
+    votes = {v.tmdb_id: v.vote for v in payload.votes}
+    try:
+        user_id_str = str(current_user.id)
+        print(f"Applying {len(votes)} request vote(s) in group {group_id} by user {user_id_str}")
+
+        if await asyncio.to_thread(_membership, group_id, user_id_str) is None:
+            raise HTTPException(
+                status_code=403,
+                detail="You are not a member of this group."
+            )
+
+        res = await asyncio.to_thread(
+            lambda: supabase_admin.rpc("apply_group_request_votes", {
+                "p_group_id": group_id,
+                "p_user_id": user_id_str,
+                "p_votes": [{"tmdb_id": tmdb_id, "vote": vote} for tmdb_id, vote in votes.items()],
+            }).execute()
+        )
+        results = res.data or []
+        found = {r["tmdb_id"] for r in results}
+
+        if results:
+            group_events.publish(group_id, group_events.REQUEST_VOTES, {
+                "votes": [{"tmdb_id": r["tmdb_id"], "vote_count": r["vote_count"]} for r in results]
+            })
+        return {"votes": results, "not_found": [tmdb_id for tmdb_id in votes if tmdb_id not in found]}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in vote_group_requests: {str(e)}")
+        print(f"Full traceback: {traceback.format_exc()}")
+        raise HTTPException(
+            status_code=500,
+            detail={"error": str(e), "message": "An error occurred while voting on movie requests."}
+        )
+
+@router.delete("/api/groups/{group_id}/requests/{tmdb_id}")
+async def remove_group_request(
+    group_id: str,
+    tmdb_id: int,
+    current_user=Depends(get_current_user)
+):
+    """
+    Take a movie off the group's queue (e.g. once watched), with its votes.
+    Only accessible by the member who requested it or a group admin.
+    """
+    try:
+        user_id_str = str(current_user.id)
+        print(f"Removing request for movie {tmdb_id} from group {group_id} by user {user_id_str}")
+
+        membership = await asyncio.to_thread(_membership, group_id, user_id_str)
+        if membership is None:
+            raise HTTPException(
+                status_code=403,
+                detail="You are not a member of this group."
+            )
+
+        res = await asyncio.to_thread(
+            lambda: supabase_admin.table("group_movie_requests").select(
+                "movie_id, requested_by_user_id, movies!inner(tmdb_id)"
+            ).eq("group_id", group_id).eq("movies.tmdb_id", tmdb_id).execute()
+        )
+        if not res.data:
+            raise HTTPException(status_code=404, detail="This movie has not been requested in this group.")
+        request = res.data[0]
+        if request.get("requested_by_user_id") != user_id_str and not membership.get("is_admin", False):
+            raise HTTPException(
+                status_code=403,
+                detail="Only the member who requested this movie or a group admin can remove it."
+            )
+
+        await asyncio.to_thread(
+            lambda: supabase_admin.table("group_movie_requests").delete().eq(
+                "group_id", group_id
+            ).eq("movie_id", request["movie_id"]).execute()
+        )
+        group_events.publish(group_id, group_events.REQUEST_REMOVED, {"tmdb_id": tmdb_id, "removed_by": user_id_str})
+        return {"message": "Request removed", "tmdb_id": tmdb_id}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in remove_group_request: {str(e)}")
+        print(f"Full traceback: {traceback.format_exc()}")
+        raise HTTPException(
+            status_code=500,
+            detail={"error": str(e), "message": "An error occurred while removing the movie request."}
+        )
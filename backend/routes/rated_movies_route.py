@@ -1,8 +1,23 @@
 
 # routes/rated_movies_route.py
-from fastapi import APIRouter, HTTPException
+import asyncio
+import json
+import tempfile
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field, conint
+from starlette.background import BackgroundTask
+from auth import get_optional_user
 from config import supabase_admin
+from cursors import encode_cursor, decode_cursor
+from etags import compute_etag, etag_matches
+from routes.tmdb_routes import transform_db_movie
+import activity_feed
+import group_recommendations
+import privacy_policy
+import rating_buffer
+import rating_import
 import traceback
 
 router = APIRouter(prefix="/api/ratings", tags=["user_movie_ratings"])
@@ -12,56 +27,173 @@ class RatingPayload(BaseModel):
     rating: conint(ge=1, le=5)  # same as Field(..., ge=1, le=5)
 
 @router.get("/{user_id}")
-async def get_ratings_by_user_id(user_id: str):
+async def get_ratings_by_user_id(
+    user_id: str,
+    request: Request,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200, description="Number of ratings per page"),
+    hydrate: bool = Query(False, description="Embed each rated movie's record"),
+    viewer=Depends(get_optional_user),
+):
     """
-    Return ratings list (possibly empty) sorted by most recent create time.
+    Return a page of ratings (possibly empty), most recently created first.
+    Pages are keyed on (created_at, tmdb_id); pass next_cursor back to continue.
+    With hydrate=true each rating carries its movie, from one batched lookup.
+    Responses carry an ETag; a matching If-None-Match gets an empty 304.
     """
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+            if len(after) != 2 or not isinstance(after[0], str) or not isinstance(after[1], int):
+                raise ValueError(f"Invalid cursor: {cursor!r}")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     try:
-        res = (
+        if not await asyncio.to_thread(privacy_policy.can_view, viewer.id if viewer else None, user_id, privacy_policy.RATINGS):
+            raise HTTPException(status_code=403, detail="This user's ratings are private.")
+        if rating_buffer.ENABLED:
+            # Read-your-writes: pending ratings can't be merged into keyset pages, so write them first
+            await asyncio.to_thread(rating_buffer.flush, user_id)
+        query = (
             supabase_admin
             .table("user_movie_ratings")
             .select("tmdb_id, rating, created_at")
             .eq("user_id", user_id)
-            .order("created_at", desc=True)
-            .execute()
         )
+        if after is not None:
+            created_at, tmdb_id = after
+            # Strictly after the cursor in (created_at desc, tmdb_id desc) order
+            query = query.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",tmdb_id.lt.{tmdb_id})')
+        # One extra row tells us whether there is a next page
+        res = query.order("created_at", desc=True).order("tmdb_id", desc=True).limit(limit + 1).execute()
         # supabase-py returns a PostgrestResponse; .data may be list or None
-        return {"user_id": user_id, "ratings": (res.data or [])}
+        rows = res.data or []
+        ratings = rows[:limit]
+        next_cursor = encode_cursor([ratings[-1]["created_at"], ratings[-1]["tmdb_id"]]) if len(rows) > limit else None
+
+        # The ETag covers the page itself, so an unchanged page skips hydration too
+        etag = compute_etag([ratings, next_cursor, hydrate])
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+
+        if hydrate and ratings:
+            ids = sorted({r["tmdb_id"] for r in ratings})
+            movies = supabase_admin.table("movies").select("*").in_("tmdb_id", ids).execute()
+            by_id = {m["tmdb_id"]: m for m in (movies.data or [])}
+            ratings = [
+                {**r, "movie": transform_db_movie(by_id[r["tmdb_id"]]).model_dump() if r["tmdb_id"] in by_id else None}
+                for r in ratings
+            ]
+
+        return JSONResponse(
+            {"user_id": user_id, "ratings": ratings, "next_cursor": next_cursor},
+            headers=headers,
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         print("Error in get_ratings_by_user_id:", e)
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail={"error": str(e), "message": "Failed to fetch user ratings."})
 
+def _current_rating(user_id: str, tmdb_id: int) -> Optional[int]:
+    resp = (
+        supabase_admin
+        .table("user_movie_ratings")
+        .select("rating")
+        .eq("user_id", user_id)
+        .eq("tmdb_id", tmdb_id)
+        .maybe_single()
+        .execute()
+    )
+    # .data can be dict (row) or None — handle both
+    data = getattr(resp, "data", None)
+    return data.get("rating") if isinstance(data, dict) else None
+
 @router.get("/{user_id}/{tmdb_id}")
-async def get_rating_for_movie(user_id: str, tmdb_id: int):
+async def get_rating_for_movie(user_id: str, tmdb_id: int, viewer=Depends(get_optional_user)):
     """
     Return rating or null if not rated; never 404 for "not found".
     """
     try:
-        resp = (
-            supabase_admin
-            .table("user_movie_ratings")
-            .select("rating")
-            .eq("user_id", user_id)
-            .eq("tmdb_id", tmdb_id)
-            .maybe_single()
-            .execute()
-        )
-        # .data can be dict (row) or None — handle both
-        data = getattr(resp, "data", None)
-        rating = data.get("rating") if isinstance(data, dict) else None
+        if not await asyncio.to_thread(privacy_policy.can_view, viewer.id if viewer else None, user_id, privacy_policy.RATINGS):
+            raise HTTPException(status_code=403, detail="This user's ratings are private.")
+        # A rating still in the write-behind buffer is newer than the stored one
+        rating = rating_buffer.pending_rating(user_id, tmdb_id) if rating_buffer.ENABLED else None
+        if rating is None:
+            rating = _current_rating(user_id, tmdb_id)
         return {"user_id": user_id, "tmdb_id": tmdb_id, "rating": rating}
+    except HTTPException:
+        raise
     except Exception as e:
         print("Error in get_rating_for_movie:", e)
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail={"error": str(e), "message": "Failed to fetch rating."})
 
+def _import_format(content_type: str, fmt: Optional[str]) -> Optional[str]:
+    if fmt:
+        return fmt
+    content_type = content_type.split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/json-seq"):
+        return "ndjson"
+    return None
+
+# Declared before POST /{user_id}/{tmdb_id} so "import" is not taken for a tmdb_id
+@router.post("/{user_id}/import")
+async def import_ratings(
+    user_id: str,
+    request: Request,
+    format: Optional[Literal["csv", "ndjson"]] = Query(None, description="Defaults to the request's Content-Type"),
+):
+    """
+    Bulk-import ratings from a streamed CSV or NDJSON body (see rating_import.py
+    for the accepted columns). The response is NDJSON: one result per input row
+    ({"line", "status", "tmdb_id", "rating"[, "error"]}), then a final
+    {"summary": {...}} line.
+    """
+    fmt = _import_format(request.headers.get("content-type", ""), format)
+    if fmt is None:
+        raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson.")
+
+    # The body is fully consumed before responding (a streaming response would
+    # compete with it for the connection); per-row results are spooled to a
+    # temporary file so memory stays flat however long the file is.
+    if rating_buffer.ENABLED:
+        # Older buffered clicks must not land on top of the imported ratings
+        await asyncio.to_thread(rating_buffer.flush, user_id)
+
+    out = tempfile.SpooledTemporaryFile(max_size=1 << 20, mode="w+b")
+    imported = False
+    async for result in rating_import.run_import(user_id, request.stream(), fmt):
+        if "summary" in result:
+            imported = bool(result["summary"]["created"] or result["summary"]["updated"])
+        out.write(json.dumps(result).encode() + b"\n")
+    if imported:
+        # a member's ratings change what their groups get recommended
+        group_recommendations.invalidate_user(user_id)
+
+    out.seek(0)
+    return StreamingResponse(iter(out), media_type="application/x-ndjson", background=BackgroundTask(out.close))
+
 @router.post("/{user_id}/{tmdb_id}")
 async def upsert_rating(user_id: str, tmdb_id: int, payload: RatingPayload):
     """
     Upsert rating (requires UNIQUE (user_id, tmdb_id) in DB).
+    In write-behind mode the rating is queued and written within a few seconds
+    (see rating_buffer.py).
     """
+    if rating_buffer.ENABLED:
+        rating_buffer.put(user_id, tmdb_id, payload.rating)
+        return {"message": "Rating upserted", "user_id": user_id, "tmdb_id": tmdb_id, "rating": payload.rating, "data": [], "queued": True}
+
     try:
+        # The previous rating (if any) tells whether this is news for the activity feed;
+        # the movie's aggregates are kept by a trigger (see movie_rating_stats.py)
+        old = _current_rating(user_id, tmdb_id)
         resp = (
             supabase_admin
             .table("user_movie_ratings")
@@ -71,6 +203,10 @@ async def upsert_rating(user_id: str, tmdb_id: int, payload: RatingPayload):
             )
             .execute()
         )
+        # a member's ratings change what their groups get recommended
+        group_recommendations.invalidate_user(user_id)
+        if old != payload.rating:
+            activity_feed.record(user_id, activity_feed.RATED, tmdb_id=tmdb_id, value=payload.rating)
         # return the new/updated row(s) if your table has triggers/timestamps
         return {"message": "Rating upserted", "user_id": user_id, "tmdb_id": tmdb_id, "rating": payload.rating, "data": (resp.data or [])}
     except Exception as e:
@@ -79,3 +215,27 @@ async def upsert_rating(user_id: str, tmdb_id: int, payload: RatingPayload):
         # If you ever still see 23505 here, your DB unique constraint likely isn't (user_id, tmdb_id)
         raise HTTPException(status_code=500, detail={"error": str(e), "message": "Failed to upsert rating."})
 
+@router.delete("/{user_id}/{tmdb_id}")
+async def delete_rating(user_id: str, tmdb_id: int):
+    """
+    Delete a rating; deleting a rating that does not exist is not an error.
+    """
+    try:
+        if rating_buffer.ENABLED:
+            rating_buffer.discard(user_id, tmdb_id)
+        resp = (
+            supabase_admin
+            .table("user_movie_ratings")
+            .delete()
+            .eq("user_id", user_id)
+            .eq("tmdb_id", tmdb_id)
+            .execute()
+        )
+        deleted = resp.data or []
+        if deleted:
+            group_recommendations.invalidate_user(user_id)
+        return {"message": "Rating deleted", "user_id": user_id, "tmdb_id": tmdb_id, "deleted": len(deleted)}
+    except Exception as e:
+        print("Error in delete_rating:", e)
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail={"error": str(e), "message": "Failed to delete rating."})
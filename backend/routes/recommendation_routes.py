@@ -0,0 +1,52 @@
+# routes/recommendation_routes.py
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
+from pydantic import BaseModel
+import traceback
+
+from auth import get_current_user
+from config import supabase_admin
+import recommender
+from routes.tmdb_routes import MovieOut, transform_db_movie
+
+router = APIRouter(prefix="/api/recommendations", tags=["recommendations"])
+
+class RecommendationsResponse(BaseModel):
+    user_id: str
+    movies: List[MovieOut]
+    trained_at: Optional[float] = None
+
+@router.get("", response_model=RecommendationsResponse)
+async def get_my_recommendations(
+    limit: int = Query(20, ge=1, le=100, description="Number of movies to return"),
+    current_user=Depends(get_current_user)
+):
+    """
+    "Recommended for you": top movies from the collaborative-filtering model
+    (see recommender.py), excluding anything the user already rated or favourited.
+    Empty until a model is trained or if the user has no activity in it yet.
+    """
+    try:
+        user_id_str = str(current_user.id)
+        model = recommender.get_model()
+        if model is None:
+            return RecommendationsResponse(user_id=user_id_str, movies=[])
+
+        recs = model.recommend(user_id_str, limit)
+        if not recs:
+            return RecommendationsResponse(user_id=user_id_str, movies=[], trained_at=model.trained_at)
+
+        # One batched lookup, then back into the model's order
+        ids = [tmdb_id for tmdb_id, _ in recs]
+        result = supabase_admin.table("movies").select("*").in_("tmdb_id", ids).execute()
+        by_id = {m["tmdb_id"]: m for m in (result.data or [])}
+        movies = [transform_db_movie(by_id[i]) for i in ids if i in by_id]
+
+        return RecommendationsResponse(user_id=user_id_str, movies=movies, trained_at=model.trained_at)
+    except Exception as e:
+        print(f"Error in get_my_recommendations: {str(e)}")
+        print(f"Full traceback: {traceback.format_exc()}")
+        raise HTTPException(
+            status_code=500,
+            detail={"error": str(e), "message": "An error occurred while fetching recommendations."}
+        )
@@ -1,8 +1,17 @@
 import logging
-from typing import List, Literal
-from fastapi import APIRouter, HTTPException, Query
+import time
+from typing import List, Literal, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from config import supabase_admin
+from etags import compute_etag, etag_matches
+import similarity_index
+import content_index
+import catalog_replica
+import genres
+import movie_json
+from movie_rating_stats import community_rating
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +25,10 @@ class MovieOut(BaseModel):
     genre: str
     rating: str
     description: str
+    # Community ratings from our users (see movie_rating_stats.py)
+    user_rating_count: int = 0
+    user_rating_avg: Optional[float] = None
+    user_rating_histogram: List[int] = [0, 0, 0, 0, 0]
 
 class PaginatedMoviesResponse(BaseModel):
     movies: List[MovieOut]
@@ -25,9 +38,9 @@ class PaginatedMoviesResponse(BaseModel):
     total_pages: int
 
 
-def transform_db_movie(m: dict) -> MovieOut:
-    """Transform database movie record to MovieOut format"""
-    return MovieOut(
+def movie_fields(m: dict) -> dict:
+    """The MovieOut fields of a database movie record, in MovieOut's field order"""
+    return dict(
         id=m.get("tmdb_id") or 0,
         title=m.get("title") or "Untitled",
         year=str(m.get("release_year") or "—"),
@@ -35,9 +48,187 @@ def transform_db_movie(m: dict) -> MovieOut:
         genre=m.get("genre") or "—",
         rating=f'{(m.get("rating") or 0):.1f}',
         description=m.get("description") or "",
+        **community_rating(m),
     )
 
 
+def transform_db_movie(m: dict) -> MovieOut:
+    """Transform database movie record to MovieOut format"""
+    return MovieOut(**movie_fields(m))
+
+
+# Sparse fieldsets (?fields=id,title,poster,rating): a tuple of MovieOut field
+# names in model order, or None for all of them
+Fieldset = Optional[Tuple[str, ...]]
+
+# Movie columns each MovieOut field is built from (see movie_fields)
+FIELD_COLUMNS = {
+    "id": ("tmdb_id",),
+    "title": ("title",),
+    "year": ("release_year",),
+    "poster": ("poster",),
+    "genre": ("genre",),
+    "rating": ("rating",),
+    "description": ("description",),
+    "user_rating_count": ("user_rating_count",),
+    "user_rating_avg": ("user_rating_count", "user_rating_sum"),
+    "user_rating_histogram": ("user_rating_hist",),
+}
+
+FIELDS_DESCRIPTION = "Comma-separated movie fields to return (e.g. id,title,poster,rating); empty => all"
+
+
+def parse_fields(value: str) -> Fieldset:
+    """
+    The ?fields= parameter as a Fieldset; id is always included. Raises
+    ValueError on an unknown field name.
+    """
+    names = {f.strip() for f in value.split(",") if f.strip()}
+    if not names:
+        return None
+    unknown = names - FIELD_COLUMNS.keys()
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}")
+    names.add("id")
+    return tuple(f for f in MovieOut.model_fields if f in names)
+
+
+def _parse_fields_or_400(value: str) -> Fieldset:
+    try:
+        return parse_fields(value)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _source_columns(fields: Fieldset) -> Tuple[str, ...]:
+    if fields is None:
+        return movie_json.SOURCE_FIELDS
+    return tuple(dict.fromkeys(c for f in fields for c in FIELD_COLUMNS[f]))
+
+
+def select_columns(fields: Fieldset) -> str:
+    """The select() column list a fieldset needs."""
+    return "*" if fields is None else ",".join(_source_columns(fields))
+
+
+def _movie_fragment(m: dict, fields: Fieldset) -> bytes:
+    return movie_json.movie_fragment(m, movie_fields, fields, _source_columns(fields))
+
+
+def _movie_out(m: dict, fields: Fieldset):
+    """One movie in the response, narrowed to fields."""
+    if fields is None:
+        return transform_db_movie(m)
+    if movie_json.ENABLED:
+        return movie_json.JSONBytesResponse(_movie_fragment(m, fields))
+    return JSONResponse(transform_db_movie(m).model_dump(include=set(fields)))
+
+
+def _movie_list(movies: List[dict], fields: Fieldset):
+    """A list of movies in the response, narrowed to fields."""
+    if movie_json.ENABLED:
+        return movie_json.JSONBytesResponse(movie_json.array_body(_movie_fragment(m, fields) for m in movies))
+    out = [transform_db_movie(m) for m in movies]
+    if fields is None:
+        return out
+    return JSONResponse([o.model_dump(include=set(fields)) for o in out])
+
+
+def _movies_page(movies: List[dict], total: int, page: int, page_size: int, fields: Fieldset = None):
+    """
+    A PaginatedMoviesResponse for database movie records, narrowed to fields.
+    On the fast path (see movie_json.py) the body is encoded directly,
+    skipping re-validation.
+    """
+    total_pages = (total + page_size - 1) // page_size  # Ceiling division
+    if movie_json.ENABLED:
+        fragments = [_movie_fragment(m, fields) for m in movies]
+        return movie_json.JSONBytesResponse(movie_json.list_body(
+            fragments, total=total, page=page, page_size=page_size, total_pages=total_pages
+        ))
+    result = PaginatedMoviesResponse(
+        movies=[transform_db_movie(m) for m in movies],
+        total=total,
+        page=page,
+        page_size=page_size,
+        total_pages=total_pages
+    )
+    if fields is None:
+        return result
+    include = {"movies": {"__all__": set(fields)}, "total": True, "page": True, "page_size": True, "total_pages": True}
+    return JSONResponse(result.model_dump(include=include))
+
+
+def _order_movies(query, sort: str):
+    """Order by TMDB rating, or by our users' Bayesian-average rating first for sort="community" (unrated movies last)."""
+    if sort == "community":
+        query = query.order("user_rating_score", desc=True, nullsfirst=False)
+    return query.order("rating", desc=True)
+
+
+def _movies_query(genre_mask: int, count: Optional[str] = None, columns: str = "*"):
+    """All movies, or only those in any of the genres in genre_mask (see movies_with_genres in database.sql)."""
+    if genre_mask:
+        query = supabase_admin.rpc("movies_with_genres", {"p_mask": genre_mask}, count=count)
+        return query if columns == "*" else query.select(columns)
+    return supabase_admin.table("movies").select(columns, count=count)
+
+
+# Catalog responses are the same for everyone, so shared caches may keep them briefly
+CATALOG_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=300"
+# How long a worker trusts its last read of the catalog version
+CATALOG_VERSION_TTL = 5.0
+# (monotonic time read, version)
+_catalog_version: Tuple[float, Optional[str]] = (0.0, None)
+
+
+def catalog_version() -> Optional[str]:
+    """
+    A value that changes whenever a movie row changes: the replica's sync mark,
+    or else the newest Movies.updated_at, read at most every CATALOG_VERSION_TTL
+    seconds. None if it cannot be read.
+    """
+    global _catalog_version
+    replica = catalog_replica.get_replica()
+    if replica is not None:
+        return f'{replica.meta("high_water")}:{replica.meta("movies")}'
+    checked_at, version = _catalog_version
+    if checked_at and time.monotonic() - checked_at < CATALOG_VERSION_TTL:
+        return version
+    try:
+        res = supabase_admin.table("movies").select("updated_at").order("updated_at", desc=True).limit(1).execute()
+        version = (res.data or [{}])[0].get("updated_at")
+    except Exception as e:
+        logger.warning(f"Could not read the catalog version: {e}")
+        version = None
+    _catalog_version = (time.monotonic(), version)
+    return version
+
+
+def _catalog_etag(request: Request) -> Optional[str]:
+    """
+    ETag of a catalog response, from the catalog version and the request URL,
+    so a revalidation is answered before any movie is read.
+    """
+    version = catalog_version()
+    if version is None:
+        return None
+    return compute_etag(["catalog", version, request.url.path, sorted(request.query_params.multi_items())])
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CATALOG_CACHE_CONTROL})
+
+
+def _catalog_response(result, response: Response, etag: Optional[str]):
+    """Add the catalog caching headers to a route's result (a Response, or a model FastAPI will encode)."""
+    headers = {"Cache-Control": CATALOG_CACHE_CONTROL}
+    if etag:
+        headers["ETag"] = etag
+    (result if isinstance(result, Response) else response).headers.update(headers)
+    return result
+
+
 @router.get("/health")
 def health():
     return {"ok": True}
@@ -45,41 +236,55 @@ def health():
 
 @router.get("/search/movies", response_model=PaginatedMoviesResponse)
 async def search_movies(
+    request: Request,
+    response: Response,
     q: str = Query("", description="Empty => popular"),
     page: int = Query(1, ge=1, description="Page number (starting from 1)"),
-    page_size: int = Query(24, ge=1, le=100, description="Number of movies per page")
+    page_size: int = Query(24, ge=1, le=100, description="Number of movies per page"),
+    sort: Literal["rating", "community"] = Query("rating", description="rating = TMDB rating, community = our users' ratings"),
+    genre: str = Query("", description="Comma-separated genre names; matches movies in any of them (e.g. Action,Comedy)"),
+    fields: str = Query("", description=FIELDS_DESCRIPTION)
 ):
+    field_set = _parse_fields_or_400(fields)
+    columns = select_columns(field_set)
+    genre_mask = 0
+    if genre.strip():
+        try:
+            genre_mask = genres.mask_for(genres.parse_genres(genre))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     try:
+        etag = _catalog_etag(request)
+        if etag and etag_matches(request, etag):
+            return _not_modified(etag)
+
         # Calculate offset for pagination
         offset = (page - 1) * page_size
+
+        replica = catalog_replica.get_replica()
+        if replica is not None:
+            movies, total = replica.search(q if q.strip() else "", offset, page_size, sort, genre_mask)
+            return _catalog_response(_movies_page(movies, total, page, page_size, field_set), response, etag)
         
         if q.strip():
             # Search by title (case-insensitive)
             # Get total count
-            count_result = supabase_admin.table("movies").select("*", count="exact").ilike("title", f"%{q}%").execute()
+            count_result = _movies_query(genre_mask, count="exact", columns=columns).ilike("title", f"%{q}%").execute()
             total = count_result.count or 0
             
             # Get paginated results
-            result = supabase_admin.table("movies").select("*").ilike("title", f"%{q}%").order("rating", desc=True).range(offset, offset + page_size - 1).execute()
+            result = _order_movies(_movies_query(genre_mask, columns=columns).ilike("title", f"%{q}%"), sort).range(offset, offset + page_size - 1).execute()
         else:
             # Return popular movies (ordered by rating)
             # Get total count
-            count_result = supabase_admin.table("movies").select("*", count="exact").execute()
+            count_result = _movies_query(genre_mask, count="exact", columns=columns).execute()
             total = count_result.count or 0
             
             # Get paginated results
-            result = supabase_admin.table("movies").select("*").order("rating", desc=True).range(offset, offset + page_size - 1).execute()
+            result = _order_movies(_movies_query(genre_mask, columns=columns), sort).range(offset, offset + page_size - 1).execute()
         
-        movies = result.data or []
-        total_pages = (total + page_size - 1) // page_size  # Ceiling division
-        
-        return PaginatedMoviesResponse(
-            movies=[transform_db_movie(m) for m in movies],
-            total=total,
-            page=page,
-            page_size=page_size,
-            total_pages=total_pages
-        )
+        return _catalog_response(_movies_page(result.data or [], total, page, page_size, field_set), response, etag)
     except Exception as e:
         logger.error(f"Error searching movies: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -87,49 +292,110 @@ async def search_movies(
 
 @router.get("/trending", response_model=PaginatedMoviesResponse)
 async def trending(
+    request: Request,
+    response: Response,
     period: Literal["day", "week"] = "day",
     page: int = Query(1, ge=1, description="Page number (starting from 1)"),
-    page_size: int = Query(24, ge=1, le=100, description="Number of movies per page")
+    page_size: int = Query(24, ge=1, le=100, description="Number of movies per page"),
+    sort: Literal["rating", "community"] = Query("rating", description="rating = TMDB rating, community = our users' ratings"),
+    fields: str = Query("", description=FIELDS_DESCRIPTION)
 ):
+    field_set = _parse_fields_or_400(fields)
+    columns = select_columns(field_set)
     # Since we don't have trending data in the database, we'll return top-rated movies
     # This could be enhanced later with a view count or popularity metric
     try:
+        etag = _catalog_etag(request)
+        if etag and etag_matches(request, etag):
+            return _not_modified(etag)
+
         # Calculate offset for pagination
         offset = (page - 1) * page_size
+
+        replica = catalog_replica.get_replica()
+        if replica is not None:
+            movies, total = replica.search("", offset, page_size, sort)
+            return _catalog_response(_movies_page(movies, total, page, page_size, field_set), response, etag)
         
         # Get total count
-        count_result = supabase_admin.table("movies").select("*", count="exact").execute()
+        count_result = supabase_admin.table("movies").select(columns, count="exact").execute()
         total = count_result.count or 0
         
         # Get paginated results
-        result = supabase_admin.table("movies").select("*").order("rating", desc=True).range(offset, offset + page_size - 1).execute()
-        movies = result.data or []
-        total_pages = (total + page_size - 1) // page_size  # Ceiling division
-        
-        return PaginatedMoviesResponse(
-            movies=[transform_db_movie(m) for m in movies],
-            total=total,
-            page=page,
-            page_size=page_size,
-            total_pages=total_pages
-        )
+        result = _order_movies(supabase_admin.table("movies").select(columns), sort).range(offset, offset + page_size - 1).execute()
+        return _catalog_response(_movies_page(result.data or [], total, page, page_size, field_set), response, etag)
     except Exception as e:
         logger.error(f"Error fetching trending movies: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/movies/{movie_id}", response_model=MovieOut)
-async def movie_details(movie_id: int):
+async def movie_details(
+    movie_id: int,
+    request: Request,
+    response: Response,
+    fields: str = Query("", description=FIELDS_DESCRIPTION)
+):
+    field_set = _parse_fields_or_400(fields)
     try:
+        etag = _catalog_etag(request)
+        if etag and etag_matches(request, etag):
+            return _not_modified(etag)
+
+        replica = catalog_replica.get_replica()
+        if replica is not None:
+            movie = replica.get(movie_id)
+            if movie is None:
+                raise HTTPException(status_code=404, detail=f"Movie with ID {movie_id} not found")
+            return _catalog_response(_movie_out(movie, field_set), response, etag)
+
         # Query by tmdb_id
-        result = supabase_admin.table("movies").select("*").eq("tmdb_id", movie_id).execute()
+        result = supabase_admin.table("movies").select(select_columns(field_set)).eq("tmdb_id", movie_id).execute()
         
         if not result.data or len(result.data) == 0:
             raise HTTPException(status_code=404, detail=f"Movie with ID {movie_id} not found")
         
-        return transform_db_movie(result.data[0])
+        return _catalog_response(_movie_out(result.data[0], field_set), response, etag)
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error fetching movie details: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/movies/{movie_id}/similar", response_model=List[MovieOut])
+async def similar_movies(
+    movie_id: int,
+    limit: int = Query(12, ge=1, le=similarity_index.NEIGHBOURS, description="Number of similar movies"),
+    fields: str = Query("", description=FIELDS_DESCRIPTION)
+):
+    """
+    "More like this": neighbours from the precomputed in-memory similarity
+    index (see similarity_index.py), topped up from the text-based content
+    index (see content_index.py) for titles with few or no ratings yet.
+    Hydrated with one batched lookup.
+    """
+    field_set = _parse_fields_or_400(fields)
+    try:
+        index = similarity_index.get_index()
+        neighbours = index.similar(movie_id, limit) if index else []
+        if len(neighbours) < limit:
+            text_index = content_index.get_index()
+            if text_index is not None:
+                seen = {tmdb_id for tmdb_id, _ in neighbours}
+                extra = [n for n in text_index.similar(movie_id, limit) if n[0] not in seen]
+                neighbours += extra[:limit - len(neighbours)]
+        if not neighbours:
+            return []
+
+        ids = [tmdb_id for tmdb_id, _ in neighbours]
+        replica = catalog_replica.get_replica()
+        if replica is not None:
+            rows = replica.get_many(ids)
+        else:
+            rows = supabase_admin.table("movies").select(select_columns(field_set)).in_("tmdb_id", ids).execute().data or []
+        by_id = {m["tmdb_id"]: m for m in rows}
+        return _movie_list([by_id[i] for i in ids if i in by_id], field_set)
+    except Exception as e:
+        logger.error(f"Error fetching similar movies: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
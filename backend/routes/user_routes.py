@@ -1,11 +1,14 @@
 # user_routes.py
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException
 import traceback
 import logging
 
 # Import dependencies from our modular files
-from auth import get_current_user
+from auth import get_current_user, get_optional_user
 from config import supabase_admin
+import activity_feed
+import privacy_policy
 
 from typing import Literal, List, Optional
 from pydantic import BaseModel
@@ -88,22 +91,29 @@ async def update_profile(payload: UpdateProfileRequest, current_user=Depends(get
         )
     
 @router.get("/api/profile/{id}")
-async def get_profile_by_id(id: str):
+async def get_profile_by_id(id: str, viewer=Depends(get_optional_user)):
     """
     Get the user's profile using a specific id
     """
     try:
+        if not await asyncio.to_thread(privacy_policy.can_view, viewer.id if viewer else None, id, privacy_policy.PROFILE):
+            raise HTTPException(status_code=403, detail="This profile is private.")
         result = supabase_admin.table("profiles").select("*").eq("user_id", id).execute()
 
         if result.data:
             return result.data[0]
         
-        raise Exception("No profile found with given id")
+        raise HTTPException(
+            status_code=404,
+            detail={"error": "No profile found with given id", "message": "An error occurred while fetching a profile."}
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in get_profile/id: {str(e)}")
         print(f"Full traceback: {traceback.format_exc()}")
         raise HTTPException(
-            status_code=404,
+            status_code=500,
             detail={"error": str(e), "message": "An error occurred while fetching a profile."}
         )
 
@@ -183,6 +193,10 @@ async def update_privacy(payload: PrivacySettings, current_user=Depends(get_curr
         }
         # upsert garante criação/atualização
         upd = supabase_admin.table("privacy_settings").upsert(to_save, on_conflict="user_id").execute()
+        privacy_policy.invalidate(user_id_str)
+        if not payload.show_activity:
+            # activity already in friends' feeds goes too
+            activity_feed.hide_actor(user_id_str)
         if upd.data:
             return upd.data[0]
         raise Exception("Upsert returned no data.")
@@ -220,6 +234,8 @@ async def add_block(payload: BlockIn, current_user=Depends(get_current_user)):
             {"user_id": user_id_str, "blocked": who},
             on_conflict="user_id,blocked"
         ).execute()
+        privacy_policy.invalidate(user_id_str)
+        activity_feed.forget_pair(user_id_str, who)
 
         res = supabase_admin.table("blocked_users").select("blocked").eq("user_id", user_id_str).execute()
         return {"ok": True, "blocked_users": [r["blocked"] for r in res.data or []]}
@@ -235,6 +251,7 @@ async def remove_block(who: str, current_user=Depends(get_current_user)):
     try:
         user_id_str = str(current_user.id)
         supabase_admin.table("blocked_users").delete().eq("user_id", user_id_str).eq("blocked", who).execute()
+        privacy_policy.invalidate(user_id_str)
 
         res = supabase_admin.table("blocked_users").select("blocked").eq("user_id", user_id_str).execute()
         return {"ok": True, "blocked_users": [r["blocked"] for r in res.data or []]}
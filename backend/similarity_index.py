@@ -0,0 +1,331 @@
+# similarity_index.py
+"""
+Item-item "more like this" index for movie detail pages.
+
+For every movie we precompute its top-N most similar movies, blending:
+  - genre overlap: cosine of the movies' genre sets (genre_mask, or the genre
+    text for rows without one; see genres.movie_genres)
+  - co-interaction: cosine between the movies' user vectors, built from
+    user_movie_ratings and favourite_movies (see recommender.build_interactions)
+
+    similarity = GENRE_WEIGHT * genre + (1 - GENRE_WEIGHT) * co_interaction
+
+with a tiny bonus for the neighbour's TMDB rating so that ties (e.g. same
+genre, no shared raters) go to better movies. The result is kept as two
+(n_movies, N) arrays of neighbour ids and scores; a lookup is one dict access
+and a slice of N entries, independent of catalog size.
+
+Rebuilds are incremental: each movie has a fingerprint of its genre, rating
+and interactions, and only rows whose inputs changed are recomputed, plus
+every row a changed movie was listed in or now scores high enough to enter
+(above the row's N-th score). A pair's similarity only depends on the two
+movies' own inputs, so the result is the same as a full rebuild.
+
+Workers build under INDEX_PATH.lock: one rebuilds while the others wait and
+then load what it saved.
+
+    python similarity_index.py build [--full]
+"""
+import asyncio
+import hashlib
+import os
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import file_lock
+from genres import movie_genres
+from recommender import _fetch_all, build_interactions
+
+INDEX_PATH = os.getenv("SIMILARITY_INDEX_PATH") or os.path.join(os.path.dirname(__file__), "similarity_index.npz")
+# How often the API rebuilds (incrementally) in the background (0 disables it)
+REFRESH_SECONDS = int(os.getenv("SIMILARITY_REFRESH_SECONDS") or 60 * 60)
+
+NEIGHBOURS = 30
+GENRE_WEIGHT = 0.4
+RATING_TIE_BREAK = 0.001
+# Cells per dense (rows x n_movies) similarity block, bounds memory while building
+BLOCK_CELLS = 8_000_000
+
+
+class SimilarityIndex:
+    """
+    movie_ids:   int32 (n,)     tmdb ids, row i describes movie_ids[i]
+    neighbours:  int32 (n, N)   tmdb ids of the most similar movies, best first (0 = empty slot)
+    scores:      float32 (n, N)
+    fingerprints: uint64 (n,)   hash of each movie's inputs, for incremental rebuilds
+    """
+
+    def __init__(self, movie_ids: np.ndarray, neighbours: np.ndarray, scores: np.ndarray,
+                 fingerprints: np.ndarray, built_at: float):
+        self.movie_ids = movie_ids.astype(np.int32, copy=False)
+        self.neighbours = neighbours.astype(np.int32, copy=False)
+        self.scores = scores.astype(np.float32, copy=False)
+        self.fingerprints = fingerprints.astype(np.uint64, copy=False)
+        self.built_at = built_at
+        self.row = {int(m): i for i, m in enumerate(self.movie_ids)}
+
+    def similar(self, tmdb_id: int, limit: int = NEIGHBOURS) -> List[Tuple[int, float]]:
+        """(tmdb_id, score) of the most similar movies, best first."""
+        i = self.row.get(tmdb_id)
+        if i is None:
+            return []
+        ids, scores = self.neighbours[i, :limit], self.scores[i, :limit]
+        return [(int(m), float(s)) for m, s in zip(ids, scores) if m]
+
+    def save(self, path: str = INDEX_PATH) -> None:
+        # Per process, so concurrent saves never write into the same file
+        tmp = f"{path}.tmp{os.getpid()}.npz"
+        np.savez(tmp, movie_ids=self.movie_ids, neighbours=self.neighbours, scores=self.scores,
+                 fingerprints=self.fingerprints, built_at=np.array(self.built_at))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = INDEX_PATH) -> "SimilarityIndex":
+        with np.load(path) as f:
+            return cls(f["movie_ids"], f["neighbours"], f["scores"], f["fingerprints"], float(f["built_at"]))
+
+
+# INPUTS
+
+def _genre_set(m: Dict) -> List[str]:
+    return sorted({g.lower() for g in movie_genres(m)})
+
+
+class _Inputs:
+    """Catalog-aligned matrices the similarity blocks are computed from."""
+
+    def __init__(self, movies: List[Dict], ratings: Iterable[Dict], favourites: Iterable[Dict]):
+        movies = sorted((m for m in movies if m.get("tmdb_id")), key=lambda m: m["tmdb_id"])
+        self.movie_ids = np.array([m["tmdb_id"] for m in movies], dtype=np.int32)
+        n = len(movies)
+        row = {int(m): i for i, m in enumerate(self.movie_ids)}
+
+        # Genre multi-hot rows, L2-normalized so G @ G.T is the genre cosine
+        genre_sets = [_genre_set(m) for m in movies]
+        vocab = {g: j for j, g in enumerate(sorted({g for gs in genre_sets for g in gs}))}
+        self.genres = np.zeros((n, max(len(vocab), 1)), dtype=np.float32)
+        for i, gs in enumerate(genre_sets):
+            for g in gs:
+                self.genres[i, vocab[g]] = 1.0 / np.sqrt(len(gs))
+
+        self.rating_bonus = RATING_TIE_BREAK * np.array([float(m.get("rating") or 0) for m in movies], dtype=np.float32) / 10
+
+        # Interactions as catalog-row CSR (movie -> users) and (user -> movies)
+        # weighted so that dot products are cosines between movie user-vectors
+        user_ids, inter_movie_ids, u_indptr, u_indices, strength = build_interactions(ratings, favourites)
+        to_row = np.array([row.get(int(m), -1) for m in inter_movie_ids], dtype=np.int64)
+        users = np.repeat(np.arange(len(user_ids)), np.diff(u_indptr))
+        cols = to_row[u_indices] if len(u_indices) else np.zeros(0, np.int64)
+        keep = cols >= 0
+        users, cols, weights = users[keep], cols[keep], strength[keep].astype(np.float64)
+
+        norms = np.sqrt(np.bincount(cols, weights=weights ** 2, minlength=n))
+        weights = weights / np.where(norms[cols] > 0, norms[cols], 1.0)
+
+        order = np.lexsort((users, cols))
+        self.m_indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cols, minlength=n), out=self.m_indptr[1:])
+        self.m_users, self.m_weights = users[order], weights[order]
+
+        order = np.lexsort((cols, users))
+        self.u_indptr = np.zeros(len(user_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(users, minlength=len(user_ids)), out=self.u_indptr[1:])
+        self.u_movies, self.u_weights = cols[order], weights[order]
+
+        # Fingerprint each movie's inputs: genre, rating and (user, strength) pairs
+        self.fingerprints = np.zeros(n, dtype=np.uint64)
+        for i, m in enumerate(movies):
+            start, end = self.m_indptr[i], self.m_indptr[i + 1]
+            h = hashlib.blake2b(digest_size=8)
+            h.update(f"{','.join(genre_sets[i])}|{m.get('rating')}|".encode())
+            h.update(self.m_users[start:end].tobytes())
+            h.update(np.round(self.m_weights[start:end], 6).tobytes())
+            self.fingerprints[i] = int.from_bytes(h.digest(), "little")
+
+    def similarity_block(self, rows: np.ndarray) -> np.ndarray:
+        """Dense (len(rows), n_movies) blended similarity of the given movies against the catalog."""
+        n = len(self.movie_ids)
+        block = GENRE_WEIGHT * (self.genres[rows] @ self.genres.T)
+
+        # Co-interaction cosine: expand every (movie, user) entry of the block
+        # into that user's whole movie row, then sum per (block row, movie)
+        starts, ends = self.m_indptr[rows], self.m_indptr[rows + 1]
+        lengths = ends - starts
+        if lengths.sum():
+            entry = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])
+            local = np.repeat(np.arange(len(rows)), lengths)
+            users, w = self.m_users[entry], self.m_weights[entry]
+            deg = self.u_indptr[users + 1] - self.u_indptr[users]
+            total = int(deg.sum())
+            offsets = np.repeat(self.u_indptr[users] - np.concatenate(([0], np.cumsum(deg)[:-1])), deg)
+            idx = offsets + np.arange(total)
+            flat = np.repeat(local, deg) * n + self.u_movies[idx]
+            co = np.bincount(flat, weights=np.repeat(w, deg) * self.u_weights[idx], minlength=len(rows) * n)
+            block += (1 - GENRE_WEIGHT) * co.reshape(len(rows), n).astype(np.float32)
+
+        # Only movies with some real similarity qualify; the rating only breaks ties
+        block[block <= 0] = -np.inf
+        block[np.arange(len(rows)), rows] = -np.inf  # a movie is not similar to itself
+        block += self.rating_bonus
+        return block
+
+    def affected_rows(self, rows: np.ndarray, threshold: np.ndarray) -> np.ndarray:
+        """
+        Rows where one of the given movies now scores above threshold (the
+        row's previous N-th score, -inf where the list had room).
+        """
+        affected = np.zeros(len(self.movie_ids), dtype=bool)
+        block_rows = max(1, BLOCK_CELLS // max(len(self.movie_ids), 1))
+        for start in range(0, len(rows), block_rows):
+            chunk = rows[start:start + block_rows]
+            # block[c, j] carries j's bonus; in row j's list, c carries its own
+            block = self.similarity_block(chunk) - self.rating_bonus + self.rating_bonus[chunk, None]
+            affected |= (np.isfinite(block) & (block >= threshold)).any(axis=0)
+        return np.flatnonzero(affected)
+
+
+def _top_neighbours(inputs: _Inputs, rows: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    neighbours = np.zeros((len(rows), k), dtype=np.int32)
+    scores = np.zeros((len(rows), k), dtype=np.float32)
+    k_eff = min(k, len(inputs.movie_ids) - 1)
+    if k_eff <= 0:
+        return neighbours, scores
+    block_rows = max(1, BLOCK_CELLS // max(len(inputs.movie_ids), 1))
+    for start in range(0, len(rows), block_rows):
+        chunk = rows[start:start + block_rows]
+        block = inputs.similarity_block(chunk)
+        top = np.argpartition(-block, k_eff - 1, axis=1)[:, :k_eff]
+        top_scores = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top, top_scores = np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+        found = np.isfinite(top_scores)
+        neighbours[start:start + len(chunk), :k_eff] = np.where(found, inputs.movie_ids[top], 0)
+        scores[start:start + len(chunk), :k_eff] = np.where(found, top_scores, 0)
+    return neighbours, scores
+
+
+def build(movies: List[Dict], ratings: Iterable[Dict], favourites: Iterable[Dict],
+          previous: Optional[SimilarityIndex] = None, k: int = NEIGHBOURS) -> Tuple[SimilarityIndex, int]:
+    """
+    Build the index, reusing rows of `previous` whose inputs are unchanged.
+    Returns (index, number of rows recomputed).
+    """
+    inputs = _Inputs(movies, ratings, favourites)
+    n = len(inputs.movie_ids)
+
+    if previous is None or previous.neighbours.shape[1] != k:
+        dirty = np.arange(n)
+    else:
+        prev_rows = np.array([previous.row.get(int(m), -1) for m in inputs.movie_ids], dtype=np.int64)
+        known = prev_rows >= 0
+        changed = ~known
+        changed[known] |= previous.fingerprints[prev_rows[known]] != inputs.fingerprints[known]
+        changed_rows = np.flatnonzero(changed)
+        # Rows listing a changed or removed movie, whose score there moved or is gone
+        removed = set(previous.row) - set(int(m) for m in inputs.movie_ids)
+        moved = np.concatenate([inputs.movie_ids[changed_rows], np.array(sorted(removed), dtype=np.int32)])
+        listed = np.flatnonzero(known)[np.isin(previous.neighbours[prev_rows[known]], moved).any(axis=1)]
+        # Rows a changed movie (say a new one of the same genre) now enters
+        threshold = np.full(n, np.inf, dtype=np.float32)
+        last = previous.neighbours[prev_rows[known], -1]
+        threshold[known] = np.where(last != 0, previous.scores[prev_rows[known], -1], -np.inf)
+        entered = inputs.affected_rows(changed_rows, threshold) if len(changed_rows) else np.zeros(0, np.int64)
+        dirty = np.unique(np.concatenate([changed_rows, listed, entered]))
+
+    neighbours = np.zeros((n, k), dtype=np.int32)
+    scores = np.zeros((n, k), dtype=np.float32)
+    if previous is not None and len(dirty) < n:
+        clean = np.setdiff1d(np.arange(n), dirty)
+        prev_clean = np.array([previous.row[int(m)] for m in inputs.movie_ids[clean]], dtype=np.int64)
+        neighbours[clean] = previous.neighbours[prev_clean]
+        scores[clean] = previous.scores[prev_clean]
+    if len(dirty):
+        neighbours[dirty], scores[dirty] = _top_neighbours(inputs, dirty, k)
+
+    return SimilarityIndex(inputs.movie_ids, neighbours, scores, inputs.fingerprints, built_at=time.time()), len(dirty)
+
+
+# THE SERVED INDEX
+
+_index: Optional[SimilarityIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> Optional[SimilarityIndex]:
+    """The index being served; loaded from INDEX_PATH on first use if one was saved."""
+    global _index
+    if _index is None and os.path.exists(INDEX_PATH):
+        with _index_lock:
+            if _index is None:
+                try:
+                    _index = SimilarityIndex.load(INDEX_PATH)
+                except Exception as e:
+                    print(f"[similarity_index] Failed to load {INDEX_PATH}: {e}")
+    return _index
+
+
+def refresh(full: bool = False) -> SimilarityIndex:
+    """Rebuild from the database (incrementally unless full), save, and start serving it."""
+    global _index
+    from config import supabase_admin
+
+    started = time.perf_counter()
+    movies = _fetch_all(supabase_admin, "movies", "tmdb_id,genre,genre_mask,rating", "tmdb_id")
+    ratings = _fetch_all(supabase_admin, "user_movie_ratings", "user_id,tmdb_id,rating", "id")
+    favourites = _fetch_all(supabase_admin, "favourite_movies", "user_id,movie_id", "user_id")
+    index, recomputed = build(movies, ratings, favourites, previous=None if full else get_index())
+    index.save(INDEX_PATH)
+    with _index_lock:
+        _index = index
+    print(f"[similarity_index] Rebuilt {recomputed}/{len(index.movie_ids)} movies in {time.perf_counter() - started:.1f}s")
+    return index
+
+
+def _reload_if_newer() -> None:
+    """Pick up an index another worker (or the CLI) saved since ours was loaded."""
+    global _index
+    index = SimilarityIndex.load(INDEX_PATH)
+    with _index_lock:
+        if _index is None or index.built_at > _index.built_at:
+            _index = index
+
+
+def _refresh_if_stale() -> None:
+    """
+    Rebuild (incrementally, from the latest saved index) if the saved index is
+    missing or older than REFRESH_SECONDS, else load it. Under INDEX_PATH.lock,
+    so one worker builds while the others wait and then load what it saved.
+    """
+    with file_lock.exclusive(INDEX_PATH + ".lock"):
+        age = time.time() - os.path.getmtime(INDEX_PATH) if os.path.exists(INDEX_PATH) else None
+        if age is not None:
+            _reload_if_newer()
+        if age is None or age >= REFRESH_SECONDS:
+            refresh()
+
+
+async def refresh_periodically() -> None:
+    """
+    Background task started by main.py. Rebuilds incrementally once the saved
+    index is older than REFRESH_SECONDS; otherwise serves the saved one.
+    """
+    if REFRESH_SECONDS <= 0:
+        return
+    while True:
+        try:
+            await asyncio.to_thread(_refresh_if_stale)
+        except Exception as e:
+            print(f"[similarity_index] Background refresh failed: {e}")
+        await asyncio.sleep(min(REFRESH_SECONDS, 15 * 60))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "build":
+        print("Usage: python similarity_index.py build [--full]")
+        sys.exit(1)
+    refresh(full="--full" in sys.argv[2:])
+    print(f"✅ Index saved to {INDEX_PATH}")
@@ -0,0 +1,145 @@
+# static_assets.py
+"""
+Static serving for the bundled frontend.
+
+PrecompressedStaticFiles is a drop-in StaticFiles that:
+  - serves foo.js.br / foo.js.gz instead of foo.js when the client accepts
+    that encoding and the variant is at least as new as the original, so
+    bundles are compressed once at build time instead of on every request
+  - marks Vite's content-hashed files (assets/index-3f9a1c2b.js) immutable for
+    a year; everything else (index.html) must be revalidated, which the
+    ETag/304 handling of StaticFiles makes cheap
+  - leaves zero-copy to the server: FileResponse hands the path over through
+    the ASGI pathsend extension where the server offers it (e.g. granian),
+    which sends the file with sendfile(); other servers (uvicorn) get larger
+    read chunks
+
+The variants are produced after `npm run build` with:
+    python static_assets.py compress ../frontend/dist
+"""
+import gzip
+import mimetypes
+import os
+import re
+import stat
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:  # optional; only .gz variants are written without it
+    brotli = None
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+# Vite's default asset names: [name]-[hash].[ext], hash of 8 url-safe characters
+HASHED_NAME = re.compile(r"-[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+$")
+# Preferred first when the client accepts both
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+# Text formats worth compressing, and the smallest file worth it
+COMPRESSIBLE_SUFFIXES = (".js", ".mjs", ".css", ".html", ".svg", ".json", ".map", ".txt", ".xml", ".wasm", ".ico")
+MIN_COMPRESS_SIZE = 1024
+CHUNK_SIZE = 256 * 1024
+
+
+def accepted_encodings(header: Optional[str]) -> Dict[str, float]:
+    """Accept-Encoding as {coding: q}; codings with q=0 are left out."""
+    accepted = {}
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def cache_control_for(path: str) -> str:
+    return IMMUTABLE_CACHE_CONTROL if HASHED_NAME.search(os.path.basename(path)) else REVALIDATE_CACHE_CONTROL
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        media_type = mimetypes.guess_type(str(full_path))[0] or "text/plain"
+        headers = {"Cache-Control": cache_control_for(str(full_path)), "Vary": "Accept-Encoding"}
+
+        path, encoding = str(full_path), None
+        # Byte ranges refer to the identity body, so range requests get the original
+        if status_code == 200 and "range" not in request_headers:
+            variant = self._variant(path, stat_result, request_headers.get("accept-encoding"))
+            if variant is not None:
+                path, stat_result, encoding = variant
+                headers["Content-Encoding"] = encoding
+
+        response = FileResponse(path, status_code=status_code, stat_result=stat_result, media_type=media_type, headers=headers)
+        response.chunk_size = CHUNK_SIZE
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    @staticmethod
+    def _variant(path: str, original: os.stat_result, accept_encoding: Optional[str]) -> Optional[Tuple[str, os.stat_result, str]]:
+        accepted = accepted_encodings(accept_encoding)
+        for encoding, suffix in sorted(ENCODINGS, key=lambda e: -accepted.get(e[0], 0)):
+            if encoding not in accepted:
+                continue
+            try:
+                st = os.stat(path + suffix)
+            except OSError:
+                continue
+            # A variant older than its original is left over from a previous build
+            if stat.S_ISREG(st.st_mode) and st.st_mtime >= original.st_mtime:
+                return path + suffix, st, encoding
+        return None
+
+
+def precompress(directory: str) -> List[str]:
+    """
+    Write .gz (and .br, if brotli is installed) next to every compressible
+    file in directory that is big enough, keeping a variant only if it is
+    smaller. Returns the paths written.
+    """
+    written = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if not name.endswith(COMPRESSIBLE_SUFFIXES):
+                continue
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                data = f.read()
+            if len(data) < MIN_COMPRESS_SIZE:
+                continue
+            variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+            if brotli is not None:
+                variants.append((".br", brotli.compress(data, quality=11)))
+            for suffix, body in variants:
+                if len(body) >= len(data):
+                    continue
+                tmp = path + suffix + ".tmp"
+                with open(tmp, "wb") as f:
+                    f.write(body)
+                os.replace(tmp, path + suffix)
+                written.append(path + suffix)
+    return written
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "compress":
+        paths = precompress(sys.argv[2])
+        print(f"[static_assets] Wrote {len(paths)} precompressed file(s){'' if brotli else ' (gzip only, brotli not installed)'}")
+    else:
+        print("Usage: python static_assets.py compress <directory>")
@@ -2,6 +2,7 @@
 import sys, os, uuid
 from pathlib import Path
 import pytest
+from unittest.mock import patch
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
@@ -13,6 +14,44 @@ from routes.user_routes import router as user_router
 from routes.groups_routes import router as groups_router
 from auth import get_current_user
 from config import supabase_admin
+import activity_feed
+import privacy_policy
+
+# Route tests mock the database of the module under test only; unless a test
+# says otherwise, every owner's profile, ratings and favourites are public.
+PUBLIC_POLICY = {"profile_visibility": "public", "show_favorites_to": "everyone", "blocked": frozenset(), "friends": frozenset()}
+
+@pytest.fixture(autouse=True)
+def public_privacy_policy():
+    privacy_policy.clear()
+    with patch("privacy_policy._load", return_value=dict(PUBLIC_POLICY)):
+        yield
+    privacy_policy.clear()
+
+# activity_feed.record writes through the real client, which route tests
+# never patch; keep them from recording activity anywhere.
+@pytest.fixture(autouse=True)
+def no_activity_recording():
+    with patch("activity_feed.record", return_value=None):
+        yield
+
+@pytest.fixture
+def logged_in(request):
+    """
+    Authenticates requests to main.app as MockUser(USER_ID), where USER_ID is
+    the test module's (default "u1"). Yields the user.
+    """
+    from main import app as main_app
+    from helpers import MockUser
+
+    user = MockUser(getattr(request.module, "USER_ID", "u1"))
+
+    async def current_user():
+        return user
+
+    main_app.dependency_overrides[get_current_user] = current_user
+    yield user
+    main_app.dependency_overrides.pop(get_current_user, None)
 
 class DummyUser:
     def __init__(self, id: str, email: str):
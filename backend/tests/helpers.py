@@ -0,0 +1,37 @@
+# tests/helpers.py
+"""
+Test doubles shared by the route tests (pytest puts this directory on sys.path,
+so test modules import them with `from helpers import ...`).
+"""
+from unittest.mock import MagicMock
+
+# Query-builder methods the routes call before execute()
+CHAIN_METHODS = (
+    "select", "eq", "neq", "gt", "gte", "lt", "lte", "in_", "or_", "ilike",
+    "order", "range", "limit", "maybe_single", "single",
+    "insert", "upsert", "update", "delete",
+)
+
+
+class MockUser:
+    """What get_current_user returns: an id, an email and metadata."""
+
+    def __init__(self, id: str, email=None):
+        self.id = id
+        self.email = email or f"{id}@example.com"
+        self.user_metadata = {}
+
+
+def make_chain(data=None, count=None, pages=None):
+    """
+    A supabase query chain: every builder method returns the chain itself, and
+    execute() returns data (with count), or each of pages in turn when given.
+    """
+    chain = MagicMock()
+    for method in CHAIN_METHODS:
+        getattr(chain, method).return_value = chain
+    if pages is not None:
+        chain.execute.side_effect = [MagicMock(data=page) for page in pages]
+    else:
+        chain.execute.return_value = MagicMock(data=data, count=count)
+    return chain
@@ -0,0 +1,90 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from fastapi.testclient import TestClient
+from main import app
+from cursors import encode_cursor
+import activity_feed
+import rating_buffer
+from helpers import make_chain
+
+# The real recorder; conftest replaces it with a no-op
+record_activity = activity_feed.record
+
+client = TestClient(app)
+USER_ID = "u1"
+pytestmark = pytest.mark.usefixtures("logged_in")
+
+def event(event_id, verb=activity_feed.RATED):
+    return {
+        "id": event_id, "actor_user_id": "u2", "verb": verb, "tmdb_id": 550, "group_id": None,
+        "value": 8, "created_at": "2024-01-01T00:00:00Z", "actor": {"user_id": "u2", "handle": "ana"},
+    }
+
+@patch("activity_feed.record", record_activity)
+@patch("activity_feed.supabase_admin")
+def test_record_calls_fanout_and_never_raises(mock_supabase):
+    mock_supabase.rpc.return_value.execute.return_value = MagicMock(data=42)
+    assert activity_feed.record("u1", activity_feed.RATED, tmdb_id=550, value=8) == 42
+    mock_supabase.rpc.assert_called_once_with("record_activity", {
+        "p_actor": "u1", "p_verb": "rated", "p_tmdb_id": 550, "p_group_id": None,
+        "p_value": 8, "p_fanout_limit": activity_feed.FANOUT_LIMIT,
+    })
+
+    mock_supabase.rpc.return_value.execute.side_effect = Exception("boom")
+    assert activity_feed.record("u1", activity_feed.RATED, tmdb_id=550, value=8) is None
+
+@patch("activity_feed.supabase_admin")
+def test_feed_pages_by_event_id(mock_supabase):
+    mock_supabase.rpc.return_value = make_chain([event(9), event(7), event(4)])
+
+    res = client.get("/api/feed?limit=2")
+    assert res.status_code == 200
+    body = res.json()
+    assert [e["id"] for e in body["events"]] == [9, 7]
+    assert body["events"][0]["actor_handle"] == "ana"
+    assert body["next_cursor"] == encode_cursor([7])
+    mock_supabase.rpc.assert_called_with("activity_feed_page", {"p_user_id": "u1", "p_before": None, "p_limit": 3})
+
+    mock_supabase.rpc.return_value = make_chain([event(4)])
+    body = client.get("/api/feed", params={"limit": 2, "cursor": body["next_cursor"]}).json()
+    assert body["next_cursor"] is None
+    mock_supabase.rpc.assert_called_with("activity_feed_page", {"p_user_id": "u1", "p_before": 7, "p_limit": 3})
+
+    assert client.get("/api/feed?cursor=nonsense").status_code == 400
+
+@patch("activity_feed.record")
+@patch("routes.rated_movies_route.supabase_admin")
+def test_rating_records_only_changes(mock_supabase, mock_record):
+    mock_supabase.table.return_value = make_chain({"rating": 4})
+    with patch.object(rating_buffer, "ENABLED", False):
+        assert client.post("/api/ratings/u1/550", json={"rating": 4}).status_code == 200
+        mock_record.assert_not_called()
+
+        mock_supabase.table.return_value = make_chain(None)
+        assert client.post("/api/ratings/u1/550", json={"rating": 5}).status_code == 200
+    mock_record.assert_called_once_with("u1", activity_feed.RATED, tmdb_id=550, value=5)
+
+@patch("activity_feed.record")
+@patch("routes.favourite_movies_routes.supabase_admin")
+def test_favourite_batch_records_new_movies_only(mock_supabase, mock_record):
+    mock_supabase.rpc.return_value.execute.return_value = MagicMock(data={
+        "before": [{"movie_id": 1, "rank": 1, "genre_ids": []}],
+        "after": [{"movie_id": 2, "rank": 1, "genre_ids": []}, {"movie_id": 1, "rank": 2, "genre_ids": []}],
+    })
+    with patch("routes.favourite_movies_routes.group_genre_stats"), patch("routes.favourite_movies_routes.group_recommendations"):
+        res = client.post("/api/favourite_movies/u1/batch", json={"ops": [{"op": "add", "movie_id": 2, "position": 1}]})
+    assert res.status_code == 200
+    mock_record.assert_called_once_with("u1", activity_feed.FAVOURITED, tmdb_id=2)
+
+@patch("activity_feed.supabase_admin")
+@patch("routes.user_routes.supabase_admin")
+def test_block_clears_both_timelines(mock_users, mock_feed):
+    mock_users.table.return_value = make_chain([{"blocked": "u2"}])
+    timelines = make_chain([])
+    mock_feed.table.return_value = timelines
+
+    assert client.post("/api/privacy/block", json={"user": "u2"}).status_code == 200
+    timelines.eq.assert_any_call("user_id", "u1")
+    timelines.eq.assert_any_call("actor_user_id", "u2")
+    timelines.eq.assert_any_call("user_id", "u2")
+    timelines.eq.assert_any_call("actor_user_id", "u1")
@@ -0,0 +1,68 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from main import app
+from routes import batch_routes
+from helpers import MockUser, make_chain
+
+client = TestClient(app)
+USER_ID = "u1"
+
+@patch("routes.favourite_movies_routes.supabase_admin")
+@patch("routes.user_routes.supabase_admin")
+def test_batch_returns_each_result_in_order(mock_users, mock_favourites, logged_in):
+    mock_users.table.return_value = make_chain([{"user_id": "u1", "username": "ana"}])
+    mock_favourites.table.return_value = make_chain([{"movie_id": 101}, {"movie_id": 202}])
+
+    res = client.post("/api/batch", json={"requests": [
+        {"id": "profile", "path": "/api/profile/u1"},
+        {"id": "favourites", "path": "/api/favourite_movies/u1?x=1"},
+    ]})
+
+    assert res.status_code == 200
+    responses = res.json()["responses"]
+    assert [r["id"] for r in responses] == ["profile", "favourites"]
+    assert [r["status"] for r in responses] == [200, 200]
+    assert responses[0]["body"]["username"] == "ana"
+    assert responses[0]["etag"]
+    assert responses[1]["body"] == [101, 202]
+
+def test_batch_rejects_bad_paths(logged_in):
+    for path in ("/api/batch", "https://evil.example/x", "//evil.example/x", "/api/export", "/api/no-such-route", "/api/groups/g1/events"):
+        res = client.post("/api/batch", json={"requests": [{"path": path}]})
+        assert res.status_code == 400
+
+    too_many = [{"path": "/health"}] * 21
+    assert client.post("/api/batch", json={"requests": too_many}).status_code == 422
+
+@patch("routes.groups_routes.supabase_admin")
+@patch("auth.supabase_admin")
+@patch("auth.supabase")
+def test_batch_authenticates_once(mock_supabase, _admin, mock_groups):
+    mock_supabase.auth.get_user.return_value = SimpleNamespace(user=MockUser(USER_ID))
+    mock_groups.table.return_value = make_chain([])
+
+    res = client.post("/api/batch", headers={"Authorization": "Bearer token"}, json={"requests": [
+        {"path": "/api/groups"}, {"path": "/api/privacy/blocklist"},
+    ]})
+
+    assert res.status_code == 200
+    assert mock_supabase.auth.get_user.call_count == 1
+    # Unauthenticated batches are refused as a whole
+    assert client.post("/api/batch", json={"requests": [{"path": "/api/groups"}]}).status_code in (401, 403)
+
+def test_slow_and_streaming_items_fail_alone(logged_in):
+    async def slow(scope, receive, send):
+        await asyncio.sleep(5)
+
+    async def streaming(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/csv")]})
+        await send({"type": "http.response.body", "body": b"a,b\n", "more_body": True})
+
+    scope = {"path": "/x"}
+    with patch("routes.batch_routes.ITEM_TIMEOUT_SECONDS", 0.05):
+        status, _, _ = asyncio.run(batch_routes._run(slow, scope))
+    assert status == 504
+    status, _, body = asyncio.run(batch_routes._run(streaming, scope))
+    assert status == 400 and b"Streaming" in body
@@ -0,0 +1,125 @@
+from unittest.mock import patch, MagicMock
+from fastapi.testclient import TestClient
+from main import app
+import catalog_replica
+import file_lock
+
+client = TestClient(app)
+
+def movie(tmdb_id, title, rating=7.0, score=None, count=0):
+    return {
+        "tmdb_id": tmdb_id, "title": title, "release_year": 2000, "genre": "Drama",
+        "poster": None, "rating": rating, "description": "",
+        "user_rating_count": count, "user_rating_sum": 0, "user_rating_hist": None,
+        "user_rating_score": score,
+    }
+
+def make_replica(tmp_path, rows):
+    replica = catalog_replica.Replica(str(tmp_path / "replica.sqlite3"))
+    replica.apply(rows, "2025-01-01T00:00:00+00:00")
+    return replica
+
+def test_search_is_case_insensitive_substring(tmp_path):
+    replica = make_replica(tmp_path, [movie(1, "The Dark Knight", 9.0), movie(2, "Knight and Day", 6.0), movie(3, "Heat", 8.0)])
+
+    rows, total = replica.search("KNIGHT", 0, 10)
+    assert total == 2
+    assert [r["tmdb_id"] for r in rows] == [1, 2]
+
+    rows, total = replica.search("", 1, 1)
+    assert total == 3
+    assert [r["tmdb_id"] for r in rows] == [3]
+
+def test_community_sort_puts_unrated_last(tmp_path):
+    replica = make_replica(tmp_path, [movie(1, "A", 9.0), movie(2, "B", 5.0, score=4.2), movie(3, "C", 6.0, score=3.1)])
+
+    rows, _ = replica.search("", 0, 10, sort="community")
+    assert [r["tmdb_id"] for r in rows] == [2, 3, 1]
+
+def test_apply_rewrites_only_changed_rows(tmp_path):
+    replica = make_replica(tmp_path, [movie(1, "Heat"), movie(2, "Alien")])
+
+    written = replica.apply([movie(1, "Heat"), movie(2, "Aliens")], "2025-01-02T00:00:00+00:00")
+    assert written == 1
+    assert replica.meta("high_water") == "2025-01-02T00:00:00+00:00"
+    # The title index follows the rename
+    assert replica.search("aliens", 0, 10)[1] == 1
+    assert replica.search("alien", 0, 10)[1] == 1
+
+def test_full_sync_drops_deleted_movies(tmp_path):
+    replica = make_replica(tmp_path, [movie(1, "Heat"), movie(2, "Alien")])
+
+    replica.apply([movie(1, "Heat")], None, keep_ids={1})
+    assert replica.count() == 1
+    assert replica.get(2) is None
+    assert replica.search("alien", 0, 10) == ([], 0)
+
+def test_get_replica_skips_stale_replica(tmp_path):
+    replica = make_replica(tmp_path, [movie(1, "Heat")])
+    with patch.object(catalog_replica, "ENABLED", True), patch.object(catalog_replica, "_replica", replica):
+        assert catalog_replica.get_replica() is replica
+        with patch.object(catalog_replica, "MAX_LAG_SECONDS", -1):
+            assert catalog_replica.get_replica() is None
+
+@patch("routes.tmdb_routes.supabase_admin")
+def test_routes_read_from_replica(mock_supabase, tmp_path):
+    replica = make_replica(tmp_path, [movie(550, "Fight Club", 8.4, score=4.5, count=2)])
+    with patch("catalog_replica.get_replica", return_value=replica):
+        res = client.get("/search/movies", params={"q": "fight"})
+        assert res.status_code == 200
+        assert res.json()["total"] == 1
+        assert res.json()["movies"][0]["title"] == "Fight Club"
+
+        res = client.get("/movies/550")
+        assert res.status_code == 200
+        assert res.json()["rating"] == "8.4"
+
+        assert client.get("/movies/1").status_code == 404
+    mock_supabase.table.assert_not_called()
+
+@patch("catalog_replica.supabase_admin")
+def test_sync_pages_through_changes(mock_supabase, tmp_path):
+    pages = [
+        [{**movie(1, "Heat"), "id": "a", "updated_at": "2025-01-01T00:00:00+00:00"}],
+        [{**movie(2, "Alien"), "id": "b", "updated_at": "2025-01-02T00:00:00+00:00"}],
+    ]
+    chain = MagicMock()
+    for method in ("select", "gte", "or_", "order", "limit"):
+        getattr(chain, method).return_value = chain
+    mock_supabase.table.return_value = chain
+
+    replica = catalog_replica.Replica(str(tmp_path / "replica.sqlite3"))
+    with patch.object(catalog_replica, "PAGE_SIZE", 1), patch.object(catalog_replica, "_replica", replica):
+        chain.execute.side_effect = [MagicMock(data=p) for p in pages] + [MagicMock(data=[])]
+        assert catalog_replica.sync() == 2
+
+    assert replica.count() == 2
+    assert replica.meta("high_water") == "2025-01-02T00:00:00+00:00"
+
+@patch("catalog_replica.supabase_admin")
+def test_incremental_sync_rereads_behind_the_high_water_mark(mock_supabase, tmp_path):
+    chain = MagicMock()
+    for method in ("select", "gte", "or_", "order", "limit"):
+        getattr(chain, method).return_value = chain
+    chain.execute.return_value = MagicMock(data=[])
+    mock_supabase.table.return_value = chain
+
+    replica = make_replica(tmp_path, [movie(1, "Heat")])
+    with patch.object(catalog_replica, "_replica", replica), patch.object(catalog_replica, "COMMIT_LAG_SECONDS", 60):
+        catalog_replica.sync()
+    chain.gte.assert_called_once_with("updated_at", "2024-12-31T23:59:00+00:00")
+    assert replica.meta("high_water") == "2025-01-01T00:00:00+00:00"
+
+def test_only_one_process_syncs(tmp_path):
+    path = str(tmp_path / "replica.sqlite3")
+    other = file_lock.try_acquire(path + ".lock")
+    with patch.object(catalog_replica, "REPLICA_PATH", path), patch.object(catalog_replica, "_writer_lock_file", None):
+        assert not catalog_replica._is_writer()
+        other.close()
+        assert catalog_replica._is_writer()
+        catalog_replica._writer_lock_file.close()
+
+def test_healthz_reports_replica_status():
+    res = client.get("/healthz")
+    assert res.status_code == 200
+    assert res.json()["catalog_replica"] == {"enabled": False}
@@ -0,0 +1,95 @@
+import os
+from unittest.mock import patch, MagicMock
+import catalog_snapshot
+import group_genre_stats
+
+MOVIES = [
+    {"tmdb_id": 550, "title": "Fight Club", "release_year": 1999, "genre": "Drama", "poster": "https://img/550.jpg", "rating": 8.4, "description": "An insomniac office worker..."},
+    {"tmdb_id": 11, "title": "Star Wars", "release_year": 1977, "genre": "Adventure, Science Fiction", "poster": None, "rating": 8.2, "description": ""},
+    {"tmdb_id": 129, "title": "千と千尋の神隠し", "release_year": None, "genre": None, "poster": None, "rating": None, "description": "Chihiro…"},
+]
+
+def write_snapshot(tmp_path, movies=MOVIES):
+    path = str(tmp_path / "catalog_snapshot.bin")
+    catalog_snapshot.write(movies, path)
+    return catalog_snapshot.CatalogSnapshot(path)
+
+def test_round_trip(tmp_path):
+    snapshot = write_snapshot(tmp_path)
+
+    assert len(snapshot) == 3
+    assert list(snapshot.tmdb_id) == [11, 129, 550]
+    assert snapshot.get(550) == MOVIES[0]
+    assert snapshot.get(129) == MOVIES[2]
+    assert snapshot.get(11)["genre"] == "Adventure, Science Fiction"
+    assert snapshot.get(12) is None
+    assert 11 in snapshot and 12 not in snapshot
+
+def test_genres_are_a_bitmask(tmp_path):
+    snapshot = write_snapshot(tmp_path)
+
+    assert snapshot.genre_names == ["Adventure", "Science Fiction", "Drama"]
+    assert snapshot.genres_of(11) == ["Adventure", "Science Fiction"]
+    assert snapshot.genres_of(129) == []
+    assert snapshot.genre_mask(["Drama", "Western"]) == 0b100
+    assert list(snapshot.genres & snapshot.genre_mask(["Science Fiction"])) == [0b10, 0, 0]
+
+def test_columns_are_read_only_views(tmp_path):
+    snapshot = write_snapshot(tmp_path)
+    assert not snapshot.tmdb_id.flags.writeable
+
+def test_empty_catalog(tmp_path):
+    snapshot = write_snapshot(tmp_path, [])
+    assert len(snapshot) == 0
+    assert snapshot.get(1) is None
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not_a_snapshot.bin"
+    path.write_bytes(b"x" * 64)
+    try:
+        catalog_snapshot.CatalogSnapshot(str(path))
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+def test_get_snapshot_reopens_replaced_file(tmp_path):
+    path = str(tmp_path / "catalog_snapshot.bin")
+    catalog_snapshot.write(MOVIES[:1], path)
+    with patch.object(catalog_snapshot, "SNAPSHOT_PATH", path), \
+         patch.object(catalog_snapshot, "RELOAD_CHECK_SECONDS", 0), \
+         patch.object(catalog_snapshot, "_snapshot", None):
+        first = catalog_snapshot.get_snapshot()
+        assert len(first) == 1
+        catalog_snapshot.write(MOVIES, path)
+        second = catalog_snapshot.get_snapshot()
+        assert len(second) == 3
+        # The old mapping stays readable for anyone still holding it
+        assert first.get(550)["title"] == "Fight Club"
+
+def test_fetch_catalog_pages_by_tmdb_id():
+    chain = MagicMock()
+    for method in ("select", "gt", "order", "limit"):
+        getattr(chain, method).return_value = chain
+    chain.execute.side_effect = [MagicMock(data=[MOVIES[1]]), MagicMock(data=[MOVIES[0]]), MagicMock(data=[])]
+    client = MagicMock()
+    client.table.return_value = chain
+
+    with patch.object(catalog_snapshot, "PAGE_SIZE", 1):
+        assert catalog_snapshot.fetch_catalog(client) == [MOVIES[1], MOVIES[0]]
+    chain.gt.assert_called_with("tmdb_id", 550)
+
+@patch("group_genre_stats.supabase_admin")
+def test_genre_lookup_uses_snapshot_first(mock_supabase, tmp_path):
+    snapshot = write_snapshot(tmp_path)
+    chain = MagicMock()
+    chain.select.return_value = chain
+    chain.in_.return_value = chain
+    chain.execute.return_value = MagicMock(data=[{"tmdb_id": 999, "genre": "Horror"}])
+    mock_supabase.table.return_value = chain
+
+    with patch("catalog_snapshot.get_snapshot", return_value=snapshot):
+        genres = group_genre_stats._genres_for([550, 129, 999])
+
+    assert genres == {550: ["Drama"], 999: ["Horror"]}
+    # Only the movie missing from the snapshot goes to the database
+    chain.in_.assert_called_once_with("tmdb_id", [999])
@@ -0,0 +1,82 @@
+import zlib
+import pytest
+from unittest.mock import patch
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+import compression
+from compression import CompressionMiddleware
+
+PAYLOAD = b'{"movies":[' + b",".join(b'{"title":"Movie %d","description":"A long description"}' % i for i in range(200)) + b"]}"
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.get("/movies")
+    def movies():
+        return Response(PAYLOAD, media_type="application/json", headers={"ETag": '"v1"'})
+
+    @app.get("/small")
+    def small():
+        return Response(b'{"ok":true}', media_type="application/json")
+
+    @app.get("/image")
+    def image():
+        return Response(b"\x89PNG" * 1000, media_type="image/png")
+
+    @app.get("/export")
+    def export():
+        return StreamingResponse(iter([b'{"n":%d}\n' % i for i in range(100)]), media_type="application/x-ndjson")
+
+    @app.get("/plain")
+    def plain():
+        return PlainTextResponse("x" * 5000)
+
+    compression.reset_stats()
+    return TestClient(app)
+
+def test_negotiation():
+    with patch.object(compression, "brotli", None):
+        assert compression.choose_encoding("gzip, deflate, br") == "gzip"
+    assert compression.choose_encoding("identity") is None
+    assert compression.choose_encoding("gzip;q=0") is None
+
+def test_compresses_large_json(client):
+    res = client.get("/movies", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["content-encoding"] == "gzip"
+    assert res.headers["vary"] == "Accept-Encoding"
+    assert res.headers["etag"] == 'W/"v1"'
+    assert int(res.headers["content-length"]) < len(PAYLOAD) / 5
+    assert res.content == PAYLOAD
+
+def test_skips_small_and_incompressible(client):
+    for path in ("/small", "/image"):
+        res = client.get(path, headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in res.headers
+    assert "content-encoding" not in client.get("/movies", headers={"Accept-Encoding": "identity"}).headers
+
+def test_streams_chunk_by_chunk(client):
+    with client.stream("GET", "/export", headers={"Accept-Encoding": "gzip"}) as res:
+        assert res.headers["content-encoding"] == "gzip"
+        assert "content-length" not in res.headers
+        chunks = list(res.iter_raw())
+    # Each chunk was flushed on its own (a sync flush ends in an empty stored block)
+    assert b"".join(chunks).count(b"\x00\x00\xff\xff") == 100
+    data = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(b"".join(chunks))
+    assert data == b"".join(b'{"n":%d}\n' % i for i in range(100))
+
+def test_route_levels_and_stats(client):
+    with patch.object(compression, "ROUTE_LEVELS", compression._parse_route_levels("/plain=1:1")):
+        assert compression.levels_for("/plain") == (1, 1)
+        res = client.get("/plain", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["content-encoding"] == "gzip"
+    assert res.content == b"x" * 5000
+
+    client.get("/movies", headers={"Accept-Encoding": "gzip"})
+    stats = compression.stats()
+    assert stats["/movies"]["responses"] == 1
+    assert stats["/movies"]["bytes_in"] == len(PAYLOAD)
+    assert stats["/movies"]["ratio"] > 5
+    assert stats["/plain"]["bytes_in"] == 5000
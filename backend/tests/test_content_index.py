@@ -0,0 +1,64 @@
+import os
+from unittest.mock import patch, MagicMock
+from fastapi.testclient import TestClient
+from main import app
+import content_index
+
+client = TestClient(app)
+
+MOVIES = [
+    {"tmdb_id": 1, "title": "Space War", "description": "Rebels fight the galactic empire among the stars."},
+    {"tmdb_id": 2, "title": "Star Rebels", "description": "A rebel pilot battles the empire in deep space."},
+    {"tmdb_id": 3, "title": "Love in Paris", "description": "Two strangers fall in love in Paris."},
+    {"tmdb_id": 4, "title": "Untitled", "description": ""},
+]
+
+def test_tokenize_drops_stopwords_and_folds_plurals():
+    assert content_index.tokenize("The Rebels and the STARS of Boss") == ["rebel", "star", "boss"]
+
+def test_similar_ranks_by_shared_text(tmp_path):
+    assert content_index.update(MOVIES, str(tmp_path)) == 4
+    index = content_index.ContentIndex.open(str(tmp_path))
+
+    assert [m for m, _ in index.similar(1)] == [2]
+    assert index.similar(4) == []
+    assert index.similar(999) == []
+    # rows are L2-normalized, so scores are cosines
+    assert 0 < index.similar(1)[0][1] <= 1
+
+def test_update_replaces_and_appends_rows(tmp_path):
+    content_index.update(MOVIES, str(tmp_path))
+    content_index.update([
+        {"tmdb_id": 4, "title": "Paris Nights", "description": "A love story in Paris."},
+        {"tmdb_id": 5, "title": "Empire of Stars", "description": "The rebels strike back at the empire."},
+    ], str(tmp_path))
+    index = content_index.ContentIndex.open(str(tmp_path))
+
+    assert sorted(index.ids.tolist()) == [1, 2, 3, 4, 5]
+    assert [m for m, _ in index.similar(3)] == [4]
+    batch = index.similar_many([1, 3], 2)
+    assert set(m for m, _ in batch[1]) == {2, 5}
+    assert batch[3][0][0] == 4
+
+def test_old_versions_are_pruned(tmp_path):
+    for _ in range(content_index.KEEP_VERSIONS + 2):
+        content_index.update(MOVIES, str(tmp_path))
+    versions = [d for d in os.listdir(tmp_path) if d.startswith("v")]
+    assert len(versions) == content_index.KEEP_VERSIONS
+
+@patch("routes.tmdb_routes.supabase_admin")
+def test_similar_movies_endpoint_falls_back_to_content(mock_supabase, tmp_path):
+    content_index.update(MOVIES, str(tmp_path))
+    chain = MagicMock()
+    chain.select.return_value = chain
+    chain.in_.return_value = chain
+    chain.execute.return_value = MagicMock(data=[
+        {"tmdb_id": 2, "title": "Star Rebels", "release_year": 2020, "genre": "Science Fiction", "poster": None, "rating": 7.0, "description": ""},
+    ])
+    mock_supabase.table.return_value = chain
+
+    with patch("similarity_index.get_index", return_value=None), \
+         patch("content_index.get_index", return_value=content_index.ContentIndex.open(str(tmp_path))):
+        response = client.get("/movies/1/similar")
+    assert response.status_code == 200
+    assert [m["id"] for m in response.json()] == [2]
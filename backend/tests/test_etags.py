@@ -0,0 +1,70 @@
+from unittest.mock import patch
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+from main import app
+from etags import ConditionalGetMiddleware
+from helpers import make_chain
+
+client = TestClient(app)
+
+@patch("routes.user_routes.supabase_admin")
+def test_profile_revalidates_with_304(mock_supabase):
+    mock_supabase.table.return_value = make_chain([{"user_id": "u1", "username": "ana"}])
+
+    first = client.get("/api/profile/u1")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    again = client.get("/api/profile/u1", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+    mock_supabase.table.return_value = make_chain([{"user_id": "u1", "username": "ana b"}])
+    changed = client.get("/api/profile/u1", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+def test_middleware_leaves_streams_and_own_etags_alone():
+    mini = FastAPI()
+    mini.add_middleware(ConditionalGetMiddleware)
+
+    @mini.get("/stream")
+    def stream():
+        return StreamingResponse(iter([b"a", b"b"]), media_type="text/plain")
+
+    @mini.get("/tagged")
+    def tagged():
+        return Response(b"x", headers={"ETag": '"own"'})
+
+    c = TestClient(mini)
+    res = c.get("/stream", headers={"If-None-Match": "*"})
+    assert (res.status_code, res.content, "etag" in res.headers) == (200, b"ab", False)
+    res = c.get("/tagged", headers={"If-None-Match": "*"})
+    assert (res.status_code, res.headers["etag"]) == (200, '"own"')
+
+@patch("routes.tmdb_routes.catalog_version", return_value="v1")
+@patch("routes.tmdb_routes.supabase_admin")
+@patch("catalog_replica.get_replica", return_value=None)
+def test_catalog_304_skips_the_query(_replica, mock_supabase, _version):
+    mock_supabase.table.return_value = make_chain([{"tmdb_id": 550, "title": "Fight Club"}])
+
+    first = client.get("/movies/550")
+    assert first.status_code == 200
+    assert first.headers["cache-control"].startswith("public")
+    etag = first.headers["etag"]
+
+    mock_supabase.table.reset_mock()
+    again = client.get("/movies/550", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    mock_supabase.table.assert_not_called()
+
+    # Another URL is another entity
+    other = client.get("/search/movies", params={"q": "fight"}, headers={"If-None-Match": etag})
+    assert other.status_code == 200
+    assert other.headers["etag"] != etag
+
+    _version.return_value = "v2"
+    assert client.get("/movies/550", headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,65 @@
+import csv
+import io
+import json
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from main import app
+import account_export
+from helpers import make_chain
+
+client = TestClient(app)
+
+USER_ID = "user-1"
+
+pytestmark = pytest.mark.usefixtures("logged_in")
+
+@pytest.fixture
+def tables():
+    return {
+        "user_movie_ratings": make_chain(pages=[
+            [{"id": 1, "tmdb_id": 10, "rating": 5, "created_at": "2025-01-01"}, {"id": 2, "tmdb_id": 11, "rating": 3, "created_at": "2025-01-02"}],
+            [{"id": 3, "tmdb_id": 12, "rating": 4, "created_at": "2025-01-03"}],
+        ]),
+        "favourite_movies": make_chain(pages=[[{"movie_id": 10, "rank": 1}]]),
+        "group_members": make_chain(pages=[[{"group_id": "g1", "is_admin": True, "joined_at": "2025-01-01"}]]),
+        "blocked_users": make_chain(pages=[[]]),
+    }
+
+@patch("account_export.PAGE_SIZE", 2)
+@patch("account_export.supabase_admin")
+def test_export_ndjson_pages_with_keyset(mock_supabase, tables):
+    mock_supabase.table.side_effect = lambda name: tables[name]
+
+    response = client.get("/api/export")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["type"] for r in rows] == ["rating", "rating", "rating", "favourite", "group"]
+    assert rows[2] == {"type": "rating", "id": 3, "tmdb_id": 12, "rating": 4, "created_at": "2025-01-03"}
+    # The second page continues after the last key of the first
+    tables["user_movie_ratings"].gt.assert_called_once_with("id", 2)
+    tables["user_movie_ratings"].eq.assert_called_with("user_id", USER_ID)
+
+@patch("account_export.supabase_admin")
+def test_export_csv(mock_supabase, tables):
+    mock_supabase.table.side_effect = lambda name: tables[name]
+
+    response = client.get("/api/export?format=csv")
+
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert list(rows[0]) == account_export.CSV_COLUMNS
+    assert rows[0]["type"] == "rating" and rows[0]["tmdb_id"] == "10" and rows[0]["movie_id"] == ""
+    assert rows[-1]["type"] == "group" and rows[-1]["group_id"] == "g1"
+
+@pytest.mark.parametrize("fmt", ["ndjson", "csv"])
+@patch("account_export.supabase_admin")
+def test_export_database_error(mock_supabase, fmt):
+    mock_supabase.table.side_effect = Exception("Database connection failed")
+
+    response = client.get(f"/api/export?format={fmt}")
+
+    assert response.status_code == 500
+    assert "exporting your data" in response.json()["detail"]["message"]
@@ -50,8 +50,9 @@ def test_is_movie_favourite_false(mock_supabase, supabase_chain):
 
 
 # --POST--
+@patch("routes.favourite_movies_routes.group_genre_stats")
 @patch("routes.favourite_movies_routes.supabase_admin")
-def test_add_favourite_movie(mock_supabase, supabase_chain):
+def test_add_favourite_movie(mock_supabase, mock_stats, supabase_chain):
     supabase_chain.execute.return_value.data = [{"user_id": "123", "movie_id": 101}]
     mock_supabase.table.return_value = supabase_chain
 
@@ -60,14 +61,67 @@ def test_add_favourite_movie(mock_supabase, supabase_chain):
     assert response.json()["message"] == "New favourite movie added successfully"
     assert response.json()["user"] == "123"
     assert response.json()["movie"] == 101
+    mock_stats.record_favourite_changes.assert_called_once_with("123", added=[{"user_id": "123", "movie_id": 101}])
+
+@patch("routes.favourite_movies_routes.group_recommendations")
+@patch("routes.favourite_movies_routes.group_genre_stats")
+@patch("routes.favourite_movies_routes.supabase_admin")
+def test_apply_favourite_movie_ops(mock_supabase, mock_stats, mock_recs):
+    mock_supabase.rpc.return_value.execute.return_value = MagicMock(data={
+        "before": [{"movie_id": 101, "rank": 1}, {"movie_id": 202, "rank": 2}, {"movie_id": 303, "rank": 3}],
+        "after": [{"movie_id": 303, "rank": 1}, {"movie_id": 101, "rank": 2}, {"movie_id": 404, "rank": 3}],
+    })
+    ops = [
+        {"op": "remove", "movie_id": 202},
+        {"op": "move", "movie_id": 303, "position": 1},
+        {"op": "add", "movie_id": 404},
+    ]
+
+    response = client.post("/api/favourite_movies/123/batch", json={"ops": ops})
+
+    assert response.status_code == 200
+    assert response.json()["movie_ids"] == [303, 101, 404]
+    # One database call for the whole batch
+    mock_supabase.rpc.assert_called_once_with("apply_favourite_ops", {"p_user_id": "123", "p_ops": ops})
+    mock_stats.record_favourite_changes.assert_called_once_with(
+        "123",
+        added=[{"movie_id": 303, "rank": 1}, {"movie_id": 101, "rank": 2}, {"movie_id": 404, "rank": 3}],
+        removed=[{"movie_id": 101, "rank": 1}, {"movie_id": 202, "rank": 2}, {"movie_id": 303, "rank": 3}],
+    )
+    mock_recs.invalidate_user.assert_called_once_with("123")
+
+def test_apply_favourite_movie_ops_validates_ops():
+    response = client.post("/api/favourite_movies/123/batch", json={"ops": [{"op": "move", "movie_id": 1}]})
+    assert response.status_code == 422
+    response = client.post("/api/favourite_movies/123/batch", json={"ops": [{"op": "swap", "movie_id": 1}]})
+    assert response.status_code == 422
+
+@patch("routes.favourite_movies_routes.group_genre_stats")
+@patch("routes.favourite_movies_routes.supabase_admin")
+def test_reorder_favourite_movies_is_one_call(mock_supabase, mock_stats):
+    mock_supabase.rpc.return_value.execute.return_value = MagicMock(data={
+        "before": [{"movie_id": 101, "rank": 1}, {"movie_id": 202, "rank": 2}],
+        "after": [{"movie_id": 202, "rank": 1}, {"movie_id": 101, "rank": 2}],
+    })
+
+    response = client.post("/api/favourite_movies/123", json=[202, 101])
+
+    assert response.status_code == 200
+    mock_supabase.rpc.assert_called_once_with("apply_favourite_ops", {"p_user_id": "123", "p_ops": [
+        {"op": "move", "movie_id": 101, "position": 1},
+        {"op": "move", "movie_id": 202, "position": 1},
+    ]})
+    mock_supabase.table.assert_not_called()
 
 # --DELETE--
+@patch("routes.favourite_movies_routes.group_genre_stats")
 @patch("routes.favourite_movies_routes.supabase_admin")
-def test_remove_favourite_movie(mock_supabase, supabase_chain):
+def test_remove_favourite_movie(mock_supabase, mock_stats, supabase_chain):
     supabase_chain.execute.return_value.data = [{"user_id": "123", "movie_id": 101}]
     mock_supabase.table.return_value = supabase_chain
 
     response = client.delete("/api/favourite_movies/123/101")
     assert response.status_code == 200
     assert response.json()["message"] == "Favourite movie removed successfully"
-    assert response.json()["movie"] == 101
\ No newline at end of file
+    assert response.json()["movie"] == 101
+    mock_stats.record_favourite_changes.assert_called_once_with("123", removed=[{"user_id": "123", "movie_id": 101}])
@@ -0,0 +1,82 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from fastapi.testclient import TestClient
+from main import app
+import catalog_replica
+import genres
+from helpers import make_chain
+
+# The real loader; the autouse fixture below replaces it
+load_genre_table = genres.genre_table
+
+client = TestClient(app)
+
+GENRE_TABLE = {"action": (0, "Action"), "drama": (1, "Drama"), "comedy": (2, "Comedy")}
+
+@pytest.fixture(autouse=True)
+def genre_table():
+    with patch("genres.genre_table", return_value=GENRE_TABLE):
+        yield
+
+def test_mask_round_trip():
+    assert genres.mask_for(["action", " Comedy "]) == 0b101
+    assert genres.names_for(0b101) == ["Action", "Comedy"]
+    assert genres.mask_for(["Action", "Western"], ignore_unknown=True) == 0b1
+    with pytest.raises(ValueError):
+        genres.mask_for(["Western"])
+
+@patch("genres.supabase_admin")
+def test_failed_load_is_retried(mock_supabase):
+    genres.invalidate()
+    mock_supabase.table.return_value.select.return_value.order.return_value.execute.side_effect = [
+        Exception("timeout"), MagicMock(data=[{"bit": 5, "name": "Action"}]),
+    ]
+    with patch("genres.genre_table", load_genre_table):
+        assert genres.genre_table() == {}
+        assert genres.mask_for(["Action"]) == 1 << 5
+        assert genres.mask_for(["action"]) == 1 << 5
+    assert mock_supabase.table.call_count == 2
+    genres.invalidate()
+
+def test_movie_genres_falls_back_to_text_column():
+    assert genres.movie_genres({"genre_mask": 0b110, "genre": "Drama"}) == ["Drama", "Comedy"]
+    assert genres.movie_genres({"genre_mask": 0, "genre": "Drama, Horror"}) == ["Drama", "Horror"]
+    assert genres.movie_genres({"genre": None}) == []
+
+@patch("routes.tmdb_routes.catalog_version", return_value=None)
+@patch("routes.tmdb_routes.supabase_admin")
+def test_search_filters_by_genre_mask(mock_supabase, _version):
+    chain = make_chain([{"tmdb_id": 1, "title": "Heat", "genre": "Action, Drama", "genre_mask": 0b11, "rating": 8.3}], count=1)
+    mock_supabase.rpc.return_value = chain
+
+    res = client.get("/search/movies", params={"genre": "Action,Comedy", "q": "heat"})
+
+    assert res.status_code == 200
+    assert res.json()["total"] == 1
+    assert res.json()["movies"][0]["genre"] == "Action, Drama"
+    mock_supabase.rpc.assert_any_call("movies_with_genres", {"p_mask": 0b101}, count="exact")
+    chain.ilike.assert_called_with("title", "%heat%")
+    mock_supabase.table.assert_not_called()
+
+@patch("routes.tmdb_routes.supabase_admin")
+def test_search_rejects_unknown_genre(mock_supabase):
+    res = client.get("/search/movies", params={"genre": "Action,Western"})
+    assert res.status_code == 400
+    assert "Western" in res.json()["detail"]
+    mock_supabase.rpc.assert_not_called()
+
+def test_replica_filters_by_genre_mask(tmp_path):
+    def movie(tmdb_id, title, mask, rating):
+        return {"tmdb_id": tmdb_id, "title": title, "rating": rating, "genre_mask": mask}
+
+    replica = catalog_replica.Replica(str(tmp_path / "replica.sqlite3"))
+    replica.apply([movie(1, "Heat", 0b011, 8.3), movie(2, "Heat Wave", 0b100, 6.0), movie(3, "Airplane!", 0b100, 7.7)], None)
+
+    rows, total = replica.search("", 0, 10, genre_mask=0b100)
+    assert (total, [r["tmdb_id"] for r in rows]) == (2, [3, 2])
+
+    rows, total = replica.search("heat", 0, 10, genre_mask=0b101)
+    assert (total, [r["tmdb_id"] for r in rows]) == (2, [1, 2])
+
+    rows, total = replica.search("heat", 0, 10, genre_mask=0b010)
+    assert (total, [r["tmdb_id"] for r in rows]) == (1, [1])
@@ -0,0 +1,80 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from main import app
+import group_events
+from helpers import make_chain
+
+client = TestClient(app)
+USER_ID = "u1"
+pytestmark = pytest.mark.usefixtures("logged_in")
+
+def test_fan_out_and_slow_consumers():
+    async def scenario():
+        with patch.object(group_events, "QUEUE_SIZE", 2):
+            a, b, other = group_events.subscribe("g1"), group_events.subscribe("g1"), group_events.subscribe("g2")
+            group_events.publish("g1", group_events.GROUP_UPDATED, {"group_name": "Film club"})
+            assert await a.get() == b'event: group_updated\ndata: {"group_name":"Film club"}\n\n'
+            assert other.queue.empty()
+
+            # b never reads: it is dropped once its queue is full
+            group_events.publish("g1", "x", 1)
+            group_events.publish("g1", "x", 2)
+            assert await b.get() is None
+            assert group_events.subscriber_count("g1") == 1
+
+            # Publishing from a worker thread goes through the loop
+            await asyncio.to_thread(group_events.publish, "g2", "x", 3)
+            assert await asyncio.wait_for(other.get(), 1) == b"event: x\ndata: 3\n\n"
+            for sub in (a, other):
+                group_events.unsubscribe(sub)
+        assert group_events.subscriber_count() == 0
+
+    asyncio.run(scenario())
+
+def test_memory_backend_warns_with_several_workers(capsys):
+    with patch.object(group_events, "BACKEND", "memory"), patch.object(group_events, "WORKERS", 2):
+        asyncio.run(group_events.run_backend())
+    assert "GROUP_EVENTS_BACKEND=redis" in capsys.readouterr().out
+
+    with patch.object(group_events, "BACKEND", "memory"), patch.object(group_events, "WORKERS", 1):
+        asyncio.run(group_events.run_backend())
+    assert capsys.readouterr().out == ""
+
+@patch("routes.groups_routes.supabase_admin")
+def test_events_stream_requires_membership(mock_supabase):
+    mock_supabase.table.return_value = make_chain([])
+    assert client.get("/api/groups/g1/events").status_code == 403
+
+def test_stream_body():
+    async def scenario():
+        with patch.object(group_events, "QUEUE_SIZE", 1):
+            sub = group_events.subscribe("g1")
+            body = group_events.stream(sub)
+            assert b"event: ready" in await body.__anext__()
+            group_events.publish("g1", group_events.MEMBER_JOINED, {"user_id": "u2"})
+            assert await body.__anext__() == b'event: member_joined\ndata: {"user_id":"u2"}\n\n'
+            with patch.object(group_events, "HEARTBEAT_SECONDS", 0.01):
+                assert await body.__anext__() == b": keep-alive\n\n"
+            # Overflowing the queue ends the stream
+            group_events.publish("g1", "x", 1)
+            group_events.publish("g1", "x", 2)
+            with pytest.raises(StopAsyncIteration):
+                await body.__anext__()
+        assert group_events.subscriber_count("g1") == 0
+
+    asyncio.run(scenario())
+
+@patch("group_events.publish")
+@patch("routes.groups_routes.supabase_admin")
+def test_group_update_is_published(mock_supabase, mock_publish):
+    group = {"id": "g1", "creator_user_id": "u1", "created_at": "2024-01-01T00:00:00Z", "group_name": "Film club", "group_colour": None}
+    mock_supabase.table.return_value = make_chain([{"is_admin": True, **group}])
+
+    assert client.put("/api/groups/g1", json={"group_name": "Film club"}).status_code == 200
+    mock_publish.assert_called_once_with("g1", group_events.GROUP_UPDATED, {**group, "updated_by": "u1"})
+
+def test_events_cannot_be_batched():
+    res = client.post("/api/batch", json={"requests": [{"path": "/api/groups/g1/events"}]})
+    assert res.status_code == 400
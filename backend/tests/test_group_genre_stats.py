@@ -0,0 +1,89 @@
+import pytest
+from unittest.mock import patch
+import group_genre_stats
+from helpers import make_chain
+
+@pytest.fixture
+def tables():
+    return {
+        "group_members": make_chain([{"group_id": "g1"}, {"group_id": "g2"}]),
+        "movies": make_chain([{"tmdb_id": 1, "genre": "Action"}, {"tmdb_id": 2, "genre": "Drama"}, {"tmdb_id": 3, "genre": None}]),
+        "favourite_movies": make_chain([{"user_id": "u1", "movie_id": 1, "rank": 1}, {"user_id": "u1", "movie_id": 2, "rank": None}]),
+        "group_genre_stats": make_chain([]),
+    }
+
+def rpc_deltas(mock_supabase):
+    name, params = mock_supabase.rpc.call_args.args
+    assert name == "apply_group_genre_deltas"
+    return params["p_group_ids"], {d["genre"]: d for d in params["p_deltas"]}
+
+@patch("group_genre_stats.supabase_admin")
+def test_added_favourite_counts_in_every_group(mock_supabase, tables):
+    mock_supabase.table.side_effect = lambda name: tables[name]
+
+    group_genre_stats.record_favourite_changes("u1", added=[{"movie_id": 1, "rank": 4}, {"movie_id": 3, "rank": 5}])
+
+    group_ids, deltas = rpc_deltas(mock_supabase)
+    assert group_ids == ["g1", "g2"]
+    # movie 3 has no genre and is skipped
+    assert deltas == {"Action": {"genre": "Action", "fav_count": 1, "rank_sum": 4.0, "rank_count": 1}}
+
+@patch("group_genre_stats.supabase_admin")
+def test_reorder_only_moves_rank_sums(mock_supabase, tables):
+    mock_supabase.table.side_effect = lambda name: tables[name]
+
+    group_genre_stats.record_favourite_changes(
+        "u1",
+        added=[{"movie_id": 1, "rank": 2}, {"movie_id": 2, "rank": 1}],
+        removed=[{"movie_id": 1, "rank": 1}, {"movie_id": 2, "rank": 2}],
+    )
+
+    _, deltas = rpc_deltas(mock_supabase)
+    assert deltas["Action"] == {"genre": "Action", "fav_count": 0, "rank_sum": 1.0, "rank_count": 0}
+    assert deltas["Drama"] == {"genre": "Drama", "fav_count": 0, "rank_sum": -1.0, "rank_count": 0}
+
+@patch("group_genre_stats.supabase_admin")
+def test_member_leaving_subtracts_favourites(mock_supabase, tables):
+    mock_supabase.table.side_effect = lambda name: tables[name]
+
+    group_genre_stats.record_membership_change("g1", "u1", joined=False)
+
+    group_ids, deltas = rpc_deltas(mock_supabase)
+    assert group_ids == ["g1"]
+    assert deltas["Action"] == {"genre": "Action", "fav_count": -1, "rank_sum": -1.0, "rank_count": -1}
+    # null rank: counted, but not in the rank average
+    assert deltas["Drama"] == {"genre": "Drama", "fav_count": -1, "rank_sum": 0.0, "rank_count": 0}
+
+@patch("group_genre_stats.supabase_admin")
+def test_failures_do_not_propagate(mock_supabase):
+    mock_supabase.table.side_effect = Exception("Database connection failed")
+
+    group_genre_stats.record_favourite_changes("u1", added=[{"movie_id": 1, "rank": 1}])
+    mock_supabase.rpc.assert_not_called()
+
+@patch("group_genre_stats.supabase_admin")
+def test_rebuild_replaces_group_rows(mock_supabase, tables):
+    tables["group_members"] = make_chain([{"user_id": "u1"}])
+    mock_supabase.table.side_effect = lambda name: tables[name]
+
+    assert group_genre_stats.rebuild("g1") == 1
+
+    stats = tables["group_genre_stats"]
+    stats.delete.assert_called_once()
+    rows = stats.insert.call_args.args[0]
+    assert {r["genre"]: r["fav_count"] for r in rows} == {"Action": 1, "Drama": 1}
+    assert all(r["group_id"] == "g1" for r in rows)
+
+@patch("group_genre_stats.supabase_admin")
+def test_favourite_counts_in_each_of_its_genres(mock_supabase, tables):
+    tables["movies"] = make_chain([{"tmdb_id": 1, "genre": "Action, Comedy", "genre_mask": 0b101}])
+    mock_supabase.table.side_effect = lambda name: tables[name]
+
+    with patch("genres.genre_table", return_value={"action": (0, "Action"), "drama": (1, "Drama"), "comedy": (2, "Comedy")}):
+        group_genre_stats.record_favourite_changes("u1", added=[{"movie_id": 1, "rank": 2}])
+
+    _, deltas = rpc_deltas(mock_supabase)
+    assert deltas == {
+        "Action": {"genre": "Action", "fav_count": 1, "rank_sum": 2.0, "rank_count": 1},
+        "Comedy": {"genre": "Comedy", "fav_count": 1, "rank_sum": 2.0, "rank_count": 1},
+    }
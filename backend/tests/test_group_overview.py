@@ -0,0 +1,72 @@
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from main import app
+from helpers import make_chain
+
+client = TestClient(app)
+
+USER_ID = "user-1"
+GROUP_ID = "group-1"
+
+pytestmark = pytest.mark.usefixtures("logged_in")
+
+@pytest.fixture
+def tables():
+    return {
+        "group_members": make_chain([
+            {"user_id": USER_ID, "group_id": GROUP_ID, "is_admin": True, "joined_at": "2025-01-01", "user_email": "a@example.com"},
+            {"user_id": "user-2", "group_id": GROUP_ID, "is_admin": False, "joined_at": "2025-01-02", "user_email": None, "profiles": {"email": "b@example.com"}},
+        ]),
+        "groups": make_chain([
+            {"id": GROUP_ID, "creator_user_id": USER_ID, "created_at": "2025-01-01", "group_name": "Film Club", "group_colour": "#ff0000"},
+        ]),
+        "group_genre_stats": make_chain([
+            {"genre": "Drama", "fav_count": 1, "rank_sum": 1, "rank_count": 1},
+            {"genre": "Action", "fav_count": 2, "rank_sum": 3, "rank_count": 2},
+        ]),
+    }
+
+@patch("group_genre_stats.supabase_admin")
+@patch("routes.groups_routes.supabase_admin")
+def test_group_overview_returns_all_sections(mock_supabase, mock_stats_supabase, tables):
+    mock_supabase.table.side_effect = lambda name: tables[name]
+    mock_stats_supabase.table.side_effect = lambda name: tables[name]
+
+    response = client.get(f"/api/groups/{GROUP_ID}/overview")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["details"]["group_name"] == "Film Club"
+    assert [m["user_email"] for m in data["members"]] == ["a@example.com", "b@example.com"]
+    assert data["top_genre"]["top_genre"] == "Action"
+    assert data["top_genre"]["reason"] == {"count": 2, "avg_rank": 1.5}
+    # one query per table, membership is checked from the member list
+    assert [c.args[0] for c in mock_supabase.table.call_args_list].count("group_members") == 1
+
+@patch("routes.groups_routes.supabase_admin")
+def test_group_overview_include_subset(mock_supabase, tables):
+    mock_supabase.table.side_effect = lambda name: tables[name]
+
+    response = client.get(f"/api/groups/{GROUP_ID}/overview?include=members")
+    assert response.status_code == 200
+    data = response.json()
+    assert "members" in data
+    assert "details" not in data and "top_genre" not in data
+    tables["group_genre_stats"].select.assert_not_called()
+
+@patch("routes.groups_routes.supabase_admin")
+def test_group_overview_unknown_include(mock_supabase, tables):
+    mock_supabase.table.side_effect = lambda name: tables[name]
+
+    response = client.get(f"/api/groups/{GROUP_ID}/overview?include=details,posters")
+    assert response.status_code == 400
+
+@patch("routes.groups_routes.supabase_admin")
+def test_group_overview_requires_membership(mock_supabase, tables):
+    tables["group_members"] = make_chain([
+        {"user_id": "someone-else", "group_id": GROUP_ID, "is_admin": True, "joined_at": "2025-01-01", "user_email": None},
+    ])
+    mock_supabase.table.side_effect = lambda name: tables[name]
+
+    response = client.get(f"/api/groups/{GROUP_ID}/overview")
+    assert response.status_code == 403
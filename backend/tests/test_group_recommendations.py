@@ -0,0 +1,122 @@
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from main import app
+import group_recommendations
+from cursors import encode_cursor
+from helpers import make_chain
+
+client = TestClient(app)
+
+USER_ID = "user-1"
+GROUP_ID = "group-1"
+
+@pytest.fixture(autouse=True)
+def empty_cache(logged_in):
+    group_recommendations._cache.clear()
+    yield
+    group_recommendations._cache.clear()
+
+def movie(tmdb_id, genre, rating):
+    return {"tmdb_id": tmdb_id, "title": f"Movie {tmdb_id}", "release_year": 2020, "genre": genre, "poster": None, "rating": rating, "description": ""}
+
+GENRE_TABLE = {"action": (0, "Action"), "drama": (1, "Drama"), "comedy": (2, "Comedy")}
+
+@pytest.fixture(autouse=True)
+def genre_table():
+    with patch("genres.genre_table", return_value=GENRE_TABLE):
+        yield
+
+@pytest.fixture
+def tables():
+    return {
+        "group_members": make_chain([{"user_id": USER_ID}, {"user_id": "user-2"}]),
+        "group_genre_stats": make_chain([
+            {"genre": "Action", "fav_count": 3, "rank_sum": 3, "rank_count": 3},
+            {"genre": "Drama", "fav_count": 1, "rank_sum": 5, "rank_count": 1},
+        ]),
+        "favourite_movies": make_chain([{"user_id": USER_ID, "movie_id": 1, "rank": 1}]),
+        "user_movie_ratings": make_chain([{"tmdb_id": 2}]),
+        "movies": make_chain([
+            movie(1, "Action", 9.0), movie(2, "Action", 8.5), movie(3, "Drama", 9.5),
+            movie(4, "Action", 7.0), movie(5, "Action", 6.0),
+        ]),
+    }
+
+def test_rank_candidates_weights_genres_and_excludes_seen():
+    weights = {"Action": 1.0, "Drama": 0.5}
+    movies = [movie(1, "Action", 8.0), movie(2, "Drama", 9.0), movie(3, "Comedy", 9.9), movie(4, "Action", 8.0)]
+
+    ranked = group_recommendations.rank_candidates(movies, weights, exclude={4})
+
+    assert [m["tmdb_id"] for _, m in ranked] == [1, 2]
+    assert [score for score, _ in ranked] == [0.8, 0.45]
+
+def test_rank_candidates_sums_weights_of_all_genres():
+    weights = {"Action": 1.0, "Drama": 0.5}
+    movies = [movie(1, "Action", 8.0), {**movie(2, None, 8.0), "genre_mask": 0b11}]
+
+    ranked = group_recommendations.rank_candidates(movies, weights, exclude=set())
+
+    assert [(score, m["tmdb_id"]) for score, m in ranked] == [(1.2, 2), (0.8, 1)]
+
+def test_page_after_continues_from_cursor_key():
+    ranked = [(0.9, movie(1, "Action", 9)), (0.8, movie(2, "Action", 8)), (0.8, movie(3, "Action", 8)), (0.7, movie(4, "Action", 7))]
+
+    page, key = group_recommendations.page_after(ranked, None, 2)
+    assert [m["tmdb_id"] for _, m in page] == [1, 2]
+    assert key == [0.8, 2]
+
+    page, key = group_recommendations.page_after(ranked, key, 2)
+    assert [m["tmdb_id"] for _, m in page] == [3, 4]
+    assert key is None
+
+@patch("group_recommendations.supabase_admin")
+@patch("group_genre_stats.supabase_admin")
+@patch("routes.groups_routes.supabase_admin")
+def test_group_recommendations_endpoint_pages_and_caches(mock_supabase, mock_stats_supabase, mock_recs_supabase, tables):
+    for mock in (mock_supabase, mock_stats_supabase, mock_recs_supabase):
+        mock.table.side_effect = lambda name: tables[name]
+    mock_recs_supabase.rpc.return_value = tables["movies"]
+
+    response = client.get(f"/api/groups/{GROUP_ID}/recommendations?limit=2")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["top_genre"] == "Action"
+    # movie 1 is a favourite and movie 2 is rated, so both are left out
+    assert [m["id"] for m in data["movies"]] == [4, 5]
+    assert data["next_cursor"]
+
+    response = client.get(f"/api/groups/{GROUP_ID}/recommendations?limit=2&cursor={data['next_cursor']}")
+    assert response.status_code == 200
+    assert [m["id"] for m in response.json()["movies"]] == [3]
+    assert response.json()["next_cursor"] is None
+
+    # candidates come from one genre-mask query (Action | Drama)
+    mock_recs_supabase.rpc.assert_called_once_with("movies_with_genres", {"p_mask": 0b11})
+    # second page came from the cache
+    assert tables["movies"].execute.call_count == 1
+
+    group_recommendations.invalidate_user("user-2")
+    client.get(f"/api/groups/{GROUP_ID}/recommendations")
+    assert tables["movies"].execute.call_count == 2
+
+@patch("routes.groups_routes.supabase_admin")
+def test_group_recommendations_bad_cursor(mock_supabase, tables):
+    mock_supabase.table.side_effect = lambda name: tables[name]
+
+    response = client.get(f"/api/groups/{GROUP_ID}/recommendations?cursor=not-a-cursor")
+    assert response.status_code == 400
+    # Well-formed cursors of the wrong shape are refused before any query
+    for key in ([0.5], [0.5, "550"], ["high", 550], [0.5, 550, 1]):
+        response = client.get(f"/api/groups/{GROUP_ID}/recommendations", params={"cursor": encode_cursor(key)})
+        assert response.status_code == 400
+    mock_supabase.table.assert_not_called()
+
+@patch("routes.groups_routes.supabase_admin")
+def test_group_recommendations_requires_membership(mock_supabase, tables):
+    tables["group_members"] = make_chain([{"user_id": "someone-else"}])
+    mock_supabase.table.side_effect = lambda name: tables[name]
+
+    response = client.get(f"/api/groups/{GROUP_ID}/recommendations")
+    assert response.status_code == 403
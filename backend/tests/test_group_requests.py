@@ -0,0 +1,101 @@
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from main import app
+from cursors import decode_cursor, encode_cursor
+from helpers import make_chain
+
+client = TestClient(app)
+USER_ID = "u1"
+pytestmark = pytest.mark.usefixtures("logged_in")
+
+def movie_uuid(tmdb_id):
+    return f"00000000-0000-0000-0000-{tmdb_id:012d}"
+
+def queue_row(tmdb_id, votes, requested_at, voted=False):
+    return {
+        "movie_id": movie_uuid(tmdb_id), "requested_by_user_id": "u2", "requested_at": requested_at, "vote_count": votes,
+        "movies": {"tmdb_id": tmdb_id, "title": f"Movie {tmdb_id}"},
+        "my_vote": [{"user_id": "u1"}] if voted else [],
+    }
+
+@patch("routes.groups_routes.supabase_admin")
+def test_queue_is_one_query_with_cursor(mock_supabase):
+    members = make_chain([{"is_admin": False}])
+    queue = make_chain([queue_row(550, 3, "2024-01-02T00:00:00Z", voted=True), queue_row(13, 1, "2024-01-01T00:00:00Z"), queue_row(8, 1, "2024-01-03T00:00:00Z")])
+    mock_supabase.table.side_effect = lambda name: members if name == "group_members" else queue
+
+    res = client.get("/api/groups/g1/requests", params={"limit": 2})
+
+    assert res.status_code == 200
+    body = res.json()
+    assert [(r["tmdb_id"], r["vote_count"], r["voted"]) for r in body["requests"]] == [(550, 3, True), (13, 1, False)]
+    assert body["requests"][0]["movie"]["title"] == "Movie 550"
+    assert decode_cursor(body["next_cursor"]) == [1, "2024-01-01T00:00:00Z", movie_uuid(13)]
+    queue.eq.assert_any_call("my_vote.user_id", "u1")
+    queue.order.assert_any_call("vote_count", desc=True)
+
+    # The cursor continues strictly after the last row
+    client.get("/api/groups/g1/requests", params={"cursor": body["next_cursor"]})
+    queue.or_.assert_called_once()
+    assert 'vote_count.lt.1,' in queue.or_.call_args[0][0]
+
+@patch("routes.groups_routes.supabase_admin")
+def test_queue_rejects_bad_cursor(mock_supabase):
+    res = client.get("/api/groups/g1/requests", params={"cursor": encode_cursor(["x"])})
+    assert res.status_code == 400
+    # Strings that would otherwise be spliced into the or_ filter
+    for key in ([1, "2024-01-01T00:00:00Z", "m13),vote_count.gt.0"], [1, '2024-01-01",vote_count.gt.0', movie_uuid(13)]):
+        res = client.get("/api/groups/g1/requests", params={"cursor": encode_cursor(key)})
+        assert res.status_code == 400
+    mock_supabase.table.assert_not_called()
+
+@patch("group_events.publish")
+@patch("routes.groups_routes.supabase_admin")
+def test_batched_votes(mock_supabase, mock_publish):
+    mock_supabase.table.return_value = make_chain([{"is_admin": False}])
+    mock_supabase.rpc.return_value = make_chain([{"tmdb_id": 550, "vote_count": 4, "voted": True}, {"tmdb_id": 13, "vote_count": 0, "voted": False}])
+
+    res = client.post("/api/groups/g1/requests/votes", json={"votes": [
+        {"tmdb_id": 550, "vote": False}, {"tmdb_id": 13, "vote": False}, {"tmdb_id": 99}, {"tmdb_id": 550},
+    ]})
+
+    assert res.status_code == 200
+    assert res.json()["not_found"] == [99]
+    mock_supabase.rpc.assert_called_once_with("apply_group_request_votes", {
+        "p_group_id": "g1", "p_user_id": "u1",
+        "p_votes": [{"tmdb_id": 550, "vote": True}, {"tmdb_id": 13, "vote": False}, {"tmdb_id": 99, "vote": True}],
+    })
+    mock_publish.assert_called_once()
+
+@patch("routes.groups_routes.supabase_admin")
+def test_non_members_cannot_request(mock_supabase):
+    mock_supabase.table.return_value = make_chain([])
+    assert client.post("/api/groups/g1/requests", json={"tmdb_id": 550}).status_code == 403
+    mock_supabase.rpc.assert_not_called()
+
+@patch("group_events.publish")
+@patch("routes.groups_routes.supabase_admin")
+def test_request_publishes_event(mock_supabase, mock_publish):
+    mock_supabase.table.return_value = make_chain([{"is_admin": False}])
+    created = {"created": True, "tmdb_id": 550, "requested_by_user_id": "u1", "requested_at": "2024-01-01T00:00:00Z", "vote_count": 1}
+    mock_supabase.rpc.return_value = make_chain(created)
+
+    res = client.post("/api/groups/g1/requests", json={"tmdb_id": 550})
+
+    assert res.json() == created
+    mock_publish.assert_called_once_with("g1", "movie_requested", created)
+
+@patch("group_events.publish")
+@patch("routes.groups_routes.supabase_admin")
+def test_removing_a_request_publishes_event(mock_supabase, mock_publish):
+    members = make_chain([{"is_admin": False}])
+    requests = make_chain([{"movie_id": movie_uuid(550), "requested_by_user_id": "u1", "movies": {"tmdb_id": 550}}])
+    mock_supabase.table.side_effect = lambda name: members if name == "group_members" else requests
+
+    res = client.delete("/api/groups/g1/requests/550")
+
+    assert res.status_code == 200
+    requests.delete.assert_called_once()
+    requests.eq.assert_any_call("movie_id", movie_uuid(550))
+    mock_publish.assert_called_once_with("g1", "request_removed", {"tmdb_id": 550, "removed_by": "u1"})
@@ -0,0 +1,97 @@
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from main import app
+import movie_json
+from routes.tmdb_routes import PaginatedMoviesResponse, movie_fields, parse_fields, select_columns, transform_db_movie
+from helpers import make_chain
+
+client = TestClient(app)
+
+ROWS = [
+    {"tmdb_id": 550, "title": "Fight Club", "release_year": 1999, "genre": "Drama", "poster": "https://img/550.jpg",
+     "rating": 8.433, "description": "An insomniac…", "user_rating_count": 3, "user_rating_sum": 13, "user_rating_hist": [0, 0, 1, 0, 2]},
+    {"tmdb_id": 129, "title": "千と千尋の神隠し", "release_year": None, "genre": None, "poster": None, "rating": None, "description": None},
+]
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    movie_json.clear_cache()
+    yield
+    movie_json.clear_cache()
+
+def test_list_body_matches_response_model_bytes():
+    body = movie_json.list_body(
+        [movie_json.movie_fragment(m, movie_fields) for m in ROWS], total=2, page=1, page_size=24, total_pages=1
+    )
+    expected = PaginatedMoviesResponse(movies=[transform_db_movie(m) for m in ROWS], total=2, page=1, page_size=24, total_pages=1)
+    assert body == expected.model_dump_json().encode()
+
+def test_stdlib_fallback_matches_too():
+    with patch.object(movie_json, "orjson", None), patch.object(movie_json, "CACHE_SIZE", 0):
+        body = movie_json.array_body(movie_json.movie_fragment(m, movie_fields) for m in ROWS)
+    assert body == b"[" + b",".join(transform_db_movie(m).model_dump_json().encode() for m in ROWS) + b"]"
+
+def test_fragment_cache_checks_source_fields():
+    calls = []
+    def to_fields(m):
+        calls.append(m["tmdb_id"])
+        return movie_fields(m)
+
+    first = movie_json.movie_fragment(ROWS[0], to_fields)
+    assert movie_json.movie_fragment(dict(ROWS[0]), to_fields) is first
+    assert calls == [550]
+
+    changed = movie_json.movie_fragment({**ROWS[0], "user_rating_count": 4, "user_rating_sum": 18}, to_fields)
+    assert changed != first
+    assert b'"user_rating_count":4' in changed
+    assert calls == [550, 550]
+
+def test_fragment_cache_is_bounded():
+    with patch.object(movie_json, "CACHE_SIZE", 2):
+        for tmdb_id in range(5):
+            movie_json.movie_fragment({"tmdb_id": tmdb_id, "title": "x"}, movie_fields)
+    assert movie_json.cache_size() == 2
+
+@patch("routes.tmdb_routes.supabase_admin")
+def test_search_uses_fast_path(mock_supabase):
+    mock_supabase.table.return_value = make_chain(ROWS, count=2)
+
+    fast = client.get("/search/movies")
+    with patch.object(movie_json, "ENABLED", False):
+        slow = client.get("/search/movies")
+
+    assert fast.status_code == slow.status_code == 200
+    assert fast.headers["content-type"] == "application/json"
+    assert fast.content == slow.content
+
+def test_parse_fields():
+    assert parse_fields("") is None
+    assert parse_fields("rating, title,poster") == ("id", "title", "poster", "rating")
+    assert select_columns(parse_fields("title,user_rating_avg")) == "tmdb_id,title,user_rating_count,user_rating_sum"
+    with pytest.raises(ValueError):
+        parse_fields("title,budget")
+
+@pytest.mark.parametrize("fast", [True, False])
+@patch("routes.tmdb_routes.catalog_version", return_value=None)
+@patch("catalog_replica.get_replica", return_value=None)
+@patch("routes.tmdb_routes.supabase_admin")
+def test_sparse_fieldset_narrows_query_and_body(mock_supabase, _replica, _version, fast):
+    chain = make_chain([{"tmdb_id": 550, "title": "Fight Club", "poster": "https://img/550.jpg", "rating": 8.433}], count=1)
+    mock_supabase.table.return_value = chain
+
+    with patch.object(movie_json, "ENABLED", fast):
+        res = client.get("/search/movies", params={"fields": "title,poster,rating"})
+        details = client.get("/movies/550", params={"fields": "title"})
+
+    assert res.status_code == 200
+    assert res.json()["movies"] == [{"id": 550, "title": "Fight Club", "poster": "https://img/550.jpg", "rating": "8.4"}]
+    assert res.json()["total"] == 1
+    chain.select.assert_any_call("tmdb_id,title,poster,rating", count=None)
+    assert details.json() == {"id": 550, "title": "Fight Club"}
+    chain.select.assert_any_call("tmdb_id,title")
+
+def test_unknown_field_is_rejected():
+    res = client.get("/trending", params={"fields": "title,budget"})
+    assert res.status_code == 400
+    assert "budget" in res.json()["detail"]
@@ -0,0 +1,41 @@
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from main import app
+import movie_rating_stats
+from helpers import make_chain
+
+client = TestClient(app)
+
+def test_rating_change_is_a_delta():
+    assert movie_rating_stats.delta_for(None, 4) == {"count": 1, "sum": 4, "hist": [0, 0, 0, 1, 0]}
+    assert movie_rating_stats.delta_for(2, 5) == {"count": 0, "sum": 3, "hist": [0, -1, 0, 0, 1]}
+    assert movie_rating_stats.delta_for(3, None) == {"count": -1, "sum": -3, "hist": [0, 0, -1, 0, 0]}
+
+def test_aggregate_folds_changes_per_movie_and_drops_no_ops():
+    deltas = movie_rating_stats.aggregate([(1, None, 4), (1, 4, 5), (2, 3, 3)])
+    assert deltas == {1: {"count": 1, "sum": 5, "hist": [0, 0, 0, 0, 1]}}
+
+def test_community_rating():
+    assert movie_rating_stats.community_rating({"user_rating_count": 3, "user_rating_sum": 11, "user_rating_hist": [0, 0, 1, 0, 2]}) == {
+        "user_rating_count": 3, "user_rating_avg": 3.67, "user_rating_histogram": [0, 0, 1, 0, 2],
+    }
+    assert movie_rating_stats.community_rating({})["user_rating_avg"] is None
+
+@patch("routes.tmdb_routes.supabase_admin")
+def test_movie_details_include_community_rating(mock_supabase):
+    mock_supabase.table.return_value = make_chain([
+        {"tmdb_id": 1, "title": "A", "rating": 7.0, "user_rating_count": 2, "user_rating_sum": 9, "user_rating_hist": [0, 0, 0, 1, 1]}
+    ])
+    data = client.get("/movies/1").json()
+    assert data["user_rating_count"] == 2
+    assert data["user_rating_avg"] == 4.5
+    assert data["user_rating_histogram"] == [0, 0, 0, 1, 1]
+
+@patch("routes.tmdb_routes.supabase_admin")
+def test_trending_community_sort(mock_supabase):
+    chain = make_chain([], count=0)
+    mock_supabase.table.return_value = chain
+
+    assert client.get("/trending?sort=community").status_code == 200
+    chain.order.assert_any_call("user_rating_score", desc=True, nullsfirst=False)
+    assert client.get("/search/movies?q=star&sort=bogus").status_code == 422
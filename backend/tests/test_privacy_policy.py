@@ -0,0 +1,109 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from main import app
+from auth import get_current_user, get_optional_user
+import privacy_policy
+from helpers import make_chain
+
+# The real loader; conftest replaces it with an always-public policy
+load_policy = privacy_policy._load
+
+client = TestClient(app)
+OWNER = "owner"
+
+def tables(settings=None, blocked=(), friends=()):
+    data = {
+        "privacy_settings": [settings] if settings else [],
+        "blocked_users": [{"blocked": b} for b in blocked],
+        "friendlists": [{"friendlist_members": [{"member_user_id": f} for f in friends]}],
+    }
+    return lambda name: make_chain(data.get(name, []))
+
+@pytest.fixture
+def real_policy():
+    with patch("privacy_policy._load", load_policy), patch("privacy_policy.supabase_admin") as mock_supabase:
+        yield mock_supabase
+
+def test_visibility_rules(real_policy):
+    real_policy.table.side_effect = tables(
+        {"profile_visibility": "friends", "show_favorites_to": "only_me"}, blocked=["enemy"], friends=["pal", "enemy"]
+    )
+    can_view = privacy_policy.can_view
+    assert can_view(OWNER, OWNER, privacy_policy.FAVOURITES)
+    assert can_view("pal", OWNER, privacy_policy.PROFILE)
+    assert can_view("pal", OWNER, privacy_policy.RATINGS)
+    assert not can_view("pal", OWNER, privacy_policy.FAVOURITES)
+    assert not can_view("enemy", OWNER, privacy_policy.PROFILE)
+    assert not can_view("stranger", OWNER, privacy_policy.PROFILE)
+    assert not can_view(None, OWNER, privacy_policy.PROFILE)
+
+def test_defaults_and_boolean_visibility(real_policy):
+    # No settings row: the column defaults, a public profile with favourites for friends
+    real_policy.table.side_effect = tables(friends=["pal"])
+    assert privacy_policy.can_view(None, OWNER, privacy_policy.PROFILE)
+    assert not privacy_policy.can_view(None, OWNER, privacy_policy.FAVOURITES)
+    assert privacy_policy.can_view("pal", OWNER, privacy_policy.FAVOURITES)
+
+    real_policy.table.side_effect = tables({"profile_visibility": False, "show_favorites_to": "everyone"})
+    assert not privacy_policy.can_view(None, "other", privacy_policy.FAVOURITES)
+
+def test_policy_is_cached_until_invalidated(real_policy):
+    real_policy.table.side_effect = tables({"profile_visibility": "public", "show_favorites_to": "everyone"})
+    for viewer in ("a", "b", None):
+        assert privacy_policy.can_view(viewer, OWNER, privacy_policy.PROFILE)
+    assert real_policy.table.call_count == 3
+
+    real_policy.table.side_effect = tables({"profile_visibility": "private", "show_favorites_to": "everyone"})
+    assert privacy_policy.can_view("a", OWNER, privacy_policy.PROFILE)
+    privacy_policy.invalidate(OWNER)
+    assert not privacy_policy.can_view("a", OWNER, privacy_policy.PROFILE)
+    assert real_policy.table.call_count == 6
+
+@patch("routes.favourite_movies_routes.supabase_admin")
+def test_private_favourites_are_refused(mock_supabase, real_policy):
+    real_policy.table.side_effect = tables({"profile_visibility": "public", "show_favorites_to": "only_me"})
+    mock_supabase.table.return_value = make_chain([{"movie_id": 101}])
+
+    assert client.get(f"/api/favourite_movies/{OWNER}").status_code == 403
+
+    async def as_owner():
+        return SimpleNamespace(id=OWNER)
+    app.dependency_overrides[get_optional_user] = as_owner
+    try:
+        assert client.get(f"/api/favourite_movies/{OWNER}").json() == [101]
+    finally:
+        app.dependency_overrides.pop(get_optional_user, None)
+
+@patch("routes.user_routes.supabase_admin")
+def test_blocking_invalidates_the_policy(mock_supabase, real_policy):
+    real_policy.table.side_effect = tables({"profile_visibility": "public", "show_favorites_to": "everyone"})
+    mock_supabase.table.return_value = make_chain([{"user_id": OWNER, "blocked": "pest"}])
+    assert privacy_policy.can_view("pest", OWNER, privacy_policy.PROFILE)
+
+    async def as_owner():
+        return SimpleNamespace(id=OWNER)
+    app.dependency_overrides[get_current_user] = as_owner
+    try:
+        with patch("routes.user_routes.activity_feed"):
+            assert client.post("/api/privacy/block", json={"user": "pest"}).status_code == 200
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+    real_policy.table.side_effect = tables({"profile_visibility": "public", "show_favorites_to": "everyone"}, blocked=["pest"])
+    assert client.get(f"/api/profile/{OWNER}").status_code == 200
+    assert not privacy_policy.can_view("pest", OWNER, privacy_policy.PROFILE)
+
+@pytest.mark.parametrize("path", [
+    f"/api/profile/{OWNER}",
+    f"/api/favourite_movies/{OWNER}",
+    f"/api/favourite_movies/{OWNER}/101",
+    f"/api/ratings/{OWNER}",
+    f"/api/ratings/{OWNER}/101",
+])
+def test_policy_failure_is_a_server_error(path, real_policy):
+    real_policy.table.side_effect = Exception("database down")
+    res = client.get(path)
+    assert res.status_code == 500
+    assert res.json()["detail"]["error"] == "database down"
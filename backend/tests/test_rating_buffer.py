@@ -0,0 +1,89 @@
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch, MagicMock
+from main import app
+import rating_buffer
+from helpers import make_chain
+
+client = TestClient(app)
+
+@pytest.fixture(autouse=True)
+def write_behind():
+    rating_buffer._pending.clear()
+    with patch("rating_buffer.ENABLED", True):
+        yield
+    rating_buffer._pending.clear()
+
+@patch("routes.rated_movies_route.supabase_admin")
+def test_upsert_is_queued_and_coalesced(mock_supabase):
+    for stars in (2, 4, 5):
+        response = client.post("/api/ratings/u1/101", json={"rating": stars})
+        assert response.status_code == 200
+        assert response.json()["queued"] is True
+    client.post("/api/ratings/u1/202", json={"rating": 3})
+
+    mock_supabase.table.assert_not_called()
+    assert rating_buffer._pending == {("u1", 101): 5, ("u1", 202): 3}
+
+@patch("routes.rated_movies_route.supabase_admin")
+def test_point_read_overlays_pending_rating(mock_supabase):
+    mock_supabase.table.return_value = make_chain({"rating": 1})
+    rating_buffer.put("u1", 101, 4)
+
+    assert client.get("/api/ratings/u1/101").json()["rating"] == 4
+    assert client.get("/api/ratings/u1/202").json()["rating"] == 1
+
+@patch("rating_buffer.activity_feed")
+@patch("rating_buffer.group_recommendations")
+@patch("rating_buffer.supabase_admin")
+def test_flush_writes_one_batch(mock_supabase, mock_recs, mock_feed):
+    chain = make_chain([])
+    # u1's previous ratings, u2's (none), then the upsert
+    chain.execute.side_effect = [MagicMock(data=[{"tmdb_id": 101, "rating": 2}, {"tmdb_id": 202, "rating": 4}]), MagicMock(data=[]), MagicMock(data=[])]
+    mock_supabase.table.return_value = chain
+    rating_buffer.put("u1", 101, 5)
+    rating_buffer.put("u1", 202, 4)
+    rating_buffer.put("u2", 101, 3)
+
+    assert rating_buffer.flush() == 3
+
+    # Previous ratings are looked up per user, not as a users x movies product
+    chain.eq.assert_any_call("user_id", "u1")
+    chain.in_.assert_any_call("tmdb_id", [101, 202])
+    chain.eq.assert_any_call("user_id", "u2")
+    chain.in_.assert_any_call("tmdb_id", [101])
+    chain.upsert.assert_called_once_with(
+        [
+            {"user_id": "u1", "tmdb_id": 101, "rating": 5},
+            {"user_id": "u1", "tmdb_id": 202, "rating": 4},
+            {"user_id": "u2", "tmdb_id": 101, "rating": 3},
+        ],
+        on_conflict="user_id,tmdb_id",
+    )
+    # The unchanged 202 is no news
+    assert [c.args[0] for c in mock_feed.record.call_args_list] == ["u1", "u2"]
+    assert rating_buffer.pending_count() == 0
+
+@patch("rating_buffer.supabase_admin")
+def test_failed_flush_requeues_without_clobbering_newer_writes(mock_supabase):
+    chain = make_chain([])
+    chain.upsert.return_value.execute.side_effect = Exception("down")
+    mock_supabase.table.return_value = chain
+    rating_buffer.put("u1", 101, 5)
+    rating_buffer.put("u1", 202, 3)
+
+    original_write = rating_buffer._write
+    def write_then_newer_click(entries):
+        rating_buffer._pending[("u1", 101)] = 1  # clicked again mid-flush
+        original_write(entries)
+
+    with patch("rating_buffer._write", side_effect=write_then_newer_click), pytest.raises(Exception):
+        rating_buffer.flush()
+    assert rating_buffer._pending == {("u1", 101): 1, ("u1", 202): 3}
+
+@patch("routes.rated_movies_route.supabase_admin")
+@patch("rating_buffer.flush")
+def test_listing_flushes_the_users_writes_first(mock_flush, mock_supabase):
+    mock_supabase.table.return_value = make_chain([])
+    client.get("/api/ratings/u1")
+    mock_flush.assert_called_once_with("u1")
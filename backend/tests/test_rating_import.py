@@ -0,0 +1,98 @@
+import asyncio
+import json
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from main import app
+import rating_import
+from helpers import make_chain
+
+client = TestClient(app)
+
+async def chunks_of(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+async def collect(aiter):
+    return [item async for item in aiter]
+
+def records(data: bytes, fmt: str, size: int = 7):
+    return asyncio.run(collect(rating_import.iter_records(rating_import.iter_lines(chunks_of(data, size)), fmt)))
+
+def test_csv_records_survive_chunk_boundaries_and_quoted_newlines():
+    data = 'Name,Year,Rating\r\n"Heat",1995,4.5\r\n"Multi\nline, title",2001,3\r\n'.encode()
+    assert records(data, "csv") == [
+        (2, {"title": "Heat", "year": "1995", "rating": "4.5"}, None),
+        (3, {"title": "Multi\nline, title", "year": "2001", "rating": "3"}, None),
+    ]
+
+def test_ndjson_records_report_bad_lines():
+    data = b'{"tmdb_id": 1, "rating": 5}\n\nnot json\n[1]\n{"id": 2, "rating": 4}'
+    out = records(data, "ndjson")
+    assert out[0] == (1, {"tmdb_id": 1, "rating": 5}, None)
+    assert out[1][0] == 3 and out[1][2].startswith("Invalid JSON")
+    assert out[2] == (4, None, "Expected a JSON object")
+    assert out[3] == (5, {"tmdb_id": 2, "rating": 4}, None)
+
+def test_parse_rating_rounds_half_stars():
+    assert rating_import.parse_rating("4.5") == 5
+    assert rating_import.parse_rating(0.5) == 1
+    assert rating_import.parse_rating("3") == 3
+
+@patch("rating_import.supabase_admin")
+def test_import_batch(mock_supabase):
+    movies_by_id = make_chain([{"tmdb_id": 1}, {"tmdb_id": 2}])
+    movies_by_title = make_chain([
+        {"tmdb_id": 10, "title": "Heat", "release_year": 1995},
+        {"tmdb_id": 11, "title": "Heat", "release_year": 1986},
+        {"tmdb_id": 12, "title": "Up", "release_year": 2009},
+    ])
+    ratings = make_chain([{"tmdb_id": 1, "rating": 4}, {"tmdb_id": 2, "rating": 3}])
+    tables = iter([movies_by_id, movies_by_title, ratings, ratings])
+    mock_supabase.table.side_effect = lambda name: next(tables)
+
+    rows = [rating_import._prepare(i + 1, rec, None) for i, rec in enumerate([
+        {"tmdb_id": "1", "rating": "4"},           # unchanged
+        {"tmdb_id": "2", "rating": "5"},           # updated
+        {"title": "Heat", "year": "1995", "rating": "4"},  # created
+        {"title": "Heat", "rating": "4"},          # ambiguous
+        {"title": "Up", "rating": "2"},            # superseded by the next row
+        {"title": "Up", "rating": "3"},            # created
+        {"tmdb_id": "99", "rating": "3"},          # unknown
+        {"title": "Heat", "rating": "9"},          # invalid rating
+    ])]
+    results = rating_import.import_batch("u1", rows)
+
+    assert [r["status"] for r in results] == [
+        "unchanged", "updated", "created", "error", "superseded", "created", "error", "error",
+    ]
+    assert results[3]["error"] == "Ambiguous title; add a year"
+    upserted = ratings.upsert.call_args.args[0]
+    assert upserted == [
+        {"user_id": "u1", "tmdb_id": 2, "rating": 5},
+        {"user_id": "u1", "tmdb_id": 10, "rating": 4},
+        {"user_id": "u1", "tmdb_id": 12, "rating": 3},
+    ]
+
+@patch("routes.rated_movies_route.group_recommendations")
+@patch("rating_import.import_batch")
+def test_import_endpoint_streams_results_in_batches(mock_batch, mock_recs):
+    mock_batch.side_effect = lambda user_id, rows: [
+        {"line": r["line"], "status": "created", "tmdb_id": r["tmdb_id"], "rating": r["rating"]} for r in rows
+    ]
+    body = "tmdb_id,rating\n" + "".join(f"{i},4\n" for i in range(1, 1201))
+
+    with patch("rating_import.BATCH_SIZE", 100):
+        response = client.post("/api/ratings/u1/import", content=body, headers={"Content-Type": "text/csv"})
+
+    assert response.status_code == 200
+    lines = [json.loads(l) for l in response.text.splitlines()]
+    assert len(lines) == 1201
+    assert lines[0] == {"line": 2, "status": "created", "tmdb_id": 1, "rating": 4}
+    assert lines[-1]["summary"]["created"] == 1200
+    assert mock_batch.call_count == 12
+    assert all(len(call.args[1]) == 100 for call in mock_batch.call_args_list)
+    mock_recs.invalidate_user.assert_called_once_with("u1")
+
+def test_import_endpoint_needs_a_format():
+    response = client.post("/api/ratings/u1/import", content=b"x", headers={"Content-Type": "text/plain"})
+    assert response.status_code == 415
@@ -19,6 +19,9 @@ def supabase_chain():
     chain.upsert.return_value = chain
     chain.eq.return_value = chain
     chain.order.return_value = chain
+    chain.or_.return_value = chain
+    chain.in_.return_value = chain
+    chain.limit.return_value = chain
     chain.maybe_single.return_value = chain
     chain.execute.return_value = fake_execute
     return chain
@@ -54,6 +57,72 @@ def test_get_ratings_by_user_id_error(mock_supabase, supabase_chain):
     assert response.status_code == 500
     assert "Failed to fetch user ratings" in response.json()["detail"]["message"]
 
+# Ratings are paged on (created_at, tmdb_id), newest first
+@patch("routes.rated_movies_route.supabase_admin")
+def test_get_ratings_by_user_id_paginates(mock_supabase, supabase_chain):
+    supabase_chain.execute.return_value.data = [
+        {"tmdb_id": 101, "rating": 5, "created_at": "2025-01-15T10:00:00+00:00"},
+        {"tmdb_id": 202, "rating": 4, "created_at": "2025-01-14T09:00:00+00:00"},
+        {"tmdb_id": 303, "rating": 3, "created_at": "2025-01-13T08:00:00+00:00"}
+    ]
+    mock_supabase.table.return_value = supabase_chain
+
+    response = client.get("/api/ratings/123?limit=2")
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["tmdb_id"] for r in data["ratings"]] == [101, 202]
+    assert data["next_cursor"]
+    supabase_chain.limit.assert_called_with(3)
+
+    # The cursor continues strictly after the last rating on the page
+    client.get(f"/api/ratings/123?limit=2&cursor={data['next_cursor']}")
+    supabase_chain.or_.assert_called_once_with(
+        'created_at.lt."2025-01-14T09:00:00+00:00",and(created_at.eq."2025-01-14T09:00:00+00:00",tmdb_id.lt.202)'
+    )
+
+def test_get_ratings_by_user_id_bad_cursor():
+    response = client.get("/api/ratings/123?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+@patch("routes.rated_movies_route.supabase_admin")
+def test_get_ratings_by_user_id_hydrate(mock_supabase, supabase_chain):
+    ratings = MagicMock(data=[
+        {"tmdb_id": 101, "rating": 5, "created_at": "2025-01-15T10:00:00+00:00"},
+        {"tmdb_id": 202, "rating": 4, "created_at": "2025-01-14T09:00:00+00:00"}
+    ])
+    movies = MagicMock(data=[{"tmdb_id": 101, "title": "Movie 101", "release_year": 2020, "genre": "Drama", "rating": 7.5}])
+    supabase_chain.execute.side_effect = [ratings, movies]
+    mock_supabase.table.return_value = supabase_chain
+
+    response = client.get("/api/ratings/123?hydrate=true")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["ratings"][0]["movie"]["title"] == "Movie 101"
+    assert data["ratings"][1]["movie"] is None
+    # One batched lookup for the whole page
+    supabase_chain.in_.assert_called_once_with("tmdb_id", [101, 202])
+
+@patch("routes.rated_movies_route.supabase_admin")
+def test_get_ratings_by_user_id_not_modified(mock_supabase, supabase_chain):
+    supabase_chain.execute.return_value.data = [
+        {"tmdb_id": 101, "rating": 5, "created_at": "2025-01-15T10:00:00+00:00"}
+    ]
+    mock_supabase.table.return_value = supabase_chain
+
+    first = client.get("/api/ratings/123")
+    etag = first.headers["etag"]
+    second = client.get("/api/ratings/123", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+
+    # A changed rating changes the ETag
+    supabase_chain.execute.return_value.data = [
+        {"tmdb_id": 101, "rating": 4, "created_at": "2025-01-15T10:00:00+00:00"}
+    ]
+    third = client.get("/api/ratings/123", headers={"If-None-Match": etag})
+    assert third.status_code == 200
+    assert third.headers["etag"] != etag
+
 # Get specific movie rating
 @patch("routes.rated_movies_route.supabase_admin")
 def test_get_rating_for_movie_exists(mock_supabase, supabase_chain):
@@ -86,6 +155,32 @@ def test_upsert_rating_create_new(mock_supabase, supabase_chain):
     assert data["rating"] == 5
     assert len(data["data"]) == 1
 
+@patch("routes.rated_movies_route.supabase_admin")
+def test_upsert_rating_change(mock_supabase, supabase_chain):
+    previous = MagicMock(data={"rating": 2})
+    upserted = MagicMock(data=[{"user_id": "123", "tmdb_id": 101, "rating": 4}])
+    supabase_chain.execute.side_effect = [previous, upserted]
+    mock_supabase.table.return_value = supabase_chain
+
+    response = client.post("/api/ratings/123/101", json={"rating": 4})
+
+    assert response.status_code == 200
+    # The movie's aggregates are left to the database trigger
+    mock_supabase.rpc.assert_not_called()
+    supabase_chain.upsert.assert_called_once_with(
+        {"user_id": "123", "tmdb_id": 101, "rating": 4}, on_conflict="user_id,tmdb_id"
+    )
+
+@patch("routes.rated_movies_route.supabase_admin")
+def test_delete_rating(mock_supabase, supabase_chain):
+    supabase_chain.execute.return_value.data = [{"user_id": "123", "tmdb_id": 101, "rating": 3}]
+    mock_supabase.table.return_value = supabase_chain
+
+    response = client.delete("/api/ratings/123/101")
+
+    assert response.status_code == 200
+    assert response.json()["deleted"] == 1
+
 @patch("routes.rated_movies_route.supabase_admin")
 def test_upsert_rating_database_error(mock_supabase, supabase_chain):
     supabase_chain.execute.side_effect = Exception("Unique constraint violation")
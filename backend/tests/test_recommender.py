@@ -0,0 +1,91 @@
+import threading
+import time
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch, MagicMock
+from main import app
+import recommender
+
+client = TestClient(app)
+
+USER_ID = "a1"
+
+# Two taste clusters: users a* like movies 1-3, users b* like movies 4-6
+RATINGS = [
+    {"user_id": "a1", "tmdb_id": 1, "rating": 5}, {"user_id": "a1", "tmdb_id": 2, "rating": 5}, {"user_id": "a1", "tmdb_id": 3, "rating": 4},
+    {"user_id": "a2", "tmdb_id": 1, "rating": 5}, {"user_id": "a2", "tmdb_id": 2, "rating": 4},
+    {"user_id": "b1", "tmdb_id": 4, "rating": 5}, {"user_id": "b1", "tmdb_id": 5, "rating": 5}, {"user_id": "b1", "tmdb_id": 6, "rating": 4},
+    {"user_id": "b2", "tmdb_id": 4, "rating": 5}, {"user_id": "b2", "tmdb_id": 5, "rating": 4},
+]
+
+@pytest.fixture
+def model():
+    return recommender.train(*recommender.build_interactions(RATINGS, [{"user_id": "a2", "movie_id": 1}]), factors=4, iterations=15)
+
+def test_build_interactions_merges_rating_and_favourite():
+    user_ids, movie_ids, indptr, indices, strength = recommender.build_interactions(
+        [{"user_id": "u1", "tmdb_id": 10, "rating": 4}, {"user_id": "u1", "tmdb_id": 20, "rating": 2}],
+        [{"user_id": "u1", "movie_id": 10}],
+    )
+    assert user_ids == ["u1"]
+    assert movie_ids.tolist() == [10, 20]
+    assert indptr.tolist() == [0, 2]
+    assert strength.tolist() == [4 * recommender.RATING_WEIGHT + recommender.FAVOURITE_WEIGHT, 2 * recommender.RATING_WEIGHT]
+
+def test_recommend_masks_seen_and_follows_taste(model):
+    assert model.user_factors.dtype == np.float32
+    assert [m for m, _ in model.recommend("a2", 1)] == [3]
+    assert [m for m, _ in model.recommend("b2", 1)] == [6]
+    assert all(m not in (1, 2, 3) for m, _ in model.recommend("a1", 10))
+    assert model.recommend("unknown", 5) == []
+
+def test_recommend_many_matches_recommend(model):
+    batch = model.recommend_many(["a2", "b2", "unknown"], 3)
+    assert [m for m, _ in batch["a2"]] == [m for m, _ in model.recommend("a2", 3)]
+    assert batch["unknown"] == []
+
+def test_save_and_load_round_trip(model, tmp_path):
+    path = str(tmp_path / "model.npz")
+    model.save(path)
+    loaded = recommender.RecommenderModel.load(path)
+    assert loaded.user_ids == model.user_ids
+    assert loaded.recommend("b2", 2) == model.recommend("b2", 2)
+
+def test_concurrent_workers_train_once(model, tmp_path):
+    def slow_train():
+        time.sleep(0.2)
+        return model
+
+    with patch.object(recommender, "MODEL_PATH", str(tmp_path / "model.npz")), \
+            patch.object(recommender, "_model", None), \
+            patch("recommender.train_from_database", side_effect=slow_train) as mock_train:
+        # Training is opt-in
+        recommender._refresh_if_stale()
+        mock_train.assert_not_called()
+
+        with patch.object(recommender, "TRAIN", True):
+            workers = [threading.Thread(target=recommender._refresh_if_stale) for _ in range(3)]
+            for w in workers:
+                w.start()
+            for w in workers:
+                w.join()
+        assert mock_train.call_count == 1
+        assert recommender.get_model().recommend("b2", 2) == model.recommend("b2", 2)
+
+@patch("routes.recommendation_routes.supabase_admin")
+def test_recommendations_endpoint_hydrates_in_model_order(mock_supabase, model, logged_in):
+    chain = MagicMock()
+    chain.select.return_value = chain
+    chain.in_.return_value = chain
+    chain.execute.return_value = MagicMock(data=[
+        {"tmdb_id": m, "title": f"Movie {m}", "release_year": 2020, "genre": "Drama", "poster": None, "rating": 7.0, "description": ""}
+        for m in (1, 2, 3, 4, 5, 6)
+    ])
+    mock_supabase.table.return_value = chain
+    with patch("recommender.get_model", return_value=model):
+        response = client.get("/api/recommendations?limit=3")
+
+    assert response.status_code == 200
+    ids = [m["id"] for m in response.json()["movies"]]
+    assert ids == [m for m, _ in model.recommend("a1", 3)]
@@ -0,0 +1,134 @@
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch, MagicMock
+from main import app
+import similarity_index
+
+client = TestClient(app)
+
+MOVIES = [
+    {"tmdb_id": 1, "genre": "Action", "rating": 8.0},
+    {"tmdb_id": 2, "genre": "Action", "rating": 7.0},
+    {"tmdb_id": 3, "genre": "Drama", "rating": 9.0},
+    {"tmdb_id": 4, "genre": "Drama", "rating": 6.0},
+    {"tmdb_id": 5, "genre": "Comedy", "rating": 5.0},
+]
+RATINGS = [
+    {"user_id": "a", "tmdb_id": 1, "rating": 5}, {"user_id": "a", "tmdb_id": 3, "rating": 5},
+    {"user_id": "b", "tmdb_id": 1, "rating": 4}, {"user_id": "b", "tmdb_id": 3, "rating": 5},
+]
+
+# bit -> name as in the genres table
+GENRE_TABLE = {"action": (0, "Action"), "drama": (1, "Drama"), "comedy": (2, "Comedy")}
+
+@pytest.fixture(autouse=True)
+def genre_table():
+    with patch("genres.genre_table", return_value=GENRE_TABLE):
+        yield
+
+def neighbour_ids(index, tmdb_id):
+    return [m for m, _ in index.similar(tmdb_id)]
+
+def test_build_blends_co_ratings_and_genre():
+    index, recomputed = similarity_index.build(MOVIES, RATINGS, [], k=3)
+    assert recomputed == 5
+    # co-rated by the same users beats sharing a genre
+    assert neighbour_ids(index, 1) == [3, 2]
+    assert neighbour_ids(index, 2) == [1]
+    # nothing in common with anything
+    assert neighbour_ids(index, 5) == []
+    assert index.similar(999) == []
+
+def test_incremental_build_only_recomputes_changed_rows():
+    index, _ = similarity_index.build(MOVIES, RATINGS, [], k=3)
+
+    unchanged, recomputed = similarity_index.build(MOVIES, RATINGS, [], previous=index, k=3)
+    assert recomputed == 0
+    assert neighbour_ids(unchanged, 1) == neighbour_ids(index, 1)
+
+    favourites = [{"user_id": "c", "movie_id": 4}, {"user_id": "c", "movie_id": 5}]
+    updated, recomputed = similarity_index.build(MOVIES, RATINGS, favourites, previous=index, k=3)
+    # 4 and 5, plus 3, which lists 4
+    assert recomputed == 3
+    assert neighbour_ids(updated, 5) == [4]
+    assert neighbour_ids(updated, 1) == [3, 2]
+
+@pytest.mark.parametrize("movies", [
+    # a new movie sharing a genre, but no users, with movies whose lists are full
+    MOVIES + [{"tmdb_id": 6, "genre": "Action", "rating": 9.5}],
+    # a genre change
+    [dict(m, genre="Action") if m["tmdb_id"] == 5 else m for m in MOVIES],
+    # a rating change reorders ties in other rows
+    [dict(m, rating=1.0) if m["tmdb_id"] == 2 else m for m in MOVIES],
+])
+def test_incremental_build_matches_full_build(movies):
+    catalog = MOVIES + [{"tmdb_id": 7, "genre": "Action", "rating": 7.5}]
+    movies = movies + [catalog[-1]]
+    index, _ = similarity_index.build(catalog, RATINGS, [], k=2)
+    updated, recomputed = similarity_index.build(movies, RATINGS, [], previous=index, k=2)
+    full, _ = similarity_index.build(movies, RATINGS, [], k=2)
+    assert recomputed < len(movies)
+    for m in movies:
+        assert updated.similar(m["tmdb_id"]) == full.similar(m["tmdb_id"])
+
+def test_removed_movie_drops_out_of_neighbour_lists():
+    index, _ = similarity_index.build(MOVIES, RATINGS, [], k=3)
+    updated, _ = similarity_index.build([m for m in MOVIES if m["tmdb_id"] != 2], RATINGS, [], previous=index, k=3)
+    assert neighbour_ids(updated, 1) == [3]
+
+def test_genre_overlap_follows_the_mask():
+    # The text says Comedy, the mask Action: the mask wins, and matches Action text rows
+    movies = MOVIES + [{"tmdb_id": 6, "genre": "Comedy", "genre_mask": 1 << 0, "rating": 5.0}]
+    index, _ = similarity_index.build(movies, [], [], k=3)
+    assert set(neighbour_ids(index, 6)) == {1, 2}
+    assert neighbour_ids(index, 5) == []
+
+def test_concurrent_workers_build_once(tmp_path):
+    build = similarity_index.build
+
+    def slow_build(*args, **kwargs):
+        time.sleep(0.2)
+        return build(MOVIES, RATINGS, [], k=3)
+
+    with patch.object(similarity_index, "INDEX_PATH", str(tmp_path / "index.npz")), \
+            patch.object(similarity_index, "_index", None), \
+            patch("similarity_index._fetch_all", return_value=[]), \
+            patch("similarity_index.build", side_effect=slow_build) as mock_build:
+        workers = [threading.Thread(target=similarity_index._refresh_if_stale) for _ in range(3)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        assert mock_build.call_count == 1
+        assert neighbour_ids(similarity_index.get_index(), 1) == [3, 2]
+        assert [p.name for p in tmp_path.iterdir() if ".tmp" in p.name] == []
+
+def test_save_and_load_round_trip(tmp_path):
+    index, _ = similarity_index.build(MOVIES, RATINGS, [], k=3)
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    assert similarity_index.SimilarityIndex.load(path).similar(3) == index.similar(3)
+
+@patch("routes.tmdb_routes.supabase_admin")
+def test_similar_movies_endpoint(mock_supabase):
+    index, _ = similarity_index.build(MOVIES, RATINGS, [], k=3)
+    chain = MagicMock()
+    chain.select.return_value = chain
+    chain.in_.return_value = chain
+    chain.execute.return_value = MagicMock(data=[
+        {"tmdb_id": 2, "title": "Two", "release_year": 2020, "genre": "Action", "poster": None, "rating": 7.0, "description": ""},
+        {"tmdb_id": 3, "title": "Three", "release_year": 2021, "genre": "Drama", "poster": None, "rating": 9.0, "description": ""},
+    ])
+    mock_supabase.table.return_value = chain
+
+    with patch("similarity_index.get_index", return_value=index), patch("content_index.get_index", return_value=None):
+        response = client.get("/movies/1/similar")
+    assert response.status_code == 200
+    assert [m["id"] for m in response.json()] == [3, 2]
+
+    with patch("similarity_index.get_index", return_value=None), patch("content_index.get_index", return_value=None):
+        response = client.get("/movies/1/similar")
+    assert response.status_code == 200
+    assert response.json() == []
@@ -0,0 +1,59 @@
+import gzip
+import os
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import static_assets
+from static_assets import PrecompressedStaticFiles, accepted_encodings, precompress
+
+BUNDLE = b"console.log('hello');\n" * 200
+
+@pytest.fixture
+def client(tmp_path):
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "assets" / "index-3f9a1c2b.js").write_bytes(BUNDLE)
+    (tmp_path / "index.html").write_text("<!doctype html><div id=root></div>")
+    precompress(str(tmp_path))
+    app = FastAPI()
+    app.mount("/", PrecompressedStaticFiles(directory=str(tmp_path), html=True), name="static")
+    return TestClient(app)
+
+def test_accept_encoding_parsing():
+    assert accepted_encodings("gzip, br;q=0.5, deflate;q=0") == {"gzip": 1.0, "br": 0.5}
+    assert accepted_encodings(None) == {}
+
+def test_precompress_skips_small_files(tmp_path):
+    (tmp_path / "big.js").write_bytes(BUNDLE)
+    (tmp_path / "tiny.js").write_bytes(b"x")
+    (tmp_path / "logo.png").write_bytes(os.urandom(4096))
+    written = precompress(str(tmp_path))
+    assert str(tmp_path / "big.js.gz") in written
+    assert not any("tiny" in p or "logo" in p for p in written)
+
+def test_serves_gzip_variant_with_immutable_caching(client):
+    res = client.get("/assets/index-3f9a1c2b.js", headers={"Accept-Encoding": "gzip"})
+    assert res.status_code == 200
+    assert res.headers["content-encoding"] == "gzip"
+    assert res.headers["content-type"].startswith("text/javascript")
+    assert res.headers["cache-control"] == static_assets.IMMUTABLE_CACHE_CONTROL
+    assert int(res.headers["content-length"]) < len(BUNDLE)
+    assert res.content == BUNDLE  # decoded by the client
+
+    plain = client.get("/assets/index-3f9a1c2b.js", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.content == BUNDLE
+    assert plain.headers["etag"] != res.headers["etag"]
+
+def test_etag_revalidation(client):
+    first = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert first.headers["cache-control"] == "no-cache"
+    again = client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+
+def test_stale_variant_is_ignored(client, tmp_path):
+    path = tmp_path / "assets" / "index-3f9a1c2b.js"
+    st = os.stat(str(path) + ".gz")
+    os.utime(path, (st.st_atime, st.st_mtime + 10))
+    res = client.get("/assets/index-3f9a1c2b.js", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in res.headers
+    assert gzip.decompress((tmp_path / "assets" / "index-3f9a1c2b.js.gz").read_bytes()) == BUNDLE
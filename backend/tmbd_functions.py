@@ -21,7 +21,9 @@ import httpx
 # - HTTPException: exception class for returning HTTP error responses
 # - Query: dependency for defining query parameters with validation and documentation
 from fastapi import FastAPI, HTTPException, Query
-from fastapi.staticfiles import StaticFiles
+
+# StaticFiles that serves build-time .br/.gz variants and long-lived caching for hashed assets
+from static_assets import PrecompressedStaticFiles
 
 # Criss-Origin Resource Sharing middleware
 # Allows the API to be accessed from web browsers running on different domains/ ports
@@ -264,7 +266,7 @@ async def trending(period: Literal["day", "week"] = "day"):
 
 frontend_dist = os.path.join(os.path.dirname(__file__), "..", "frontend", "dist")
 if os.path.isdir(frontend_dist):
-    app.mount("/", StaticFiles(directory=frontend_dist, html=True), name="static")
+    app.mount("/", PrecompressedStaticFiles(directory=frontend_dist, html=True), name="static")
 """
     Function for fetting a individual movie
 """
@@ -1,10 +1,16 @@
 import requests
 import time
 import os
+import sys
 from typing import List, Dict
 from pathlib import Path
 from dotenv import load_dotenv, find_dotenv
 
+# content_index.py and catalog_snapshot.py live in backend/ (parent of tmdb-api)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import catalog_snapshot
+import content_index
+
 class TMDBBatchUploader:
     def __init__(self, TMDB_KEY: str, supabase_url: str, supabase_key: str):
         self.TMDB_KEY = TMDB_KEY
@@ -16,6 +22,8 @@ class TMDBBatchUploader:
         
         # Fetch genre mapping once (TMDB uses genre IDs)
         self.genre_map = self._fetch_genres()
+        # TMDB genre ID -> bit in movies.genre_mask (see backend/genres.py)
+        self.genre_bits = self._sync_genre_table()
         
     def _fetch_genres(self) -> Dict[int, str]:
         """
@@ -33,6 +41,38 @@ class TMDBBatchUploader:
         except Exception as e:
             print(f"Error fetching genres: {e}")
             return {}
+
+    def _sync_genre_table(self) -> Dict[int, int]:
+        """
+        Make sure every TMDB genre has a row (and a bit) in the genres table.
+        New genres get the next free bit; existing bits are never reassigned.
+        """
+        try:
+            rows = self.supabase.table("genres").select("bit,tmdb_genre_id,name").execute().data or []
+            bits = {r["tmdb_genre_id"]: r["bit"] for r in rows}
+            next_bit = max((r["bit"] for r in rows), default=-1) + 1
+            new_rows = []
+            for gid, name in sorted(self.genre_map.items()):
+                if gid in bits:
+                    continue
+                if next_bit > 30:
+                    print(f"No genre bit left for {name} ({gid}); it will not be filterable")
+                    continue
+                bits[gid] = next_bit
+                new_rows.append({"bit": next_bit, "tmdb_genre_id": gid, "name": name})
+                next_bit += 1
+            if new_rows:
+                self.supabase.table("genres").insert(new_rows).execute()
+                print(f"Added {len(new_rows)} genre(s) to the genres table")
+            # Rows stored before masks existed (or before their genre had a bit)
+            backfilled = self.supabase.rpc("backfill_genre_masks", {}).execute().data
+            if backfilled:
+                print(f"Backfilled genre_mask of {backfilled} movie(s)")
+            return bits
+        except Exception as e:
+            # Movies still get their genre names; masks stay 0 until the next run
+            print(f"Error syncing genre table: {e}")
+            return {}
     
     def fetch_popular_movies(self, total_movies: int = 200) -> List[Dict]:
         """
@@ -76,8 +116,13 @@ class TMDBBatchUploader:
         release_date = movie.get("release_date", "")
         release_year = int(release_date.split("-")[0]) if release_date else None
         
+        # Keep every genre: names for display, bits for filtering
         genre_ids = movie.get("genre_ids", [])
-        genre = self.genre_map.get(genre_ids[0]) if genre_ids else None
+        genre = ", ".join(self.genre_map[gid] for gid in genre_ids if gid in self.genre_map) or None
+        genre_mask = 0
+        for gid in genre_ids:
+            if gid in self.genre_bits:
+                genre_mask |= 1 << self.genre_bits[gid]
         
         poster_path = movie.get("poster_path")
         poster_url = f"https://image.tmdb.org/t/p/w500{poster_path}" if poster_path else None
@@ -87,6 +132,7 @@ class TMDBBatchUploader:
             "title": movie.get("title"),
             "release_year": release_year,
             "genre": genre,
+            "genre_mask": genre_mask,
             "poster": poster_url,
             "rating": movie.get("vote_average"),
             "description": movie.get("overview")
@@ -128,7 +174,34 @@ class TMDBBatchUploader:
                 continue
         
         print(f"\n✅ Upload complete! {total_uploaded} movies uploaded/updated in Supabase")
+
+        self.update_content_index(transformed_movies)
+        self.update_catalog_snapshot()
         return total_uploaded
+
+    def update_content_index(self, transformed_movies: List[Dict]):
+        """
+        Add the uploaded movies to the local TF-IDF content index
+        (see backend/content_index.py) so new titles get "more like this" results
+        """
+        try:
+            total = content_index.update(transformed_movies)
+            print(f"🔎 Content index updated: {len(transformed_movies)} movies indexed, {total} in total")
+        except Exception as e:
+            # The upload itself succeeded; the index can be rebuilt on the next run
+            print(f"Error updating content index: {e}")
+
+    def update_catalog_snapshot(self):
+        """
+        Rewrite the memory-mapped catalog snapshot (see backend/catalog_snapshot.py)
+        from the full movies table, so workers pick up the new titles
+        """
+        try:
+            total = catalog_snapshot.write(catalog_snapshot.fetch_catalog(self.supabase))
+            print(f"🗂️ Catalog snapshot written: {total} movies")
+        except Exception as e:
+            # The previous snapshot stays in place; workers fall back to the database for new titles
+            print(f"Error writing catalog snapshot: {e}")
     
     def run(self, total_movies: int = 200):
         """
@@ -15,3 +15,47 @@ export async function api(path: string, init: RequestInit = {}) {
   const url = path.startsWith("http") ? path : `${API_BASE}${path}`
   return fetch(url, { ...init, headers })
 }
+
+export type BatchResult<T = unknown> = { id: string | null; status: number; etag: string | null; body: T }
+
+// Several GETs in one round-trip (POST /api/batch); results come back in the same order
+export async function batchGet(paths: string[]): Promise<BatchResult[]> {
+  const res = await api("/api/batch", {
+    method: "POST",
+    body: JSON.stringify({ requests: paths.map((path) => ({ path })) }),
+  })
+  if (!res.ok) throw new Error(await res.text())
+  return (await res.json()).responses
+}
+
+export type GroupEvent = { event: string; data: unknown }
+
+// Live group activity (GET /api/groups/{id}/events, server-sent events). EventSource cannot send the
+// Authorization header, so the stream is read with fetch; reconnects until the signal is aborted.
+export async function subscribeGroupEvents(groupId: string, onEvent: (e: GroupEvent) => void, signal: AbortSignal) {
+  while (!signal.aborted) {
+    try {
+      const res = await api(`/api/groups/${groupId}/events`, { signal, headers: { Accept: "text/event-stream" } })
+      if (!res.ok || !res.body) throw new Error(await res.text())
+      const reader = res.body.pipeThrough(new TextDecoderStream()).getReader()
+      let buffer = ""
+      for (;;) {
+        const { value, done } = await reader.read()
+        if (done) break
+        buffer += value
+        let end
+        while ((end = buffer.indexOf("\n\n")) >= 0) {
+          const block = buffer.slice(0, end)
+          buffer = buffer.slice(end + 2)
+          const event = /^event: (.*)$/m.exec(block)?.[1]
+          const data = /^data: (.*)$/m.exec(block)?.[1]
+          if (event && data !== undefined) onEvent({ event, data: JSON.parse(data) })
+        }
+      }
+    } catch (err) {
+      if (signal.aborted) return
+      console.warn("Group event stream failed, reconnecting", err)
+    }
+    await new Promise((resolve) => setTimeout(resolve, 3000))
+  }
+}
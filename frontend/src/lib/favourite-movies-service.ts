@@ -1,4 +1,5 @@
 import type { FavouriteMovies } from "@/types/favourite-movies";
+import { api } from "@/lib/api";
 
 // const API_BASE = import.meta.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 const API_BASE = "https://movielily.azurewebsites.net";
@@ -7,7 +8,7 @@ const API_BASE = "https://movielily.azurewebsites.net";
 
 // --------
 export async function fetchFavouriteMovies(user_id: string): Promise<FavouriteMovies> {
-    const res = await fetch(`${API_BASE}/api/favourite_movies/${user_id}`, {
+    const res = await api(`/api/favourite_movies/${user_id}`, {
         method: "GET"
     });
 
@@ -17,7 +18,7 @@ export async function fetchFavouriteMovies(user_id: string): Promise<FavouriteMo
 }
 
 export async function isMovieFavourite(user_id: string, movie_id: number): Promise<boolean> {
-    const res = await fetch(`${API_BASE}/api/favourite_movies/${user_id}/${movie_id}`, {
+    const res = await api(`/api/favourite_movies/${user_id}/${movie_id}`, {
         method: "GET"
     });
 
@@ -51,6 +52,27 @@ export async function reorderFavouriteMovies(user_id: string, movie_ids: number[
     if (!res.ok) throw new Error("Failed to add movie to favourites");
 }
 
+// Apply several add / remove / move operations in one request
+// (positions are 1-based; "add" appends when position is omitted)
+export type FavouriteOp =
+    | { op: "add"; movie_id: number; position?: number }
+    | { op: "remove"; movie_id: number }
+    | { op: "move"; movie_id: number; position: number };
+
+export async function applyFavouriteOps(user_id: string, ops: FavouriteOp[]): Promise<number[]> {
+    const res = await fetch(`${API_BASE}/api/favourite_movies/${user_id}/batch`, {
+        method: "POST",
+        headers: {
+            "Content-Type": "application/json",
+        },
+        body: JSON.stringify({ ops })
+    });
+
+    if (!res.ok) throw new Error("Failed to update favourite movies");
+
+    return (await res.json()).movie_ids as number[];
+}
+
 // --------
 // DELETE
 // --------
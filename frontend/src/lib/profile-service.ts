@@ -1,5 +1,6 @@
 import type { Profile } from "@/types/profile";
 import { supabase } from "@/lib/supabase";
+import { api } from "@/lib/api";
 
 // const API_BASE = import.meta.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 const API_BASE = "https://movielily.azurewebsites.net";
@@ -30,7 +31,7 @@ export async function fetchUser(): Promise<Profile> {
 }
 
 export async function fetchProfile(user_id: string): Promise<Profile> {
-  const res = await fetch(`${API_BASE}/api/profile/${user_id}`, {
+  const res = await api(`/api/profile/${user_id}`, {
     method: "GET",
   });
 
@@ -1,6 +1,7 @@
 
 // src/lib/rating-service.ts
 import type { UserMovieRating } from "@/types/user-movie-ratings"
+import { api } from "@/lib/api"
 export type { UserMovieRating }
 
 // const API_BASE = import.meta.env.NEXT_PUBLIC_API_URL || "http://localhost:8000"
@@ -11,20 +12,52 @@ const API_BASE = "https://movielily.azurewebsites.net";
 // GET
 // --------
 
-// fetch all ratings for a user
-export async function fetchUserRatings(user_id: string): Promise<UserMovieRating[]> {
-  const res = await fetch(`${API_BASE}/api/ratings/${user_id}`, { method: "GET" })
+export type UserRatingsPage = {
+  ratings: UserMovieRating[]
+  next_cursor: string | null
+}
+
+// fetch one page of a user's ratings (newest first)
+// hydrate=true embeds each rated movie, so no per-movie requests are needed
+export async function fetchUserRatingsPage(
+  user_id: string,
+  opts: { cursor?: string | null; limit?: number; hydrate?: boolean } = {},
+  signal?: AbortSignal
+): Promise<UserRatingsPage> {
+  const params = new URLSearchParams()
+  if (opts.cursor) params.set("cursor", opts.cursor)
+  if (opts.limit) params.set("limit", opts.limit.toString())
+  if (opts.hydrate) params.set("hydrate", "true")
+
+  // the browser revalidates with If-None-Match, so unchanged pages come back as 304s
+  const res = await api(`/api/ratings/${user_id}?${params}`, { method: "GET", signal })
 
   if (!res.ok) throw new Error("Failed to fetch user ratings")
 
   const json = await res.json()
-  return json.ratings as UserMovieRating[]
+  return { ratings: json.ratings as UserMovieRating[], next_cursor: json.next_cursor ?? null }
+}
+
+// fetch all ratings for a user, following the cursor page by page
+export async function fetchUserRatings(
+  user_id: string,
+  opts: { hydrate?: boolean } = {},
+  signal?: AbortSignal
+): Promise<UserMovieRating[]> {
+  const all: UserMovieRating[] = []
+  let cursor: string | null = null
+  do {
+    const page: UserRatingsPage = await fetchUserRatingsPage(user_id, { cursor, limit: 200, hydrate: opts.hydrate }, signal)
+    all.push(...page.ratings)
+    cursor = page.next_cursor
+  } while (cursor)
+  return all
 }
 
 
 // fetch a user’s rating for a single movie
 export async function getMyRating(user_id: string, tmdb_id: number): Promise<number | null> {
-  const res = await fetch(`${API_BASE}/api/ratings/${user_id}/${tmdb_id}`, { method: "GET" })
+  const res = await api(`/api/ratings/${user_id}/${tmdb_id}`, { method: "GET" })
 
   if (!res.ok) throw new Error("Failed to fetch rating for this movie")
 
@@ -48,6 +81,31 @@ export async function upsertMyRating(user_id: string, tmdb_id: number, rating: n
   return await res.json()
 }
 
+// bulk import from a CSV (tmdb_id or title[,year], rating) or NDJSON file
+// the response is one NDJSON result per row, then a {"summary": ...} line
+export type RatingImportSummary = {
+  rows: number
+  created: number
+  updated: number
+  unchanged: number
+  superseded: number
+  error: number
+}
+
+export async function importRatings(user_id: string, file: File): Promise<RatingImportSummary> {
+  const isNdjson = /\.(ndjson|jsonl)$/i.test(file.name)
+  const res = await fetch(`${API_BASE}/api/ratings/${user_id}/import?format=${isNdjson ? "ndjson" : "csv"}`, {
+    method: "POST",
+    headers: { "Content-Type": isNdjson ? "application/x-ndjson" : "text/csv" },
+    body: file,
+  })
+
+  if (!res.ok) throw new Error("Failed to import ratings")
+
+  const lines = (await res.text()).trim().split("\n")
+  return JSON.parse(lines[lines.length - 1]).summary as RatingImportSummary
+}
+
 // --------
 // DELETE
 // --------
@@ -6,8 +6,19 @@ export type Movie = {
   genre: string;
   rating: string;
   description: string;
+  // community ratings from our users
+  user_rating_count?: number;
+  user_rating_avg?: number | null;
+  user_rating_histogram?: number[];
 };
 
+// "rating" = TMDB rating, "community" = Bayesian average of our users' ratings
+export type MovieSort = "rating" | "community";
+
+// Sparse fieldsets: only these fields are returned (id always is); the others are absent
+export type MovieField = keyof Movie;
+export const GRID_FIELDS: MovieField[] = ["id", "title", "poster", "rating"];
+
 export type PaginatedMoviesResponse = {
   movies: Movie[];
   total: number;
@@ -22,11 +33,18 @@ const API_BASE = "https://movielily.azurewebsites.net";
 export async function fetchMovies(
   q: string,
   page: number = 1,
-  signal?: AbortSignal
+  signal?: AbortSignal,
+  sort: MovieSort = "rating",
+  genres: string[] = [],
+  fields: MovieField[] = []
 ): Promise<PaginatedMoviesResponse> {
   const url = new URL(`${API_BASE}/search/movies`);
   if (q) url.searchParams.set("q", q);
   url.searchParams.set("page", page.toString());
+  if (sort !== "rating") url.searchParams.set("sort", sort);
+  // Movies in any of these genres
+  if (genres.length) url.searchParams.set("genre", genres.join(","));
+  if (fields.length) url.searchParams.set("fields", fields.join(","));
   const res = await fetch(url.toString(), { signal });
   if (!res.ok) throw new Error(await res.text());
   return res.json();
@@ -35,11 +53,15 @@ export async function fetchMovies(
 export async function fetchTrending(
   period: "day" | "week" = "day",
   page: number = 1,
-  signal?: AbortSignal
+  signal?: AbortSignal,
+  sort: MovieSort = "rating",
+  fields: MovieField[] = []
 ): Promise<PaginatedMoviesResponse> {
   const url = new URL(`${API_BASE}/trending`);
   url.searchParams.set("period", period);
   url.searchParams.set("page", page.toString());
+  if (sort !== "rating") url.searchParams.set("sort", sort);
+  if (fields.length) url.searchParams.set("fields", fields.join(","));
   const res = await fetch(url.toString(), { signal });
   if (!res.ok) throw new Error(await res.text());
   return res.json();
@@ -53,3 +75,15 @@ export async function fetchMovieDetails(
   if (!res.ok) throw new Error(await res.text());
   return res.json();
 }
+
+export async function fetchSimilarMovies(
+  id: number,
+  limit: number = 12,
+  signal?: AbortSignal,
+  fields: MovieField[] = []
+): Promise<Movie[]> {
+  const fieldsParam = fields.length ? `&fields=${fields.join(",")}` : "";
+  const res = await fetch(`${API_BASE}/movies/${id}/similar?limit=${limit}${fieldsParam}`, { signal });
+  if (!res.ok) throw new Error(await res.text());
+  return res.json();
+}
@@ -37,25 +37,20 @@ const GroupDetailsPage: React.FC = () => {
   useEffect(() => {
     if (groupId) {
       loadGroupDetails();
-      loadMembers();
     }
   }, [groupId]);
 
+  // Details and members come back together from the overview endpoint
   const loadGroupDetails = async () => {
-    const response = await api(`/api/groups/${groupId}`, { method: "GET" });
-    const data: Group = await response.json();
+    const response = await api(`/api/groups/${groupId}/overview?include=details,members`, { method: "GET" });
+    const data: { details: Group; members: GroupMember[] } = await response.json();
     // Removido: setGroup(data);
-    setGroupName(data.group_name || "");
-    setGroupColour(data.group_colour || "");
+    setGroupName(data.details.group_name || "");
+    setGroupColour(data.details.group_colour || "");
+    setMembers(data.members);
     setLoading(false);
   };
 
-  const loadMembers = async () => {
-    const response = await api(`/api/groups/${groupId}/members`, { method: "GET" });
-    const data: GroupMember[] = await response.json();
-    setMembers(data);
-  };
-
   const handleSave = async () => {
     setSaving(true);
     setStatusMessage("");
@@ -17,7 +17,7 @@ import { useProfile } from "@/hooks/useProfile";
 import { updateProfile } from "@/lib/profile-service";
 import { fetchFavouriteMovies } from "@/lib/favourite-movies-service";
 import { fetchMovieDetails, type Movie } from "@/lib/tmdb-api-helper";
-import { fetchUserRatings } from "@/lib/rating-service";
+import { fetchUserRatingsPage } from "@/lib/rating-service";
 import type { UserMovieRating } from "@/types/user-movie-ratings";
 
 const ProfilePage = () => {
@@ -65,25 +65,12 @@ const ProfilePage = () => {
       setErrRated(null); // no error yet
 
       try {
-        // Fetches ALL ratings for the user
-        const ratings: UserMovieRating[] = await fetchUserRatings(profile.user_id);
-      
-        // Sort ratings by creation date
-        const sorted = ratings
-        .slice() // slice (means we work on a new array)
-        .sort((a, b) => (b.created_at ?? "").localeCompare(a.created_at ?? "")); // compares two strings lexagraphically
-
-        // We take only the 10 most recent movies
-        const firstTen = sorted.slice(0, 10);
-
-        // For each rating, fetch the full movie details from TMDB 
-        // Return an array of objects containing both movie data and user ratings
-        const moviesWithRatings = await Promise.all(
-          firstTen.map(async (r) => {
-            const m = await fetchMovieDetails(r.tmdb_id);
-            return { movie: m, userRating: r.rating };
-          })
-        );
+        // Fetch only the 10 most recent ratings, with their movies embedded
+        const { ratings } = await fetchUserRatingsPage(profile.user_id, { limit: 10, hydrate: true });
+
+        const moviesWithRatings = ratings
+          .filter((r: UserMovieRating) => r.movie)
+          .map((r: UserMovieRating) => ({ movie: r.movie as Movie, userRating: r.rating }));
         setRatedMovies(moviesWithRatings);
       } catch (err) {
         console.log(err);
@@ -4,11 +4,12 @@
 
 import { useEffect, useRef, useState } from "react"
 import { useParams, Link } from "react-router-dom"
-import { fetchMovieDetails, type Movie } from "@/lib/tmdb-api-helper"
+import { fetchMovieDetails, fetchSimilarMovies, type Movie } from "@/lib/tmdb-api-helper"
 import { Card, CardContent } from "@/components/ui/card"
 import { Button } from "@/components/ui/button"
 import { StarRating } from "@/components/ui/ratings"
 import { HeartRating } from "@/components/ui/heart"
+import SmallMovieCard from "@/components/ui/smallMovieCard"
 import { useUser } from "@/hooks/useUser"
 
 import {
@@ -25,6 +26,7 @@ export default function MovieDetailsPage() {
   const tmdbId = Number(id)
 
   const [movie, setMovie] = useState<Movie | null>(null)
+  const [similar, setSimilar] = useState<Movie[]>([])
   const [loading, setLoading] = useState(true)
   const [err, setErr] = useState<string | null>(null)
 
@@ -65,6 +67,16 @@ export default function MovieDetailsPage() {
     return () => ctrl.abort()
   }, [tmdbId])
 
+  // "More like this" (optional: the page works without it)
+  useEffect(() => {
+    if (!Number.isFinite(tmdbId)) return
+    const ctrl = new AbortController()
+    fetchSimilarMovies(tmdbId, 12, ctrl.signal)
+      .then(setSimilar)
+      .catch(() => setSimilar([]))
+    return () => ctrl.abort()
+  }, [tmdbId])
+
   // Hydrate rating + favourite when user and movie are known
   useEffect(() => {
     let cancelled = false
@@ -200,6 +212,13 @@ export default function MovieDetailsPage() {
             <CardContent className="p-6 space-y-4">
               <div className="text-sm text-muted-foreground">{movie.genre}</div>
 
+              {movie.user_rating_count ? (
+                <div className="text-sm text-muted-foreground">
+                  Community rating: <span className="font-semibold">{movie.user_rating_avg?.toFixed(1)}</span> / 5
+                  {" "}({movie.user_rating_count} {movie.user_rating_count === 1 ? "rating" : "ratings"})
+                </div>
+              ) : null}
+
 
               <div className="flex items-center justify-between text-lg whitespace-nowrap">
                 {/* Left: Rating */}
@@ -241,6 +260,24 @@ export default function MovieDetailsPage() {
             </CardContent>
           </Card>
         </div>
+
+        {similar.length > 0 && (
+          <div className="mt-8">
+            <h2 className="mb-4 text-2xl font-semibold">More like this</h2>
+            <div className="grid gap-4 grid-cols-2 sm:grid-cols-3 md:grid-cols-4 lg:grid-cols-6">
+              {similar.map((m) => (
+                <SmallMovieCard
+                  key={m.id}
+                  id={m.id}
+                  title={m.title}
+                  year={m.year}
+                  poster={m.poster}
+                  genre={m.genre}
+                />
+              ))}
+            </div>
+          </div>
+        )}
       </div>
 
     </>
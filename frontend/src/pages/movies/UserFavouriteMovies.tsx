@@ -14,7 +14,7 @@ import { useUser } from "@/hooks/useUser"
 import { useProfile } from "@/hooks/useProfile"
 
 // API helper functions and type definitions
-import { fetchMovieDetails, type Movie } from "@/lib/tmdb-api-helper"
+import { type Movie } from "@/lib/tmdb-api-helper"
 import { fetchUserRatings } from "@/lib/rating-service"
 import type { UserMovieRating } from "@/types/user-movie-ratings"
 
@@ -83,74 +83,28 @@ const UserFavouriteMovies = () => {
     const ctrl = new AbortController()
     const { signal } = ctrl
 
-    // 1. Fetch user;s ratings from backend
-    // 2. Sort and deduplicate
-    // 3. Fetch full movie details from TMDB (throrrled)
-    // 4. Handle partial failures gracefully
+    // 1. Fetch user's ratings from backend, page by page, with movies embedded
+    // 2. Deduplicate
+    // 3. Skip ratings whose movie is missing from the catalog
     const loadAllRated = async () => {
       setLoadingRated(true)
       setErrRated(null)
 
       try {
-        // 1. Get all ratings for this user 
-        const ratings: UserMovieRating[] = await fetchUserRatings(profile.user_id)
-
-        // 2. Sort by creation date (newest first)
-        // Use localeCompare for string/date comparison
-        // Handle null created_at by treating as empty string
-        const sorted = ratings
-        .slice() // create a copy to avoid mutation
-        .sort((a, b) => (b.created_at ?? "").localeCompare(a.created_at ?? ""))
-
-        // 3. Remove duplicates (keep newest rating if user rated same movie twice)
-        // Map creates a temporary map with tmbd_id as key, automatically deduping
-        const deduped = Array.from(new Map(sorted.map(r => [r.tmdb_id, r])).values())
-
-        // 4. Fetch movie details w/ throttling
-        // Process in chunks to avoid rate limits
-
-        const concurrency = 6 // can only have 6 simultaneous requests
-        const results: PromiseSettledResult<RatedMovie>[] = []
-
-        // Loop through ratings in chunks
-        for (let i = 0; i < deduped.length; i += concurrency) {
-          // Check if user navigated away (abort signal triggered)
-          if (signal.aborted) return
-
-          // Get next chunk (up to 6 ratings) 
-          const chunk = deduped.slice(i, i + concurrency)
-
-          // Fetch movie details for this chunk
-          // Promise.allSettled waits for all to finish (success or failure)
-          const chunkResults = await Promise.allSettled(
-            chunk.map(async (r) => {
-              const m = await fetchMovieDetails(r.tmdb_id, signal)
-              return { movie: m, userRating: r.rating, ratedAt: r.created_at ?? undefined }
-            })
-          )
-          results.push(...chunkResults)
-        }
+        // 1. Get all ratings for this user (already newest first)
+        const ratings: UserMovieRating[] = await fetchUserRatings(profile.user_id, { hydrate: true }, signal)
 
-        // Final abort check 
+        // Check if user navigated away (abort signal triggered)
         if (signal.aborted) return
 
-      // 5. Separate successful fetches from failures
-        // extract successful results
-        const ok = results
-        .filter((r): r is PromiseFulfilledResult<RatedMovie> => r.status === "fulfilled")
-        .map((r) => r.value)
-
-        // Extract failures (excluding intentional aborts)
-        const failures = results
-        .filter((r): r is PromiseRejectedResult => r.status === "rejected")
-        .map((r) => r.reason)
-        .filter((e) => !isAbortError(e))
+        // 2. Remove duplicates (keep newest rating if user rated same movie twice)
+        // Map keeps the last value per key, so insert oldest first
+        const deduped = Array.from(new Map(ratings.slice().reverse().map(r => [r.tmdb_id, r])).values()).reverse()
 
-        // If we have nothing then show an error
-        if (ok.length === 0 && failures.length > 0) {
-          setErrRated("Failed to load rated movies.")
-          return
-        }
+        // 3. Keep only ratings that came back with a movie
+        const ok: RatedMovie[] = deduped
+          .filter((r) => r.movie)
+          .map((r) => ({ movie: r.movie as Movie, userRating: r.rating, ratedAt: r.created_at ?? undefined }))
 
         // Update state with successfully fetched movies
         setRatedMovies(ok)
@@ -1,8 +1,12 @@
 // src/types/user-movie-ratings.ts
+import type { Movie } from "@/lib/tmdb-api-helper"
+
 export interface UserMovieRating {
   user_id: string
   tmdb_id: number
   rating: number
   created_at?: string
+  // only present when fetched with hydrate=true (null if the movie is missing)
+  movie?: Movie | null
 }
 